@@ -0,0 +1,119 @@
+"""
+Benchmark de arranque de un worker: tiempo de imports (python -X importtime),
+tiempo hasta la primera respuesta y memoria (RSS) de un worker inactivo.
+
+Uso (desde la raiz del proyecto):
+    python benchmarks/arranque.py
+    python benchmarks/arranque.py --repeticiones 10 --precargar
+
+--precargar simula un worker con PRECARGAR_EXPORTADORES=1 para comparar.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+MODULOS_PESADOS = ('openpyxl', 'xhtml2pdf', 'reportlab', 'pypdf', 'html5lib')
+
+# Se ejecuta en un proceso nuevo para medir un arranque en frio real
+WORKER = r"""
+import json, os, sys, time
+inicio = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+from config.wsgi import application
+listo = time.perf_counter()
+
+from django.test import Client
+respuesta = Client().get('/login/')
+primera = time.perf_counter()
+
+rss_kb = None
+try:
+    with open('/proc/self/status') as f:
+        for linea in f:
+            if linea.startswith('VmRSS:'):
+                rss_kb = int(linea.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({
+    'status': respuesta.status_code,
+    'carga_wsgi_ms': (listo - inicio) * 1000,
+    'primera_respuesta_ms': (primera - inicio) * 1000,
+    'rss_mb': rss_kb / 1024 if rss_kb else None,
+    'modulos': sorted(m for m in %r if m in sys.modules),
+}))
+""" % (MODULOS_PESADOS,)
+
+
+def _entorno(precargar):
+    entorno = dict(os.environ)
+    entorno.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    if precargar:
+        entorno['PRECARGAR_EXPORTADORES'] = '1'
+    else:
+        entorno.pop('PRECARGAR_EXPORTADORES', None)
+    return entorno
+
+
+def medir_importtime(precargar):
+    """Devuelve (total_ms, [(paquete, ms), ...]) con el tiempo propio sumado por paquete raiz."""
+    codigo = 'from config.wsgi import application'
+    salida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=RAIZ, env=_entorno(precargar), capture_output=True, text=True, check=True,
+    ).stderr
+
+    total_us = 0
+    por_paquete = {}
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, _acumulado, nombre = (parte.strip() for parte in linea[len('import time:'):].split('|'))
+        raiz = nombre.split('.')[0]
+        por_paquete[raiz] = por_paquete.get(raiz, 0) + int(propio)
+        total_us += int(propio)
+    paquetes = sorted(((p, us / 1000) for p, us in por_paquete.items()), key=lambda p: p[1], reverse=True)
+    return total_us / 1000, paquetes
+
+
+def medir_worker(precargar):
+    salida = subprocess.run(
+        [sys.executable, '-c', WORKER],
+        cwd=RAIZ, env=_entorno(precargar), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--precargar', action='store_true', help='Simula PRECARGAR_EXPORTADORES=1.')
+    parser.add_argument('--top', type=int, default=10, help='Paquetes mas lentos a mostrar.')
+    args = parser.parse_args()
+
+    total_ms, paquetes = medir_importtime(args.precargar)
+    print(f'Imports hasta config.wsgi: {total_ms:.1f} ms (suma de tiempos propios)')
+    for nombre, ms in paquetes[:args.top]:
+        print(f'  {nombre:<30} {ms:8.1f} ms')
+
+    muestras = [medir_worker(args.precargar) for _ in range(args.repeticiones)]
+    print(f'\nWorker en frio ({args.repeticiones} repeticiones, mediana):')
+    for clave, etiqueta in (
+        ('carga_wsgi_ms', 'Carga de la app WSGI'),
+        ('primera_respuesta_ms', 'Hasta la primera respuesta'),
+    ):
+        print(f'  {etiqueta:<30} {statistics.median(m[clave] for m in muestras):8.1f} ms')
+    rss = [m['rss_mb'] for m in muestras if m['rss_mb'] is not None]
+    if rss:
+        print(f'  {"RSS del worker inactivo":<30} {statistics.median(rss):8.1f} MB')
+    print(f'  Modulos de exportacion cargados: {", ".join(muestras[-1]["modulos"]) or "ninguno"}')
+
+
+if __name__ == '__main__':
+    main()
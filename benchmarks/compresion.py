@@ -0,0 +1,82 @@
+"""
+Benchmark de compresion de respuestas dinamicas: bytes enviados y costo de CPU
+por respuesta con gzip y Brotli a distintos niveles, para elegir
+COMPRESION_NIVEL_GZIP y COMPRESION_NIVEL_BROTLI.
+
+Usa HTML sintetico con la forma de las tablas de reportes (filas repetitivas
+con numeros y nombres distintos), a varios tamanos.
+
+Uso (desde la raiz del proyecto):
+    python benchmarks/compresion.py
+    python benchmarks/compresion.py --filas 50 500 5000 --repeticiones 20
+"""
+import argparse
+import gzip
+import random
+import statistics
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+NIVELES_GZIP = (1, 6, 9)
+NIVELES_BROTLI = (1, 4, 5, 11)
+NOMBRES = ('Ana', 'Luis', 'Maria', 'Jorge', 'Sofia', 'Carlos', 'Elena', 'Diego')
+PROYECTOS = ('Portal clientes', 'Migracion ERP', 'App movil', 'Auditoria', 'Intranet')
+
+
+def html_reporte(filas, semilla=0):
+    azar = random.Random(semilla)
+    partes = ['<table class="table table-striped table-sm"><thead><tr>'
+              '<th>Fecha</th><th>Empleado</th><th>Proyecto</th><th>Horas</th>'
+              '<th>Descripcion</th></tr></thead><tbody>']
+    for i in range(filas):
+        partes.append(
+            f'<tr><td>2025-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d}</td>'
+            f'<td>{azar.choice(NOMBRES)} {azar.choice(NOMBRES)}son</td>'
+            f'<td>{azar.choice(PROYECTOS)}</td>'
+            f'<td class="text-end">{azar.randint(1, 16) / 2:.2f}</td>'
+            f'<td>Avance del entregable {i} ({azar.randint(1000, 9999)})</td></tr>'
+        )
+    partes.append('</tbody></table>')
+    return ''.join(partes).encode('utf-8')
+
+
+def medir(comprimir, datos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = comprimir(datos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return len(salida), statistics.median(tiempos)
+
+
+def compresores():
+    for nivel in NIVELES_GZIP:
+        yield f'gzip-{nivel}', lambda d, n=nivel: gzip.compress(d, compresslevel=n, mtime=0)
+    if brotli is not None:
+        for nivel in NIVELES_BROTLI:
+            yield f'br-{nivel}', lambda d, n=nivel: brotli.compress(d, quality=n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[20, 200, 2000, 20000])
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print('Brotli no esta instalado: solo se mide gzip.')
+    for filas in args.filas:
+        datos = html_reporte(filas)
+        print(f'\n{filas} filas: {len(datos) / 1024:.1f} KB sin comprimir')
+        print(f'  {"codificacion":<12} {"KB":>9} {"ratio":>7} {"CPU ms":>9}')
+        for nombre, comprimir in compresores():
+            tamano, ms = medir(comprimir, datos, args.repeticiones)
+            print(f'  {nombre:<12} {tamano / 1024:9.1f} {len(datos) / tamano:7.1f} {ms:9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark de la latencia de logins legitimos durante un ataque de fuerza bruta,
+con y sin el limite de intentos de gestion/acceso.py (LOGIN_LIMITAR).
+
+Los atacantes (procesos separados que comparten --ips-atacantes direcciones)
+envian contrasenas incorrectas para usuarios al azar a login_view en un ciclo; los usuarios legitimos (otras IPs) inician
+sesion con su contrasena correcta. Reporta, durante --duracion segundos:
+logins legitimos por segundo y su latencia, y cuantos intentos del ataque
+llegaron a verificar la contrasena (los demas se rechazaron con 429 antes del hash).
+
+Cada modo usa una base nueva en un directorio temporal, nunca db.sqlite3, y el
+cache en esa misma base (DatabaseCache) para que las cubetas se compartan entre
+procesos como entre workers de gunicorn.
+
+Uso (desde la raiz del proyecto):
+    python benchmarks/login_bajo_ataque.py
+    python benchmarks/login_bajo_ataque.py --atacantes 8 --legitimos 2 --duracion 20
+    python benchmarks/login_bajo_ataque.py --ips-atacantes 4
+    PASSWORD_PBKDF2_ITERACIONES=600000 python benchmarks/login_bajo_ataque.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+INICIO = r"""
+import json, os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = os.environ['BENCH_SQLITE']
+settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'gestion_cache'}}
+import django
+django.setup()
+"""
+
+PREPARAR = INICIO + r"""
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+call_command('migrate', verbosity=0)
+call_command('createcachetable', verbosity=0)
+for i in range(int(sys.argv[1])):
+    User.objects.create_user(f'legitimo{i}', password='clave-correcta', is_staff=True)
+"""
+
+WORKER = INICIO + r"""
+import random, time
+from django.test import Client
+
+rol, indice, arranque, duracion, ips = sys.argv[1], int(sys.argv[2]), float(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5])
+if rol == 'atacante':
+    cliente = Client(REMOTE_ADDR=f'203.0.113.{indice % ips + 1}')
+else:
+    cliente = Client(REMOTE_ADDR=f'198.51.100.{indice + 1}')
+
+time.sleep(max(0, arranque - time.time()))
+fin = time.time() + duracion
+latencias, hashes, rechazados, errores = [], 0, 0, 0
+while time.time() < fin:
+    inicio = time.perf_counter()
+    if rol == 'atacante':
+        datos = {'username': f'victima{random.randrange(1000)}', 'password': 'adivinanza'}
+        respuesta = cliente.post('/login/', datos)
+        if respuesta.status_code == 429:
+            rechazados += 1
+        else:
+            hashes += 1
+        continue
+    respuesta = cliente.post('/login/', {'username': f'legitimo{indice}', 'password': 'clave-correcta'})
+    if respuesta.status_code == 302:
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        cliente.logout()
+    else:
+        errores += 1
+print(json.dumps({'rol': rol, 'latencias': latencias, 'hashes': hashes, 'rechazados': rechazados, 'errores': errores}))
+"""
+
+
+def _entorno(ruta, limitar):
+    entorno = dict(os.environ)
+    entorno.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    entorno.pop('DATABASE_URL', None)
+    entorno.pop('RENDER', None)
+    entorno['BENCH_SQLITE'] = str(ruta)
+    entorno['LOGIN_LIMITAR'] = '1' if limitar else '0'
+    return entorno
+
+
+def medir(limitar, atacantes, legitimos, duracion, ips):
+    with tempfile.TemporaryDirectory() as directorio:
+        entorno = _entorno(Path(directorio) / 'bench.sqlite3', limitar)
+        subprocess.run(
+            [sys.executable, '-c', PREPARAR, str(legitimos)], cwd=RAIZ, env=entorno, capture_output=True, check=True,
+        )
+
+        # Todos los procesos arrancan a la misma hora, ya con Django cargado
+        arranque = time.time() + 3
+        roles = [('atacante', i) for i in range(atacantes)] + [('legitimo', i) for i in range(legitimos)]
+        procesos = [
+            subprocess.Popen(
+                [sys.executable, '-c', WORKER, rol, str(indice), str(arranque), str(duracion), str(ips)],
+                cwd=RAIZ, env=entorno, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for rol, indice in roles
+        ]
+        resultados = []
+        for proceso in procesos:
+            stdout, stderr = proceso.communicate()
+            if proceso.returncode != 0:
+                raise RuntimeError(stderr)
+            resultados.append(json.loads(stdout.strip().splitlines()[-1]))
+
+    legitimos_ = [r for r in resultados if r['rol'] == 'legitimo']
+    ataque = [r for r in resultados if r['rol'] == 'atacante']
+    latencias = sorted(l for r in legitimos_ for l in r['latencias'])
+    return {
+        'logins_por_segundo': len(latencias) / duracion,
+        'p50_ms': statistics.median(latencias) if latencias else 0,
+        'p95_ms': latencias[int(len(latencias) * 0.95) - 1] if latencias else 0,
+        'fallidos': sum(r['errores'] for r in legitimos_),
+        'hashes_ataque': sum(r['hashes'] for r in ataque),
+        'rechazados_ataque': sum(r['rechazados'] for r in ataque),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--atacantes', type=int, default=6)
+    parser.add_argument('--legitimos', type=int, default=2)
+    parser.add_argument('--ips-atacantes', type=int, default=1, help='Direcciones que reparten los atacantes.')
+    parser.add_argument('--duracion', type=float, default=15, help='Segundos de carga por modo.')
+    args = parser.parse_args()
+
+    print(
+        f'{args.atacantes} atacantes desde {args.ips_atacantes} IP, {args.legitimos} usuarios legitimos, '
+        f'{args.duracion:g} s por modo, {os.cpu_count()} CPU\n'
+    )
+    print(
+        f'{"Modo":<12} {"logins/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"fallidos":>9} '
+        f'{"hashes ataque":>14} {"429 ataque":>11}'
+    )
+    for limitar, etiqueta in ((False, 'sin limite'), (True, 'con limite')):
+        datos = medir(limitar, args.atacantes, args.legitimos, args.duracion, args.ips_atacantes)
+        print(
+            f'{etiqueta:<12} {datos["logins_por_segundo"]:9.1f} {datos["p50_ms"]:8.1f} {datos["p95_ms"]:8.1f} '
+            f'{datos["fallidos"]:9d} {datos["hashes_ataque"]:14d} {datos["rechazados_ataque"]:11d}'
+        )
+
+
+if __name__ == '__main__':
+    main()
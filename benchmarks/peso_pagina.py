@@ -0,0 +1,71 @@
+"""
+Reporte de peso de pagina: bytes de CSS/JS que descarga cada pagina del sistema,
+sin comprimir, con gzip y con Brotli, antes y despues del recorte de Bootstrap.
+
+"Antes" usa el bootstrap.min.css completo (el que se servia desde el CDN);
+"despues" usa bootstrap.recortado.min.css generado por `manage.py recortar_css`.
+Antes se cargaba bootstrap.bundle.min.js (incluye Popper); aqui ambos lados cuentan
+solo bootstrap.min.js, asi que el ahorro real es algo mayor al reportado.
+
+Uso (desde la raiz del proyecto):
+    python benchmarks/peso_pagina.py
+"""
+import gzip
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RAIZ = Path(__file__).resolve().parent.parent
+APP = RAIZ / 'gestion'
+ESTATICOS = APP / 'static' / 'gestion'
+
+COMUNES = [
+    ESTATICOS / 'vendor' / 'bootstrap' / 'bootstrap.min.js',
+    ESTATICOS / 'css' / 'base.css',
+    ESTATICOS / 'css' / 'styles.css',
+]
+ANTES = [APP / 'assets' / 'bootstrap' / 'bootstrap.min.css'] + COMUNES
+DESPUES = [ESTATICOS / 'vendor' / 'bootstrap' / 'bootstrap.recortado.min.css'] + COMUNES
+
+
+def tamanos(ruta):
+    datos = ruta.read_bytes()
+    return (
+        len(datos),
+        len(gzip.compress(datos, compresslevel=9)),
+        len(brotli.compress(datos)) if brotli else None,
+    )
+
+
+def _kb(n):
+    return f'{n / 1024:8.1f}' if n is not None else '     n/d'
+
+
+def reporte(titulo, rutas):
+    print(f'\n{titulo}')
+    print(f'  {"archivo":<34} {"bytes KB":>8} {"gzip KB":>8} {"br KB":>8}')
+    totales = [0, 0, 0]
+    for ruta in rutas:
+        fila = tamanos(ruta)
+        print(f'  {ruta.name:<34} {_kb(fila[0])} {_kb(fila[1])} {_kb(fila[2])}')
+        for i, valor in enumerate(fila):
+            totales[i] = totales[i] + valor if valor is not None and totales[i] is not None else None
+    print(f'  {"TOTAL":<34} {_kb(totales[0])} {_kb(totales[1])} {_kb(totales[2])}')
+    return totales
+
+
+def main():
+    antes = reporte('Antes (Bootstrap completo)', ANTES)
+    despues = reporte('Despues (Bootstrap recortado)', DESPUES)
+    print('\nAhorro por pagina en cache fria:')
+    for i, etiqueta in enumerate(('sin comprimir', 'gzip', 'brotli')):
+        if antes[i] and despues[i]:
+            print(f'  {etiqueta:<14} {_kb(antes[i] - despues[i])} KB ({(1 - despues[i] / antes[i]) * 100:.0f}%)')
+    print('  Peticiones a dominios externos: 2 -> 0 (cdn.jsdelivr.net)')
+
+
+if __name__ == '__main__':
+    main()
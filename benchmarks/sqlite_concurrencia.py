@@ -0,0 +1,165 @@
+"""
+Benchmark de SQLite con escritores y lectores concurrentes en procesos separados,
+con y sin el perfil de gestion/sqlite.py (WAL, pragmas y BEGIN IMMEDIATE).
+
+Cada escritor envia registrar_horas (POST) y cada lector abre mis_horas (GET) en
+un ciclo durante --duracion segundos, a traves de las vistas reales. Reporta
+operaciones por segundo, latencia y cuantos requests fallaron con
+"database is locked".
+
+Cada modo usa una base nueva en un directorio temporal (WAL queda grabado en el
+archivo), nunca db.sqlite3.
+
+Uso (desde la raiz del proyecto):
+    python benchmarks/sqlite_concurrencia.py
+    python benchmarks/sqlite_concurrencia.py --escritores 8 --lectores 4 --duracion 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+INICIO = r"""
+import json, os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = os.environ['BENCH_SQLITE']
+import django
+django.setup()
+"""
+
+PREPARAR = INICIO + r"""
+import datetime
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from gestion.models import AsignacionProyecto, Cliente, Proyecto, RegistroHoras
+
+call_command('migrate', verbosity=0)
+empleado = User.objects.create_user('bench', password='x')
+cliente = Cliente.objects.create(nombre='Cliente benchmark', rfc='BEN123456AB1')
+proyecto = Proyecto.objects.create(
+    nombre='Proyecto benchmark', fecha_inicial=datetime.date(2020, 1, 1), cantidad_h=100000, cliente=cliente,
+)
+AsignacionProyecto.objects.create(empleado=empleado, proyecto=proyecto)
+# Lo que leen los lectores (el mes actual) no crece durante la prueba
+hoy = datetime.date.today()
+RegistroHoras.objects.bulk_create([
+    RegistroHoras(empleado=empleado, proyecto=proyecto, fecha=hoy.replace(day=1), horas=1, descripcion='base')
+    for _ in range(40)
+])
+print(json.dumps({'proyecto': proyecto.id}))
+"""
+
+WORKER = INICIO + r"""
+import time
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import Client
+
+rol, proyecto_id, arranque, duracion = sys.argv[1], sys.argv[2], float(sys.argv[3]), float(sys.argv[4])
+cliente = Client()
+cliente.force_login(User.objects.get(username='bench'))
+# Los escritores registran en un mes pasado para no cambiar lo que leen los lectores
+datos = {'proyecto': proyecto_id, 'fecha': '2024-01-15', 'horas': '1', 'descripcion': 'benchmark'}
+
+time.sleep(max(0, arranque - time.time()))
+fin = time.time() + duracion
+latencias, bloqueos, otros_errores = [], 0, 0
+while time.time() < fin:
+    inicio = time.perf_counter()
+    try:
+        if rol == 'escritor':
+            respuesta = cliente.post('/horas/registrar/', datos)
+            exito = respuesta.status_code == 302
+        else:
+            respuesta = cliente.get('/horas/mis-horas/')
+            exito = respuesta.status_code == 200
+    except OperationalError as error:
+        if 'locked' not in str(error):
+            raise
+        bloqueos += 1
+        continue
+    if exito:
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    else:
+        otros_errores += 1
+print(json.dumps({'rol': rol, 'latencias': latencias, 'bloqueos': bloqueos, 'otros_errores': otros_errores}))
+"""
+
+
+def _entorno(ruta, perfil):
+    entorno = dict(os.environ)
+    entorno.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    entorno.pop('DATABASE_URL', None)
+    entorno.pop('RENDER', None)
+    entorno['BENCH_SQLITE'] = str(ruta)
+    entorno['SQLITE_PERFIL'] = '1' if perfil else '0'
+    return entorno
+
+
+def medir(perfil, escritores, lectores, duracion):
+    with tempfile.TemporaryDirectory() as directorio:
+        entorno = _entorno(Path(directorio) / 'bench.sqlite3', perfil)
+        salida = subprocess.run(
+            [sys.executable, '-c', PREPARAR], cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+        ).stdout
+        proyecto_id = json.loads(salida.strip().splitlines()[-1])['proyecto']
+
+        # Todos los procesos arrancan a la misma hora, ya con Django cargado
+        arranque = time.time() + 3
+        roles = ['escritor'] * escritores + ['lector'] * lectores
+        procesos = [
+            subprocess.Popen(
+                [sys.executable, '-c', WORKER, rol, str(proyecto_id), str(arranque), str(duracion)],
+                cwd=RAIZ, env=entorno, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for rol in roles
+        ]
+        resultados = []
+        for proceso in procesos:
+            stdout, stderr = proceso.communicate()
+            if proceso.returncode != 0:
+                raise RuntimeError(stderr)
+            resultados.append(json.loads(stdout.strip().splitlines()[-1]))
+
+    resumen = {}
+    for rol in ('escritor', 'lector'):
+        del_rol = [r for r in resultados if r['rol'] == rol]
+        latencias = sorted(l for r in del_rol for l in r['latencias'])
+        bloqueos = sum(r['bloqueos'] for r in del_rol)
+        intentos = len(latencias) + bloqueos + sum(r['otros_errores'] for r in del_rol)
+        resumen[rol] = {
+            'por_segundo': len(latencias) / duracion,
+            'bloqueos_pct': 100 * bloqueos / intentos if intentos else 0,
+            'p50_ms': statistics.median(latencias) if latencias else 0,
+            'p95_ms': latencias[int(len(latencias) * 0.95) - 1] if latencias else 0,
+        }
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--lectores', type=int, default=4)
+    parser.add_argument('--duracion', type=float, default=10, help='Segundos de carga por modo.')
+    args = parser.parse_args()
+
+    print(f'{args.escritores} escritores, {args.lectores} lectores, {args.duracion:g} s por modo\n')
+    print(f'{"Modo":<12} {"Rol":<9} {"ops/s":>8} {"locked %":>9} {"p50 ms":>8} {"p95 ms":>8}')
+    for perfil, etiqueta in ((False, 'sin perfil'), (True, 'con perfil')):
+        for rol, datos in medir(perfil, args.escritores, args.lectores, args.duracion).items():
+            print(
+                f'{etiqueta:<12} {rol:<9} {datos["por_segundo"]:8.1f} {datos["bloqueos_pct"]:9.1f} '
+                f'{datos["p50_ms"]:8.1f} {datos["p95_ms"]:8.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,11 @@
 set -o errexit
 
 pip install -r requirements.txt
+python manage.py recortar_css
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py createcachetable
+# Verifica la base de datos y llena el cache compartido antes del primer request
+python manage.py warmup
 
 
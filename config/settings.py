@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'gestion.middleware.CompresionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,23 +57,45 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Compresion de respuestas dinamicas (gestion.middleware.CompresionMiddleware)
+COMPRESION_MIN_BYTES = int(os.environ.get('COMPRESION_MIN_BYTES', 1024))
+COMPRESION_NIVEL_GZIP = int(os.environ.get('COMPRESION_NIVEL_GZIP', 6))
+COMPRESION_NIVEL_BROTLI = int(os.environ.get('COMPRESION_NIVEL_BROTLI', 4))
+COMPRESION_EXCLUIR_CSRF = True
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Plantillas compiladas una vez por worker, tambien con DEBUG.
+            # En desarrollo runserver limpia este cache al modificar una plantilla.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Reportes y registros de horas envian el detalle en streaming, por lotes de filas
+# (gestion/streaming.py). Con 0 se renderiza la pagina completa y se cachea la bitacora.
+STREAMING_REPORTES = os.environ.get('STREAMING_REPORTES', '1') == '1'
+STREAMING_FILAS_POR_LOTE = 500
+
+# Duracion de los fragmentos {% cache %} de reportes y listados (segundos).
+# Su clave incluye la version de los datos, asi que nunca se sirven desactualizados.
+FRAGMENTOS_TIMEOUT = int(os.environ.get('FRAGMENTOS_TIMEOUT', 60 * 60))
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
@@ -93,6 +116,40 @@ else:
         }
     }
 
+# Perfil de SQLite para escrituras concurrentes (gestion/sqlite.py). Con SQLITE_PERFIL=0
+# se usa SQLite sin ajustes (para comparar con benchmarks/sqlite_concurrencia.py).
+SQLITE_PERFIL = os.environ.get('SQLITE_PERFIL', '1') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # negativo = KiB (20 MB)
+    'temp_store': 'MEMORY',
+}
+if SQLITE_PERFIL and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+if DEBUG:
+    # En desarrollo (un solo proceso) basta con el cache en memoria
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    # En produccion los workers de gunicorn comparten el cache en la base de datos
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'gestion_cache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -113,6 +170,31 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Hasher de contrasenas con iteraciones configurables (gestion/hashers.py). Al cambiarlas,
+# cada contrasena se vuelve a hashear con el valor nuevo en el siguiente login exitoso.
+# None = las iteraciones por defecto de Django.
+PASSWORD_PBKDF2_ITERACIONES = int(os.environ['PASSWORD_PBKDF2_ITERACIONES']) if os.environ.get('PASSWORD_PBKDF2_ITERACIONES') else None
+PASSWORD_HASHERS = [
+    'gestion.hashers.PBKDF2Configurable',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Limite de intentos de login (gestion/acceso.py): cubetas de fichas por usuario y por IP
+# en el cache compartido; un intento sin fichas recibe 429 antes de verificar la contrasena.
+# capacidad = intentos seguidos permitidos, por_minuto = fichas que se recuperan por minuto.
+LOGIN_LIMITAR = os.environ.get('LOGIN_LIMITAR', '1') == '1'
+LOGIN_LIMITES = {
+    'usuario': {'capacidad': 5, 'por_minuto': 1},
+    'ip': {'capacidad': int(os.environ.get('LOGIN_LIMITE_IP', 30)), 'por_minuto': 10},
+}
+# Proxies confiables delante de gunicorn (Render agrega uno): de ahi sale la IP del cliente
+LOGIN_PROXIES = int(os.environ.get('LOGIN_PROXIES', 0 if DEBUG else 1))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -134,6 +216,19 @@ STATICFILES_DIRS = [
 ]
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# En produccion collectstatic genera nombres con hash del contenido (cache inmutable
+# de WhiteNoise) y variantes precomprimidas .br y .gz (gzip con zopfli)
+if not DEBUG:
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'gestion.storage.EstaticosComprimidosStorage',
+        },
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -143,6 +238,58 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 LOGIN_URL = 'login'
 
+# Carga openpyxl/xhtml2pdf al arrancar en lugar de en la primera exportacion
+# (solo conviene en workers que atienden exportaciones)
+PRECARGAR_EXPORTADORES = os.environ.get('PRECARGAR_EXPORTADORES') == '1'
+
+# Importa los modulos de las vistas y compila las plantillas al cargar config/wsgi.py,
+# antes del primer request (gestion/calentamiento.py). El cache compartido se calienta
+# con manage.py warmup en build.sh.
+CALENTAR_WORKER = os.environ.get('CALENTAR_WORKER', '0' if DEBUG else '1') == '1'
+
+# Reportes y exportaciones identicos y concurrentes se calculan una sola vez
+# (gestion/coalescencia.py). Segundos:
+COALESCENCIA_ESPERA = int(os.environ.get('COALESCENCIA_ESPERA', 30))  # espera maxima por el resultado ajeno
+COALESCENCIA_CANDADO = 120    # vida del candado si quien calcula muere
+COALESCENCIA_RESULTADO = 60   # el resultado se comparte tambien con quien llegue poco despues
+
+# Proyectos FIN/CAN sin actividad en este numero de dias se mueven al archivo
+# (manage.py archivar_proyectos, gestion/archivo.py)
+ARCHIVO_ANTIGUEDAD_DIAS = int(os.environ.get('ARCHIVO_ANTIGUEDAD_DIAS', 365))
+
+# Calendario laboral del reporte de utilizacion (gestion/utilizacion.py): dias de la
+# semana laborables (0 = lunes) y capacidad semanal de quien no tiene PerfilEmpleado.
+# Los feriados se capturan en el admin (DiaFeriado).
+DIAS_LABORALES = (0, 1, 2, 3, 4)
+CAPACIDAD_SEMANAL = int(os.environ.get('CAPACIDAD_SEMANAL', 40))
+
+# Pronostico nocturno del presupuesto de horas (manage.py pronosticar_presupuestos,
+# gestion/pronosticos.py): dias de historial para ajustar el ritmo, dias hasta el
+# agotamiento que se consideran riesgo alto / medio, y horizonte maximo (mas alla
+# el proyecto queda sin fecha de agotamiento).
+PRONOSTICO_VENTANA_DIAS = int(os.environ.get('PRONOSTICO_VENTANA_DIAS', 56))
+PRONOSTICO_RIESGO_ALTO_DIAS = 30
+PRONOSTICO_RIESGO_MEDIO_DIAS = 90
+PRONOSTICO_HORIZONTE_DIAS = 5 * 365
+
+# Control de admision de endpoints costosos (gestion/admision.py).
+# WEB_CONCURRENCY es el numero de workers de gunicorn (su default es 1).
+ADMISION_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Workers que las exportaciones nunca pueden ocupar (login, registrar_horas, ...).
+# Con un solo worker no queda ninguno para exportar: las exportaciones responden 429
+# hasta subir WEB_CONCURRENCY. runserver atiende en hilos y no reserva.
+ADMISION_RESERVADOS_INTERACTIVOS = int(os.environ.get('ADMISION_RESERVADOS_INTERACTIVOS', 0 if DEBUG else 1))
+ADMISION_GRUPOS = {
+    'exportaciones': {
+        'por_proceso': int(os.environ.get('ADMISION_EXPORTACIONES_POR_PROCESO', 1)),
+        'global': int(os.environ.get('ADMISION_EXPORTACIONES_GLOBAL', 2)),
+        'cola': int(os.environ.get('ADMISION_EXPORTACIONES_COLA', 2)),
+        'espera': 10,            # segundos maximos en cola
+        'reintentar': 30,        # valor de Retry-After al rechazar
+        'duracion_maxima': 300,  # un lugar se libera solo si el worker muere a media exportacion
+    },
+}
+
 DJANGO_SUPERUSER_PASSWORD = '0902'
 
 # Configuración profesional de errores para producción
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Calienta el worker (imports y plantillas) antes de atender trafico
+from gestion.calentamiento import calentar_worker  # noqa: E402
+
+calentar_worker()
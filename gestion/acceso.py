@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Limite de intentos de login antes de verificar la contrasena.
+
+Cada intento toma una ficha de dos cubetas en el cache compartido: una por
+nombre de usuario y otra por IP (LOGIN_LIMITES). Si alguna esta vacia el
+intento se rechaza con 429 sin correr el hash (PBKDF2), que es lo que ocupa
+el CPU del worker. Un login exitoso devuelve sus fichas: el personal que entra
+al inicio del turno, aunque comparta IP, no gasta el limite; solo los intentos
+fallidos lo consumen.
+
+Cada cubeta se guarda como un solo valor (GCRA): la hora a partir de la cual
+vuelve a estar llena. Leer y escribir no es atomico entre workers; en una
+rafaga pueden colarse unos pocos intentos de mas, lo que no cambia el costo.
+"""
+
+import hashlib
+import logging
+import math
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+
+class Bloqueado(Exception):
+    """Demasiados intentos; reintentar despues de `reintentar` segundos."""
+
+    def __init__(self, cubeta, reintentar):
+        super().__init__(f'login bloqueado por {cubeta}')
+        self.cubeta = cubeta
+        self.reintentar = reintentar
+
+
+def ip_cliente(request):
+    """
+    IP del cliente. Detras de LOGIN_PROXIES proxies confiables se toma la que
+    agrego el ultimo de ellos en X-Forwarded-For (las anteriores las pone el cliente).
+    """
+    if settings.LOGIN_PROXIES:
+        reenviadas = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(reenviadas) >= settings.LOGIN_PROXIES:
+            return reenviadas[-settings.LOGIN_PROXIES]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _cubetas(request, username):
+    # El nombre lo escribe el cliente: en la clave va su hash, no el texto (espacios,
+    # caracteres de control o longitud que el cache no acepta en una clave)
+    normalizado = unicodedata.normalize('NFKC', username).strip().lower()
+    return {
+        'usuario': 'gestion:login:usuario:' + hashlib.sha256(normalizado.encode()).hexdigest(),
+        'ip': f'gestion:login:ip:{ip_cliente(request)}',
+    }
+
+
+def _intervalo(cubeta):
+    return 60 / settings.LOGIN_LIMITES[cubeta]['por_minuto']
+
+
+def tomar_intento(request, username):
+    """
+    Toma una ficha de cada cubeta o lanza Bloqueado sin tomar ninguna.
+    Llamar antes de validar el formulario de login.
+    """
+    if not settings.LOGIN_LIMITAR:
+        return
+    claves = _cubetas(request, username)
+    ahora = time.time()
+    llenas_en = cache.get_many(list(claves.values()))
+    nuevas = {}
+    for cubeta, clave in claves.items():
+        intervalo = _intervalo(cubeta)
+        llena_en = max(llenas_en.get(clave, ahora), ahora) + intervalo
+        exceso = llena_en - ahora - settings.LOGIN_LIMITES[cubeta]['capacidad'] * intervalo
+        if exceso > 0:
+            logger.warning('Login bloqueado por %s (%s)', cubeta, clave)
+            raise Bloqueado(cubeta, math.ceil(exceso))
+        nuevas[clave] = llena_en
+    for clave, llena_en in nuevas.items():
+        cache.set(clave, llena_en, math.ceil(llena_en - ahora) + 1)
+
+
+def devolver_intento(request, username):
+    """Devuelve las fichas del intento (login exitoso)."""
+    if not settings.LOGIN_LIMITAR:
+        return
+    claves = _cubetas(request, username)
+    ahora = time.time()
+    llenas_en = cache.get_many(list(claves.values()))
+    for cubeta, clave in claves.items():
+        if clave not in llenas_en:
+            continue
+        llena_en = llenas_en[clave] - _intervalo(cubeta)
+        if llena_en <= ahora:
+            cache.delete(clave)
+        else:
+            cache.set(clave, llena_en, math.ceil(llena_en - ahora) + 1)
@@ -1,15 +1,192 @@
 from django.contrib import admin
-from .models import Cliente, Proyecto, RegistroHoras, Actividad, AsignacionProyecto
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .models import (
+    Cliente, Proyecto, RegistroHoras, Actividad, AsignacionProyecto, CierrePeriodo, ArchivoProyecto, DiaFeriado,
+    PronosticoProyecto,
+)
+from .cierres import reabrir_periodo
+
+
+# === PAGINACION CON CONTEO ESTIMADO ===
+class ConteoEstimadoPaginator(Paginator):
+    """
+    En PostgreSQL, para el listado sin filtros de una tabla grande usa la estimacion
+    de filas de las estadisticas (pg_class.reltuples) en lugar de COUNT(*).
+    Con filtros, en tablas chicas o en otras bases de datos cuenta de forma exacta.
+    """
+    UMBRAL_ESTIMACION = 100_000
+
+    def __init__(self, *args, estimable=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimable = estimable
+
+    @cached_property
+    def count(self):
+        if self.estimable and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [self.object_list.model._meta.db_table],
+                )
+                fila = cursor.fetchone()
+            # reltuples es -1 si la tabla nunca se ha analizado
+            if fila and fila[0] >= self.UMBRAL_ESTIMACION:
+                return fila[0]
+        return super().count
+
+
+class TablaGrandeAdmin(admin.ModelAdmin):
+    """Base para tablas que crecen sin limite: sin el segundo COUNT(*) y con conteo estimado."""
+    show_full_result_count = False
+    paginator = ConteoEstimadoPaginator
+    # Parametros del changelist que no filtran filas
+    PARAMETROS_SIN_FILTRO = {'p', 'o'}
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            estimable=set(request.GET) <= self.PARAMETROS_SIN_FILTRO,
+        )
+
+
+# === FILTRO POR ID ===
+def filtro_por_id(campo, titulo):
+    """
+    Filtro por llave foranea que no lista las opciones: se aplica con ?<campo>=<id>
+    (desde un enlace o escribiendo el id, como raw_id_fields) y el panel solo muestra
+    el valor elegido, con una query por pk en lugar de cargar la tabla relacionada.
+    """
+    class FiltroPorId(admin.SimpleListFilter):
+        title = titulo
+        parameter_name = campo
+
+        def lookups(self, request, model_admin):
+            valor = self.value()
+            if not valor or not valor.isdigit():
+                return []
+            relacionado = model_admin.model._meta.get_field(campo).related_model
+            objeto = relacionado._default_manager.filter(pk=valor).first()
+            return [(valor, str(objeto))] if objeto else []
+
+        def has_output(self):
+            # El admin descarta los filtros sin salida; con un valor debe aplicarse aunque no exista
+            return self.value() is not None
+
+        def queryset(self, request, queryset):
+            valor = self.value()
+            if valor is None:
+                return queryset
+            if not valor.isdigit():
+                raise IncorrectLookupParameters(f'{campo}={valor}')
+            return queryset.filter(**{f'{campo}_id': valor})
+
+    return FiltroPorId
+
 
 # === MODELOS BASE ===
-admin.site.register(Cliente)
-admin.site.register(Proyecto)
-admin.site.register(RegistroHoras)
-admin.site.register(Actividad)
+@admin.register(Cliente)
+class ClienteAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'rfc', 'correo', 'telefono')
+    search_fields = ('nombre', 'rfc')
+    raw_id_fields = ('eliminado_por',)
+
+
+@admin.register(Proyecto)
+class ProyectoAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'cliente', 'situacion', 'fecha_inicial', 'cantidad_h')
+    list_select_related = ('cliente',)
+    list_filter = ('situacion',)
+    search_fields = ('nombre',)
+    autocomplete_fields = ('cliente',)
+    raw_id_fields = ('administradores', 'eliminado_por')
+
+
+@admin.register(RegistroHoras)
+class RegistroHorasAdmin(TablaGrandeAdmin):
+    list_display = ('fecha', 'empleado', 'proyecto', 'horas')
+    list_select_related = ('empleado', 'proyecto')
+    date_hierarchy = 'fecha'
+    # Columnas con indice: proyecto_id y (empleado_id, fecha). Sin listar todos los
+    # proyectos y usuarios en cada carga; para elegir uno se usa la busqueda
+    list_filter = (filtro_por_id('proyecto', 'proyecto'), filtro_por_id('empleado', 'empleado'))
+    search_fields = ('empleado__username', 'proyecto__nombre')
+    autocomplete_fields = ('proyecto',)
+    raw_id_fields = ('empleado',)
+
+
+@admin.register(Actividad)
+class ActividadAdmin(TablaGrandeAdmin):
+    list_display = ('fecha', 'usuario', 'tipo', 'accion', 'objeto_tipo', 'objeto_id')
+    list_select_related = ('usuario',)
+    date_hierarchy = 'fecha'
+    # Indices (tipo, fecha) y (objeto_tipo, objeto_id, fecha)
+    list_filter = ('tipo', 'objeto_tipo')
+    raw_id_fields = ('usuario',)
+
 
 # === ADMIN PERSONALIZADO PARA ASIGNACIONES ===
 @admin.register(AsignacionProyecto)
 class AsignacionProyectoAdmin(admin.ModelAdmin):
     list_display = ('empleado', 'proyecto', 'rol_en_proyecto', 'activo', 'fecha_asignacion', 'fecha_baja')
+    list_select_related = ('empleado', 'proyecto')
     list_filter = ('activo', 'rol_en_proyecto', 'proyecto')
     search_fields = ('empleado__username', 'proyecto__nombre')
+    autocomplete_fields = ('proyecto',)
+    raw_id_fields = ('empleado',)
+
+
+# === CIERRES DE PERIODO ===
+@admin.register(CierrePeriodo)
+class CierrePeriodoAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'fecha_cierre', 'cerrado_por')
+    actions = ['reabrir']
+
+    def has_add_permission(self, request):
+        # Los cierres se crean con el comando cerrar_periodo
+        return False
+
+    @admin.action(description='Reabrir los periodos seleccionados')
+    def reabrir(self, request, queryset):
+        for cierre in queryset:
+            reabrir_periodo(cierre)
+        self.message_user(request, f'{len(queryset)} periodo(s) reabierto(s).')
+
+
+# === ARCHIVO DE PROYECTOS ===
+@admin.register(ArchivoProyecto)
+class ArchivoProyectoAdmin(admin.ModelAdmin):
+    list_display = ('proyecto', 'fecha_archivo', 'fecha_desde', 'fecha_hasta', 'registros', 'horas', 'asignaciones')
+    list_select_related = ('proyecto',)
+    readonly_fields = [campo.name for campo in ArchivoProyecto._meta.fields]
+
+    def has_add_permission(self, request):
+        # Se crean y eliminan con los comandos archivar_proyectos y restaurar_proyecto
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# === CALENDARIO LABORAL ===
+@admin.register(DiaFeriado)
+class DiaFeriadoAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'nombre')
+    date_hierarchy = 'fecha'
+    search_fields = ('nombre',)
+
+
+# === PRONOSTICOS DE PRESUPUESTO ===
+@admin.register(PronosticoProyecto)
+class PronosticoProyectoAdmin(admin.ModelAdmin):
+    list_display = ('proyecto', 'riesgo', 'fecha_agotamiento', 'ritmo_diario', 'restantes', 'calculado_en')
+    list_select_related = ('proyecto',)
+    list_filter = ('riesgo',)
+    readonly_fields = [campo.name for campo in PronosticoProyecto._meta.fields]
+
+    def has_add_permission(self, request):
+        # Los genera el comando pronosticar_presupuestos
+        return False
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Control de admision para endpoints costosos (exportaciones y futuros procesos masivos).
+
+Cada grupo tiene un tope por proceso (semaforo local, relevante con workers de
+hilos) y un tope global entre workers (lugares en el cache compartido tomados
+con cache.add). Cuando el tope global esta lleno el request espera en una cola
+acotada; si la cola esta llena o la espera se agota, se rechaza con 429 y
+Retry-After.
+
+Capacidad reservada: la ejecucion y la cola de todos los grupos juntas nunca
+ocupan mas de ADMISION_WORKERS - ADMISION_RESERVADOS_INTERACTIVOS workers, para
+que login y registrar_horas siempre tengan donde atenderse. Si no queda ningun
+worker para un grupo, sus requests se rechazan todos con 429.
+"""
+
+import contextlib
+import logging
+import random
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+PAUSA_INICIAL = 0.1
+PAUSA_MAXIMA = 1.0
+CONTADORES = ('admitidos', 'encolados', 'rechazados', 'espera_ms')
+
+_semaforos = {}
+_advertidos = set()
+_en_proceso = {}
+_candado_local = threading.Lock()
+
+
+class Saturado(Exception):
+    """No hay capacidad para el grupo; reintentar despues de `reintentar` segundos."""
+
+    def __init__(self, grupo, motivo, reintentar):
+        super().__init__(f'{grupo}: {motivo}')
+        self.grupo = grupo
+        self.motivo = motivo
+        self.reintentar = reintentar
+
+
+# === CONFIGURACION ===
+def configuracion(grupo):
+    """
+    Configuracion efectiva del grupo, con los topes globales recortados
+    para respetar la capacidad reservada a los endpoints interactivos.
+    """
+    conf = dict(settings.ADMISION_GRUPOS[grupo])
+    disponibles = settings.ADMISION_WORKERS - settings.ADMISION_RESERVADOS_INTERACTIVOS
+    # Los otros grupos tambien cuentan contra la capacidad no reservada
+    for otro, conf_otro in settings.ADMISION_GRUPOS.items():
+        if otro != grupo:
+            disponibles -= conf_otro['global'] + conf_otro['cola']
+    if disponibles < 1 and grupo not in _advertidos:
+        _advertidos.add(grupo)
+        logger.warning(
+            'Admision %s: no hay workers para exportar sin invadir la capacidad reservada '
+            '(ADMISION_WORKERS=%s, ADMISION_RESERVADOS_INTERACTIVOS=%s); se rechazan todas',
+            grupo, settings.ADMISION_WORKERS, settings.ADMISION_RESERVADOS_INTERACTIVOS,
+        )
+    conf['global'] = max(0, min(conf['global'], disponibles))
+    conf['cola'] = max(0, min(conf['cola'], disponibles - conf['global']))
+    return conf
+
+
+# === LUGARES COMPARTIDOS (ENTRE WORKERS) ===
+def _claves_lugares(grupo, tipo, total):
+    return [f'gestion:admision:{grupo}:{tipo}:{i}' for i in range(total)]
+
+
+def _tomar_lugar(claves, duracion):
+    """Intenta ocupar un lugar libre; devuelve (clave, token) o None."""
+    token = secrets.token_hex(8)
+    for clave in random.sample(claves, len(claves)):
+        if cache.add(clave, token, duracion):
+            return clave, token
+    return None
+
+
+def _liberar_lugar(lugar):
+    if lugar is not None:
+        clave, token = lugar
+        if cache.get(clave) == token:
+            cache.delete(clave)
+
+
+def _contar(grupo, contador, cantidad=1):
+    clave = f'gestion:admision:{grupo}:total:{contador}'
+    cache.add(clave, 0, None)
+    try:
+        cache.incr(clave, cantidad)
+    except ValueError:
+        # La clave expiro entre add() e incr(); las metricas toleran perder una cuenta
+        pass
+
+
+def _semaforo(grupo, tope):
+    with _candado_local:
+        if grupo not in _semaforos:
+            _semaforos[grupo] = threading.BoundedSemaphore(tope)
+            _en_proceso[grupo] = 0
+        return _semaforos[grupo]
+
+
+def _cambiar_en_proceso(grupo, delta):
+    with _candado_local:
+        _en_proceso[grupo] += delta
+
+
+# === ADMISION ===
+@contextlib.contextmanager
+def admitir(grupo):
+    """
+    Ocupa un lugar del grupo mientras dura el bloque. Lanza Saturado si no lo
+    consigue dentro de la espera configurada.
+    """
+    conf = configuracion(grupo)
+    if not conf['global']:
+        _contar(grupo, 'rechazados')
+        raise Saturado(grupo, 'sin capacidad fuera de la reservada', conf['reintentar'])
+    inicio = time.monotonic()
+    limite = inicio + conf['espera']
+
+    semaforo = _semaforo(grupo, conf['por_proceso'])
+    if not semaforo.acquire(timeout=conf['espera']):
+        _contar(grupo, 'rechazados')
+        raise Saturado(grupo, 'tope por proceso', conf['reintentar'])
+    try:
+        claves = _claves_lugares(grupo, 'ejecucion', conf['global'])
+        lugar = _tomar_lugar(claves, conf['duracion_maxima'])
+        if lugar is None:
+            lugar = _esperar_en_cola(grupo, conf, claves, limite)
+
+        _contar(grupo, 'admitidos')
+        _contar(grupo, 'espera_ms', int((time.monotonic() - inicio) * 1000))
+        _cambiar_en_proceso(grupo, 1)
+        try:
+            yield
+        finally:
+            _cambiar_en_proceso(grupo, -1)
+            _liberar_lugar(lugar)
+    finally:
+        semaforo.release()
+
+
+def _esperar_en_cola(grupo, conf, claves, limite):
+    turno = _tomar_lugar(_claves_lugares(grupo, 'cola', conf['cola']), conf['espera'] + 1)
+    if turno is None:
+        _contar(grupo, 'rechazados')
+        raise Saturado(grupo, 'cola llena', conf['reintentar'])
+    _contar(grupo, 'encolados')
+    try:
+        pausa = PAUSA_INICIAL
+        while time.monotonic() < limite:
+            time.sleep(min(pausa, max(0, limite - time.monotonic())))
+            lugar = _tomar_lugar(claves, conf['duracion_maxima'])
+            if lugar is not None:
+                return lugar
+            pausa = min(pausa * 2, PAUSA_MAXIMA)
+        _contar(grupo, 'rechazados')
+        raise Saturado(grupo, 'espera agotada', conf['reintentar'])
+    finally:
+        _liberar_lugar(turno)
+
+
+def respuesta_saturado(error):
+    response = HttpResponse(
+        'El servidor esta atendiendo otras exportaciones. Intente de nuevo en unos segundos.',
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(error.reintentar)
+    return response
+
+
+# === METRICAS ===
+def metricas():
+    """Estado de cada grupo: configuracion efectiva, ocupacion actual y contadores."""
+    resultado = {}
+    for grupo in settings.ADMISION_GRUPOS:
+        conf = configuracion(grupo)
+        contadores = cache.get_many([f'gestion:admision:{grupo}:total:{c}' for c in CONTADORES])
+        totales = {c: contadores.get(f'gestion:admision:{grupo}:total:{c}', 0) for c in CONTADORES}
+        espera_ms = totales.pop('espera_ms')
+        resultado[grupo] = {
+            'configuracion': conf,
+            'en_ejecucion': len(cache.get_many(_claves_lugares(grupo, 'ejecucion', conf['global']))),
+            'en_cola': len(cache.get_many(_claves_lugares(grupo, 'cola', conf['cola']))),
+            'en_ejecucion_este_proceso': _en_proceso.get(grupo, 0),
+            **totales,
+            'espera_promedio_ms': round(espera_ms / totales['admitidos']) if totales['admitidos'] else 0,
+        }
+    return resultado
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class GestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion'
+
+    def ready(self):
+        from . import signals, sqlite
+        signals.conectar()
+        sqlite.conectar()
+
+        # Workers dedicados a exportar pueden cargar openpyxl/xhtml2pdf al arrancar
+        if getattr(settings, 'PRECARGAR_EXPORTADORES', False):
+            from . import exportadores
+            exportadores.precargar()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Archivo de proyectos cerrados (FIN/CAN) en tablas frias.
+
+Las horas y asignaciones de un proyecto se mueven por lotes a
+RegistroHorasArchivado y AsignacionArchivada (cada lote es un INSERT ... SELECT
+y un DELETE en la misma transaccion: una fila nunca esta en las dos tablas ni
+en ninguna). En su lugar queda un ArchivoProyecto con el resumen y el rango de
+fechas archivado. Si el proceso se interrumpe, volver a ejecutarlo continua
+donde quedo; restaurar_proyecto() hace el camino inverso.
+
+Los reportes (cierres.totales_combinados y la bitacora de reportes) solo
+consultan el archivo cuando su rango de fechas alcanza el rango archivado.
+"""
+
+import datetime
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import cambiar_version, invalidar_asignaciones
+from .models import (
+    Actividad, ArchivoProyecto, AsignacionArchivada, AsignacionProyecto, Proyecto,
+    RegistroHoras, RegistroHorasArchivado,
+)
+
+
+SITUACIONES_ARCHIVABLES = ('FIN', 'CAN')
+CAMPOS_REGISTRO = ('id', 'empleado_id', 'proyecto_id', 'fecha', 'horas', 'descripcion')
+CAMPOS_ASIGNACION = (
+    'id', 'empleado_id', 'proyecto_id', 'rol_en_proyecto', 'activo', 'fecha_asignacion', 'fecha_baja',
+)
+
+
+# === RANGO ARCHIVADO (CONSULTADO POR LOS REPORTES) ===
+CLAVE_RANGO_ARCHIVADO = 'gestion:rango_archivado'
+
+
+def rango_archivado():
+    """(primera, ultima) fecha con horas archivadas, o None; se cachea porque se consulta en cada reporte."""
+    rango = cache.get(CLAVE_RANGO_ARCHIVADO)
+    if rango is None:
+        valores = ArchivoProyecto.objects.aggregate(desde=Min('fecha_desde'), hasta=Max('fecha_hasta'))
+        rango = (valores['desde'], valores['hasta']) if valores['desde'] else ()
+        cache.set(CLAVE_RANGO_ARCHIVADO, rango, None)
+    return rango or None
+
+
+def _invalidar_rango():
+    transaction.on_commit(lambda: cache.delete(CLAVE_RANGO_ARCHIVADO))
+
+
+def alcanza_archivo(fecha_inicio=None, fecha_fin=None):
+    """True si el rango pedido (None = sin limite) se cruza con las horas archivadas."""
+    rango = rango_archivado()
+    if rango is None:
+        return False
+    desde, hasta = rango
+    return (fecha_fin is None or fecha_fin >= desde) and (fecha_inicio is None or fecha_inicio <= hasta)
+
+
+def registros_archivados(filtros, fecha_inicio=None, fecha_fin=None):
+    """
+    Horas archivadas con los filtros de reportes, expresados como kwargs
+    (proyecto__cliente, proyecto, empleado) igual que para TotalCerrado.
+    """
+    registros = RegistroHorasArchivado.objects.filter(proyecto__pendiente_eliminacion=False, **filtros)
+    if fecha_inicio:
+        registros = registros.filter(fecha__gte=fecha_inicio)
+    if fecha_fin:
+        registros = registros.filter(fecha__lte=fecha_fin)
+    return registros
+
+
+# === MOVIMIENTO POR LOTES ===
+def _mover_lote(origen, destino, campos, proyecto_id, lote):
+    """
+    Mueve hasta `lote` filas del proyecto de la tabla `origen` a `destino` (mismos
+    nombres de columna) en una transaccion. Devuelve cuantas movio.
+    """
+    qn = connection.ops.quote_name
+    tabla_origen, tabla_destino = qn(origen._meta.db_table), qn(destino._meta.db_table)
+    columnas = ', '.join(qn(campo) for campo in campos)
+    with transaction.atomic():
+        ids = list(
+            origen._base_manager.filter(proyecto_id=proyecto_id)
+            .order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if ids:
+            marcas = ', '.join(['%s'] * len(ids))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {tabla_destino} ({columnas}) '
+                    f'SELECT {columnas} FROM {tabla_origen} WHERE {qn("id")} IN ({marcas})', ids,
+                )
+                cursor.execute(f'DELETE FROM {tabla_origen} WHERE {qn("id")} IN ({marcas})', ids)
+    return len(ids)
+
+
+def _mover_todo(origen, destino, campos, proyecto_id, lote):
+    total = 0
+    while movidas := _mover_lote(origen, destino, campos, proyecto_id, lote):
+        total += movidas
+    return total
+
+
+def _empleados_con_asignacion(proyecto_id):
+    return set(
+        AsignacionProyecto.objects.filter(proyecto_id=proyecto_id, activo=True).values_list('empleado_id', flat=True)
+    ) | set(
+        AsignacionArchivada.objects.filter(proyecto_id=proyecto_id, activo=True).values_list('empleado_id', flat=True)
+    )
+
+
+def _despues_de_mover(empleado_ids):
+    # Los movimientos son SQL directo: no emiten senales
+    cambiar_version('registros', 'proyectos')
+    transaction.on_commit(lambda: invalidar_asignaciones(*empleado_ids))
+    _invalidar_rango()
+
+
+# === ARCHIVAR ===
+def proyectos_archivables(antiguedad_dias):
+    """
+    Proyectos FIN/CAN cuya ultima hora registrada (o su fecha final, o inicial)
+    es anterior a `antiguedad_dias`. Incluye los que quedaron a medio archivar.
+    """
+    limite = timezone.localdate() - datetime.timedelta(days=antiguedad_dias)
+    return (
+        Proyecto.objects.filter(situacion__in=SITUACIONES_ARCHIVABLES)
+        .annotate(ultima_hora=Max('registros_horas__fecha'))
+        .annotate(ultima_actividad=Coalesce('ultima_hora', 'fecha_final', 'fecha_inicial'))
+        .filter(ultima_actividad__lt=limite)
+        .filter(Q(archivo__isnull=True) | Q(ultima_hora__isnull=False))
+        .order_by('id')
+    )
+
+
+def archivar_proyecto(proyecto, usuario=None, lote=1000):
+    """
+    Mueve las horas y asignaciones del proyecto al archivo de `lote` en `lote`.
+    Devuelve el ArchivoProyecto con el resumen.
+    """
+    if proyecto.situacion not in SITUACIONES_ARCHIVABLES:
+        raise ValueError(f"El proyecto '{proyecto.nombre}' no esta finalizado ni cancelado.")
+
+    # El rango se fija antes de mover la primera fila: los reportes buscan en el archivo desde ya
+    with transaction.atomic():
+        archivo, _ = ArchivoProyecto.objects.select_for_update().get_or_create(
+            proyecto=proyecto, defaults={'archivado_por': usuario},
+        )
+        rangos = [
+            RegistroHoras._base_manager.filter(proyecto=proyecto).aggregate(desde=Min('fecha'), hasta=Max('fecha')),
+            {'desde': archivo.fecha_desde, 'hasta': archivo.fecha_hasta},
+        ]
+        desdes = [r['desde'] for r in rangos if r['desde']]
+        hastas = [r['hasta'] for r in rangos if r['hasta']]
+        archivo.fecha_desde = min(desdes) if desdes else None
+        archivo.fecha_hasta = max(hastas) if hastas else None
+        archivo.save(update_fields=['fecha_desde', 'fecha_hasta'])
+        _invalidar_rango()
+
+    empleado_ids = _empleados_con_asignacion(proyecto.id)
+    _mover_todo(RegistroHoras, RegistroHorasArchivado, CAMPOS_REGISTRO, proyecto.id, lote)
+    _mover_todo(AsignacionProyecto, AsignacionArchivada, CAMPOS_ASIGNACION, proyecto.id, lote)
+
+    with transaction.atomic():
+        totales = RegistroHorasArchivado.objects.filter(proyecto=proyecto).aggregate(
+            registros=Count('id'), horas=Coalesce(Sum('horas'), 0),
+        )
+        archivo.registros = totales['registros']
+        archivo.horas = totales['horas']
+        archivo.asignaciones = AsignacionArchivada.objects.filter(proyecto=proyecto).count()
+        archivo.save(update_fields=['registros', 'horas', 'asignaciones'])
+        _despues_de_mover(empleado_ids)
+        if usuario is not None:
+            Actividad.registrar(
+                usuario, 'ARCHIVAR',
+                f"Archivo el proyecto '{proyecto.nombre}' ({archivo.registros} registros, "
+                f"{archivo.asignaciones} asignaciones).",
+                objeto=proyecto, nombre=proyecto.nombre,
+                registros=archivo.registros, horas=archivo.horas, asignaciones=archivo.asignaciones,
+            )
+    return archivo
+
+
+def archivar_pendientes(antiguedad_dias, lote=1000, usuario=None):
+    """Archiva todos los proyectos archivables. Devuelve la lista de resumenes."""
+    return [archivar_proyecto(proyecto, usuario, lote) for proyecto in proyectos_archivables(antiguedad_dias)]
+
+
+# === RESTAURAR ===
+def restaurar_proyecto(proyecto, usuario=None, lote=1000):
+    """
+    Devuelve las horas y asignaciones archivadas del proyecto a las tablas de
+    trabajo y elimina su ArchivoProyecto. Devuelve (registros, asignaciones).
+    """
+    archivo = ArchivoProyecto.objects.filter(proyecto=proyecto).first()
+    if archivo is None:
+        raise ValueError(f"El proyecto '{proyecto.nombre}' no esta archivado.")
+
+    # Si el empleado volvio a quedar asignado al proyecto, la asignacion archivada
+    # regresa como baja (uq_asignacion_activa_por_empleado_proyecto)
+    AsignacionArchivada.objects.filter(proyecto=proyecto, activo=True).filter(
+        Exists(AsignacionProyecto.objects.filter(
+            empleado=OuterRef('empleado'), proyecto=OuterRef('proyecto'), activo=True,
+        ))
+    ).update(activo=False, fecha_baja=timezone.localdate())
+
+    empleado_ids = _empleados_con_asignacion(proyecto.id)
+    registros = _mover_todo(RegistroHorasArchivado, RegistroHoras, CAMPOS_REGISTRO, proyecto.id, lote)
+    asignaciones = _mover_todo(AsignacionArchivada, AsignacionProyecto, CAMPOS_ASIGNACION, proyecto.id, lote)
+
+    with transaction.atomic():
+        archivo.delete()
+        _despues_de_mover(empleado_ids)
+        if usuario is not None:
+            Actividad.registrar(
+                usuario, 'RESTAURAR',
+                f"Restauro el proyecto archivado '{proyecto.nombre}' ({registros} registros, "
+                f"{asignaciones} asignaciones).",
+                objeto=proyecto, nombre=proyecto.nombre, registros=registros, asignaciones=asignaciones,
+            )
+    return registros, asignaciones
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Asignacion masiva de empleados a proyectos (pantalla de asignacion masiva).
+
+Cada operacion es una sola transaccion con un numero fijo de queries sin importar
+cuantos empleados y proyectos incluya: alta con un solo INSERT que ignora conflictos
+(la restriccion uq_asignacion_activa_por_empleado_proyecto descarta los pares que
+ya estaban activos, incluso si otro request los crea al mismo tiempo), baja con un
+solo update(), una sola invalidacion del cache de asignaciones y un solo evento
+de auditoria. La invalidacion se hace al confirmar la transaccion: antes, otro
+request podria volver a cachear las asignaciones viejas.
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidar_asignaciones
+from .models import Actividad, AsignacionProyecto
+
+
+def _pares_activos(empleado_ids, proyecto_ids):
+    return set(
+        AsignacionProyecto.objects.filter(
+            empleado_id__in=empleado_ids, proyecto_id__in=proyecto_ids, activo=True,
+        ).values_list('empleado_id', 'proyecto_id')
+    )
+
+
+def _insertar_postgresql(pares, rol):
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING: devuelve cuantas filas entraron de verdad."""
+    qn = connection.ops.quote_name
+    hoy = timezone.localdate()
+    filas = [(empleado_id, proyecto_id, rol, True, hoy) for empleado_id, proyecto_id in pares]
+    marcas = ', '.join(['(%s, %s, %s, %s, %s)'] * len(filas))
+    columnas = ', '.join(qn(c) for c in ('empleado_id', 'proyecto_id', 'rol_en_proyecto', 'activo', 'fecha_asignacion'))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {qn(AsignacionProyecto._meta.db_table)} ({columnas}) VALUES {marcas} '
+            f'ON CONFLICT DO NOTHING RETURNING {qn("id")}',
+            [valor for fila in filas for valor in fila],
+        )
+        return len(cursor.fetchall())
+
+
+def _alta(empleado_ids, proyecto_ids, rol):
+    """Crea las asignaciones que faltan y devuelve cuantas se insertaron."""
+    existentes = _pares_activos(empleado_ids, proyecto_ids)
+    pares = [
+        (empleado_id, proyecto_id)
+        for proyecto_id in proyecto_ids
+        for empleado_id in empleado_ids
+        if (empleado_id, proyecto_id) not in existentes
+    ]
+    if not pares:
+        return 0
+    if connection.vendor == 'postgresql':
+        # Otro request pudo crear algunos pares despues de leer `existentes`
+        return _insertar_postgresql(pares, rol)
+    # SQLite tiene un solo escritor y una transaccion que leyo datos ya superados no
+    # puede escribir: si el INSERT entra, `existentes` seguia vigente y entran todas
+    AsignacionProyecto.objects.bulk_create([
+        AsignacionProyecto(empleado_id=empleado_id, proyecto_id=proyecto_id, rol_en_proyecto=rol, activo=True)
+        for empleado_id, proyecto_id in pares
+    ], ignore_conflicts=True)
+    return len(pares)
+
+
+def _baja(empleado_ids, proyecto_ids):
+    return AsignacionProyecto.objects.filter(
+        empleado_id__in=empleado_ids, proyecto_id__in=proyecto_ids, activo=True,
+    ).update(activo=False, fecha_baja=timezone.localdate())
+
+
+def _objeto(proyectos):
+    # Con un solo proyecto el evento aparece al filtrar la bitacora por ese proyecto
+    return proyectos[0] if len(proyectos) == 1 else None
+
+
+def asignar_en_bloque(usuario, empleados, proyectos, rol='OT'):
+    """Asigna todos los empleados a todos los proyectos. Devuelve cuantas asignaciones creo."""
+    empleado_ids = [e.id for e in empleados]
+    proyecto_ids = [p.id for p in proyectos]
+    with transaction.atomic():
+        creadas = _alta(empleado_ids, proyecto_ids, rol)
+        transaction.on_commit(lambda: invalidar_asignaciones(*empleado_ids))
+        Actividad.registrar(
+            usuario, 'ASIGNAR',
+            f"Asigno {len(empleado_ids)} empleado(s) a {len(proyecto_ids)} proyecto(s) "
+            f"({creadas} asignaciones nuevas).",
+            objeto=_objeto(proyectos), masiva=True, rol=rol, creadas=creadas,
+            empleado_ids=empleado_ids, proyecto_ids=proyecto_ids,
+        )
+    return creadas
+
+
+def desasignar_en_bloque(usuario, empleados, proyectos):
+    """Da de baja las asignaciones activas de los empleados en los proyectos. Devuelve cuantas."""
+    empleado_ids = [e.id for e in empleados]
+    proyecto_ids = [p.id for p in proyectos]
+    with transaction.atomic():
+        bajas = _baja(empleado_ids, proyecto_ids)
+        transaction.on_commit(lambda: invalidar_asignaciones(*empleado_ids))
+        Actividad.registrar(
+            usuario, 'DESASIGNAR',
+            f"Desasigno {len(empleado_ids)} empleado(s) de {len(proyecto_ids)} proyecto(s) "
+            f"({bajas} asignaciones dadas de baja).",
+            objeto=_objeto(proyectos), masiva=True, bajas=bajas,
+            empleado_ids=empleado_ids, proyecto_ids=proyecto_ids,
+        )
+    return bajas
+
+
+def mover_en_bloque(usuario, empleados, origenes, destino, rol='OT'):
+    """
+    Mueve un equipo: baja en los proyectos de origen y alta en el destino, en la
+    misma transaccion. Devuelve (bajas, creadas).
+    """
+    empleado_ids = [e.id for e in empleados]
+    origen_ids = [p.id for p in origenes if p.id != destino.id]
+    with transaction.atomic():
+        bajas = _baja(empleado_ids, origen_ids)
+        creadas = _alta(empleado_ids, [destino.id], rol)
+        transaction.on_commit(lambda: invalidar_asignaciones(*empleado_ids))
+        Actividad.registrar(
+            usuario, 'ASIGNAR',
+            f"Movio {len(empleado_ids)} empleado(s) de {len(origen_ids)} proyecto(s) a "
+            f"'{destino.nombre}' ({bajas} bajas, {creadas} asignaciones nuevas).",
+            objeto=destino, masiva=True, rol=rol, bajas=bajas, creadas=creadas,
+            empleado_ids=empleado_ids, proyecto_ids=origen_ids, destino_id=destino.id,
+        )
+    return bajas, creadas
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import secrets
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AsignacionProyecto
+
+
+# === ASIGNACIONES ACTIVAS POR EMPLEADO ===
+ASIGNACIONES_TIMEOUT = 60 * 60
+
+
+def _clave_asignaciones(empleado_id):
+    return f'gestion:asignaciones_activas:{empleado_id}'
+
+
+def _cargar_asignaciones(empleado_ids):
+    """
+    Consulta en una sola query las asignaciones activas de los empleados indicados.
+    Devuelve {empleado_id: {proyecto_id: {...}}} ordenado por nombre de proyecto.
+    """
+    resultado = {empleado_id: {} for empleado_id in empleado_ids}
+    filas = (
+        AsignacionProyecto.objects
+        .filter(empleado_id__in=empleado_ids, activo=True)
+        .order_by('proyecto__nombre')
+        .values_list(
+            'empleado_id', 'proyecto_id', 'proyecto__nombre',
+            'proyecto__situacion', 'proyecto__fecha_inicial', 'fecha_asignacion',
+        )
+    )
+    for empleado_id, proyecto_id, nombre, situacion, fecha_inicial, fecha_asignacion in filas:
+        resultado[empleado_id][proyecto_id] = {
+            'proyecto_id': proyecto_id,
+            'nombre': nombre,
+            'situacion': situacion,
+            'fecha_inicial': fecha_inicial,
+            'fecha_asignacion': fecha_asignacion,
+        }
+    return resultado
+
+
+def asignaciones_activas_por_empleado(empleado_ids):
+    """
+    Devuelve el conjunto de asignaciones activas de varios empleados.
+    Lee primero del cache y consulta la base de datos solo para los faltantes.
+    """
+    empleado_ids = list(empleado_ids)
+    if not empleado_ids:
+        return {}
+
+    claves = {_clave_asignaciones(empleado_id): empleado_id for empleado_id in empleado_ids}
+    encontrados = cache.get_many(list(claves))
+    resultado = {claves[clave]: valor for clave, valor in encontrados.items()}
+
+    faltantes = [empleado_id for empleado_id in empleado_ids if empleado_id not in resultado]
+    if faltantes:
+        cargados = _cargar_asignaciones(faltantes)
+        cache.set_many(
+            {_clave_asignaciones(empleado_id): valor for empleado_id, valor in cargados.items()},
+            ASIGNACIONES_TIMEOUT,
+        )
+        resultado.update(cargados)
+    return resultado
+
+
+def asignaciones_activas(empleado):
+    """Asignaciones activas de un empleado: {proyecto_id: {nombre, situacion, fecha_inicial, ...}}."""
+    empleado_id = getattr(empleado, 'pk', empleado)
+    return asignaciones_activas_por_empleado([empleado_id])[empleado_id]
+
+
+def invalidar_asignaciones(*empleado_ids):
+    """Descarta del cache las asignaciones de los empleados indicados (y sus fragmentos)."""
+    if empleado_ids:
+        cache.delete_many([_clave_asignaciones(empleado_id) for empleado_id in empleado_ids])
+        cambiar_version('asignaciones')
+
+
+def invalidar_asignaciones_proyecto(proyecto_id):
+    """
+    Descarta del cache las asignaciones de todos los empleados activos en un proyecto.
+    Se usa cuando cambia la situacion o la fecha inicial del proyecto.
+    """
+    empleado_ids = AsignacionProyecto.objects.filter(
+        proyecto_id=proyecto_id, activo=True
+    ).values_list('empleado_id', flat=True)
+    invalidar_asignaciones(*empleado_ids)
+
+
+# === VERSIONES DE DATOS (para fragmentos de plantilla cacheados) ===
+# Cada ambito tiene un token en el cache que cambia con cualquier escritura de sus datos.
+# Los fragmentos incluyen el token en su clave: al cambiar, la clave vieja ya no se usa.
+AMBITOS_DATOS = ('registros', 'proyectos', 'asignaciones', 'cierres', 'usuarios', 'calendario')
+
+
+def _clave_version(ambito):
+    return f'gestion:version_datos:{ambito}'
+
+
+def _nuevo_token():
+    # Token aleatorio y no contador: si el cache pierde la clave, el token regenerado
+    # nunca coincide con uno anterior y no puede revivir fragmentos viejos
+    return secrets.token_hex(6)
+
+
+def version_datos(*ambitos):
+    """Token combinado de los ambitos indicados, para usar en claves de fragmentos."""
+    claves = [_clave_version(ambito) for ambito in ambitos]
+    tokens = cache.get_many(claves)
+    for clave in claves:
+        if clave not in tokens:
+            token = _nuevo_token()
+            # Otro worker pudo inicializarla al mismo tiempo: gana el primero
+            if not cache.add(clave, token, None):
+                token = cache.get(clave, token)
+            tokens[clave] = token
+    return '.'.join(tokens[clave] for clave in claves)
+
+
+def cambiar_version(*ambitos):
+    """
+    Invalida los fragmentos que dependen de los ambitos indicados. Se aplica al
+    confirmar la transaccion: antes, otro request podria cachear datos viejos
+    bajo la version nueva.
+    """
+    def _cambiar():
+        cache.set_many({_clave_version(ambito): _nuevo_token() for ambito in ambitos}, None)
+    transaction.on_commit(_cambiar)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Vista mensual de las horas de un empleado (mis_horas).
+
+Todo se consulta por el indice (empleado, fecha) y solo para el mes elegido:
+los totales por dia y por proyecto los calcula la base de datos, y los conteos
+de los meses vecinos (para la navegacion) salen de una sola agregacion.
+"""
+
+import calendar
+import datetime
+
+from django.db.models import Count, Q, Sum
+
+from .cierres import rango_mes
+from .models import RegistroHoras
+
+
+MESES = (
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
+)
+
+
+def leer_mes(valor, hoy):
+    """
+    Convierte 'AAAA-MM' en (anio, mes); si falta o es invalido usa el mes de `hoy`.
+    Los anios extremos (1 y 9999) tambien se rechazan: el mes anterior o el
+    siguiente, que se consultan para la navegacion, ya no serian fechas validas.
+    """
+    try:
+        anio, mes = (int(parte) for parte in valor.split('-'))
+        datetime.date(anio, mes, 1)
+    except (AttributeError, ValueError):
+        return hoy.year, hoy.month
+    if not datetime.MINYEAR < anio < datetime.MAXYEAR:
+        return hoy.year, hoy.month
+    return anio, mes
+
+
+def mes_vecino(anio, mes, delta):
+    indice = anio * 12 + (mes - 1) + delta
+    return indice // 12, indice % 12 + 1
+
+
+def horas_del_mes(empleado, anio, mes):
+    """
+    Registros, totales por dia y por proyecto del mes, y cuantos registros hay en
+    el mes anterior y el siguiente.
+    """
+    inicio, fin = rango_mes(anio, mes)
+    registros = RegistroHoras.objects.filter(empleado=empleado, fecha__range=(inicio, fin))
+
+    por_dia = dict(
+        registros.order_by().values_list('fecha').annotate(total=Sum('horas'))
+    )
+    por_proyecto = list(
+        registros.order_by()
+        .values('proyecto_id', 'proyecto__nombre')
+        .annotate(horas=Sum('horas'), registros=Count('id'))
+        .order_by('-horas', 'proyecto__nombre')
+    )
+
+    anterior = mes_vecino(anio, mes, -1)
+    siguiente = mes_vecino(anio, mes, 1)
+    rango_anterior, rango_siguiente = rango_mes(*anterior), rango_mes(*siguiente)
+    vecinos = RegistroHoras.objects.filter(
+        empleado=empleado, fecha__range=(rango_anterior[0], rango_siguiente[1]),
+    ).aggregate(
+        anterior=Count('id', filter=Q(fecha__lte=rango_anterior[1])),
+        siguiente=Count('id', filter=Q(fecha__gte=rango_siguiente[0])),
+    )
+
+    return {
+        'anio': anio,
+        'mes': mes,
+        'inicio': inicio,
+        'nombre_mes': f'{MESES[mes - 1]} {anio}',
+        'registros': registros.select_related('proyecto').order_by('fecha', 'id'),
+        'por_dia': por_dia,
+        'por_proyecto': por_proyecto,
+        'total': sum(por_dia.values()),
+        'anterior': {'mes': '%04d-%02d' % anterior, 'registros': vecinos['anterior']},
+        'siguiente': {'mes': '%04d-%02d' % siguiente, 'registros': vecinos['siguiente']},
+    }
+
+
+def semanas(anio, mes, por_dia):
+    """Cuadricula del calendario: semanas de lunes a domingo con el total de cada dia."""
+    return [
+        [
+            {'fecha': dia, 'del_mes': dia.month == mes, 'total': por_dia.get(dia)}
+            for dia in semana
+        ]
+        for semana in calendar.Calendar().monthdatescalendar(anio, mes)
+    ]
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Calentamiento antes de recibir trafico (manage.py warmup y config/wsgi.py).
+
+Fases:
+  base_datos  verifica la conexion y la tabla del cache compartido
+  modulos     importa los modulos de las vistas y resuelve las URLs
+  plantillas  compila todas las plantillas de gestion (cached.Loader)
+  listas      carga las asignaciones activas de los empleados (opciones de registrar_horas)
+  reportes    calcula los resumenes de reportes del mes actual, total y por cliente activo
+
+modulos y plantillas calientan el proceso que las ejecuta; base_datos, listas y
+reportes llenan el cache compartido (DatabaseCache en produccion), asi que sirven
+igual ejecutadas desde build.sh que desde un worker.
+"""
+
+import importlib
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils import timezone
+
+from .cache import asignaciones_activas_por_empleado
+from .cierres import rango_mes
+from .models import Cliente
+
+
+logger = logging.getLogger(__name__)
+
+FASES = ('base_datos', 'modulos', 'plantillas', 'listas', 'reportes')
+# Fases que no tocan la base de datos: seguras al importar wsgi.py (incluso con --preload)
+FASES_PROCESO = ('modulos', 'plantillas')
+
+MODULOS_CALIENTES = (
+    'gestion.views', 'gestion.forms', 'gestion.admin', 'gestion.exportadores',
+    'gestion.presupuesto', 'gestion.cierres', 'gestion.calendario',
+)
+DIRECTORIO_PLANTILLAS = Path(__file__).resolve().parent / 'templates'
+
+
+def _base_datos():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    # El cache en base de datos necesita su tabla (createcachetable)
+    cache.set('gestion:calentamiento', 1, 60)
+    if cache.get('gestion:calentamiento') != 1:
+        raise RuntimeError('el cache no devolvio el valor escrito')
+    return connection.vendor
+
+
+def _modulos():
+    for modulo in MODULOS_CALIENTES:
+        importlib.import_module(modulo)
+    # Importa los modulos de vistas de todas las apps (incluido el admin)
+    get_resolver().url_patterns
+    if getattr(settings, 'PRECARGAR_EXPORTADORES', False):
+        from . import exportadores
+        exportadores.precargar()
+    return f'{len(MODULOS_CALIENTES)} modulos'
+
+
+def _plantillas():
+    plantillas = sorted(
+        ruta.relative_to(DIRECTORIO_PLANTILLAS).as_posix()
+        for ruta in DIRECTORIO_PLANTILLAS.rglob('*.html')
+    )
+    for plantilla in plantillas:
+        get_template(plantilla)
+    return f'{len(plantillas)} plantillas'
+
+
+def _listas():
+    empleado_ids = list(
+        User.objects.filter(is_staff=False, is_active=True).values_list('id', flat=True)
+    )
+    asignaciones_activas_por_empleado(empleado_ids)
+    return f'{len(empleado_ids)} empleados'
+
+
+def _filtros_reportes(hoy):
+    """Combinaciones mas pedidas: sin filtros, mes actual, y mes actual de cada cliente activo."""
+    inicio, fin = rango_mes(hoy.year, hoy.month)
+    mes = {'fecha_inicio': inicio.isoformat(), 'fecha_fin': fin.isoformat()}
+    clientes = (
+        Cliente.objects.filter(proyectos__situacion='ACT', proyectos__pendiente_eliminacion=False)
+        .distinct().order_by('id').values_list('id', flat=True)
+    )
+    return [{}, mes] + [{**mes, 'cliente': cliente_id} for cliente_id in clientes]
+
+
+def _reportes():
+    # Se pasa por la vista para usar exactamente las mismas claves que los requests
+    # reales (totales coalescidos y fragmento de resumenes). El usuario no se guarda.
+    # django.test se importa aqui y no al cargar wsgi.py: los workers no lo necesitan
+    from django.test import RequestFactory
+
+    from .views import reportes
+
+    administrador = User(username='calentamiento', is_staff=True, is_superuser=True)
+    fabrica = RequestFactory()
+    combinaciones = _filtros_reportes(timezone.localdate())
+    for filtros in combinaciones:
+        request = fabrica.get('/reportes/', filtros)
+        request.user = administrador
+        # En streaming el encabezado (con los resumenes) ya se renderizo; la bitacora no se lee
+        reportes(request).close()
+    return f'{len(combinaciones)} combinaciones de filtros'
+
+
+_FUNCIONES = {
+    'base_datos': _base_datos,
+    'modulos': _modulos,
+    'plantillas': _plantillas,
+    'listas': _listas,
+    'reportes': _reportes,
+}
+
+
+def calentar(fases=FASES):
+    """
+    Ejecuta las fases indicadas en orden. Devuelve una lista de
+    {'fase', 'segundos', 'detalle', 'error'}; un error no detiene las demas
+    fases, salvo en base_datos (sin conexion las siguientes no tienen sentido).
+    """
+    resultados = []
+    for fase in fases:
+        inicio = time.perf_counter()
+        detalle, error = '', None
+        try:
+            detalle = _FUNCIONES[fase]()
+        except Exception as e:
+            error = e
+        resultados.append({
+            'fase': fase,
+            'segundos': time.perf_counter() - inicio,
+            'detalle': detalle,
+            'error': error,
+        })
+        if error is not None and fase == 'base_datos':
+            break
+    return resultados
+
+
+def calentar_worker():
+    """Fases sin base de datos al cargar la aplicacion WSGI (ver CALENTAR_WORKER)."""
+    if not getattr(settings, 'CALENTAR_WORKER', False):
+        return
+    for resultado in calentar(FASES_PROCESO):
+        if resultado['error'] is not None:
+            logger.warning('Calentamiento %s fallo: %s', resultado['fase'], resultado['error'])
+        else:
+            logger.info(
+                'Calentamiento %s: %.0f ms (%s)',
+                resultado['fase'], resultado['segundos'] * 1000, resultado['detalle'],
+            )
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+import calendar
+import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .archivo import alcanza_archivo, registros_archivados
+from .models import CierrePeriodo, RegistroHoras, RegistroHorasArchivado, TotalCerrado
+from .presupuesto import metricas_presupuesto
+from .referencias import referencias
+
+
+# === PERIODOS CERRADOS ===
+CLAVE_PERIODOS_CERRADOS = 'gestion:periodos_cerrados'
+
+
+def rango_mes(anio, mes):
+    """Primer y ultimo dia del mes."""
+    return datetime.date(anio, mes, 1), datetime.date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+
+def periodos_cerrados():
+    """Conjunto de (anio, mes) cerrados; se cachea porque se consulta en cada registro de horas."""
+    periodos = cache.get(CLAVE_PERIODOS_CERRADOS)
+    if periodos is None:
+        periodos = set(CierrePeriodo.objects.values_list('anio', 'mes'))
+        cache.set(CLAVE_PERIODOS_CERRADOS, periodos, None)
+    return periodos
+
+
+def periodo_cerrado(fecha):
+    return (fecha.year, fecha.month) in periodos_cerrados()
+
+
+@transaction.atomic
+def cerrar_periodo(anio, mes, usuario=None):
+    """
+    Congela los totales del mes por proyecto y empleado.
+    Lanza ValueError si el mes ya esta cerrado o aun no termina.
+    """
+    inicio, fin = rango_mes(anio, mes)
+    if fin >= timezone.localdate():
+        raise ValueError(f'El periodo {mes:02d}/{anio} aun no termina.')
+    if CierrePeriodo.objects.filter(anio=anio, mes=mes).exists():
+        raise ValueError(f'El periodo {mes:02d}/{anio} ya esta cerrado.')
+
+    cierre = CierrePeriodo.objects.create(anio=anio, mes=mes, cerrado_por=usuario)
+    # Las horas de proyectos archivados tambien cuentan en el snapshot
+    totales = {}
+    for registros in (RegistroHoras.objects, RegistroHorasArchivado.objects.filter(proyecto__pendiente_eliminacion=False)):
+        filas = (
+            registros.filter(fecha__range=(inicio, fin))
+            .values('proyecto_id', 'empleado_id')
+            .annotate(horas=Sum('horas'), num_registros=Count('id'))
+            .order_by()
+        )
+        for f in filas:
+            horas, num = totales.get((f['proyecto_id'], f['empleado_id']), (0, 0))
+            totales[f['proyecto_id'], f['empleado_id']] = (horas + f['horas'], num + f['num_registros'])
+    TotalCerrado.objects.bulk_create([
+        TotalCerrado(cierre=cierre, proyecto_id=proyecto_id, empleado_id=empleado_id, horas=horas, num_registros=num)
+        for (proyecto_id, empleado_id), (horas, num) in totales.items()
+    ])
+    transaction.on_commit(lambda: cache.delete(CLAVE_PERIODOS_CERRADOS))
+    return cierre
+
+
+@transaction.atomic
+def reabrir_periodo(cierre):
+    """Elimina el snapshot del mes y vuelve a permitir el registro de horas."""
+    cierre.delete()
+    transaction.on_commit(lambda: cache.delete(CLAVE_PERIODOS_CERRADOS))
+
+
+def cierres_en_rango(fecha_inicio=None, fecha_fin=None):
+    """Meses cerrados que quedan completamente dentro del rango (None = sin limite)."""
+    cierres = []
+    for anio, mes in sorted(periodos_cerrados()):
+        inicio, fin = rango_mes(anio, mes)
+        if (fecha_inicio is None or fecha_inicio <= inicio) and (fecha_fin is None or fin <= fecha_fin):
+            cierres.append((anio, mes))
+    return cierres
+
+
+# === TOTALES COMBINADOS (SNAPSHOTS + DATOS VIVOS) ===
+def totales_combinados(registros, filtros, fecha_inicio=None, fecha_fin=None):
+    """
+    Totales por proyecto y por empleado para el rango pedido.
+    Los meses cerrados se leen de TotalCerrado; el resto de los dias se agrega
+    en vivo desde `registros` (ya filtrado por cliente/proyecto/empleado/fechas)
+    y, si el rango alcanza proyectos archivados, desde el archivo.
+    `filtros` son los mismos filtros expresados como kwargs de TotalCerrado.
+
+    Devuelve (reporte_proyectos, reporte_empleados).
+    """
+    cierres = cierres_en_rango(fecha_inicio, fecha_fin)
+
+    vivos = registros
+    cerrados = Q()
+    for anio, mes in cierres:
+        vivos = vivos.exclude(fecha__range=rango_mes(anio, mes))
+        cerrados |= Q(cierre__anio=anio, cierre__mes=mes)
+
+    consultas = [vivos]
+    if alcanza_archivo(fecha_inicio, fecha_fin):
+        archivados = registros_archivados(filtros, fecha_inicio, fecha_fin)
+        for anio, mes in cierres:
+            archivados = archivados.exclude(fecha__range=rango_mes(anio, mes))
+        consultas.append(archivados)
+
+    filas = []
+    for consulta in consultas:
+        filas += list(
+            consulta.values('proyecto_id', 'empleado_id')
+            .annotate(horas=Sum('horas'), num_registros=Count('id'))
+            .order_by()
+        )
+    if cierres:
+        filas += list(
+            TotalCerrado.objects.filter(cerrados, proyecto__pendiente_eliminacion=False, **filtros)
+            .values('proyecto_id', 'empleado_id')
+            .annotate(horas=Sum('horas'), num_registros=Sum('num_registros'))
+            .order_by()
+        )
+
+    por_proyecto = {}
+    por_empleado = {}
+    for f in filas:
+        por_proyecto[f['proyecto_id']] = por_proyecto.get(f['proyecto_id'], 0) + f['horas']
+        horas, num = por_empleado.get(f['empleado_id'], (0, 0))
+        por_empleado[f['empleado_id']] = (horas + f['horas'], num + f['num_registros'])
+
+    # Nombres y presupuestos desde las referencias en memoria, no desde la query
+    ref = referencias()
+    reporte_proyectos = []
+    for proyecto_id, registradas in por_proyecto.items():
+        p = ref.proyecto(proyecto_id)
+        fila = {'id': proyecto_id, 'nombre': p['nombre'], 'cliente': p['cliente']}
+        fila.update(metricas_presupuesto(p['cantidad_h'], registradas))
+        reporte_proyectos.append(fila)
+    reporte_proyectos.sort(key=lambda p: p['registradas'], reverse=True)
+
+    reporte_empleados = []
+    for empleado_id, (horas, num) in por_empleado.items():
+        u = ref.empleado(empleado_id)
+        reporte_empleados.append({
+            'empleado__id': empleado_id,
+            'empleado__first_name': u['first_name'],
+            'empleado__last_name': u['last_name'],
+            'empleado__username': u['username'],
+            'horas_totales': horas,
+            'num_registros': num,
+        })
+    reporte_empleados.sort(key=lambda e: e['horas_totales'], reverse=True)
+
+    return reporte_proyectos, reporte_empleados
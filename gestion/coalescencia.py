@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescencia de calculos identicos concurrentes (single-flight).
+
+Cuando varios requests piden el mismo reporte o la misma exportacion al mismo
+tiempo, el primero toma un candado en el cache compartido y calcula; los demas
+esperan su resultado en lugar de repetir las agregaciones o el render del PDF.
+El candado vive en el cache (base de datos en produccion), asi que funciona
+entre workers de gunicorn.
+
+Si quien calcula falla, el candado se libera y otro request toma el relevo;
+si la espera excede COALESCENCIA_ESPERA, el request calcula por su cuenta.
+"""
+
+import hashlib
+import logging
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+PAUSA_INICIAL = 0.05
+PAUSA_MAXIMA = 0.5
+_FALTA = object()
+
+
+def _claves(clave):
+    resumen = hashlib.sha256(clave.encode('utf-8')).hexdigest()
+    return f'gestion:coalescencia:resultado:{resumen}', f'gestion:coalescencia:candado:{resumen}'
+
+
+def calcular_una_vez(clave, calcular, guardar_si=None, timeout=None):
+    """
+    Devuelve calcular() ejecutandolo una sola vez entre todos los requests
+    concurrentes con la misma clave. La clave debe incluir todo lo que afecta
+    al resultado (filtros normalizados, tipo de exportacion, version de los datos).
+    guardar_si(resultado) permite no compartir resultados de error.
+    timeout: segundos que se conserva el resultado (default COALESCENCIA_RESULTADO).
+    """
+    clave_resultado, clave_candado = _claves(clave)
+    espera = getattr(settings, 'COALESCENCIA_ESPERA', 30)
+    limite = time.monotonic() + espera
+    pausa = PAUSA_INICIAL
+
+    while True:
+        resultado = cache.get(clave_resultado, _FALTA)
+        if resultado is not _FALTA:
+            return resultado
+
+        token = secrets.token_hex(8)
+        if cache.add(clave_candado, token, getattr(settings, 'COALESCENCIA_CANDADO', 120)):
+            try:
+                resultado = calcular()
+                if guardar_si is None or guardar_si(resultado):
+                    if timeout is None:
+                        timeout = getattr(settings, 'COALESCENCIA_RESULTADO', 60)
+                    cache.set(clave_resultado, resultado, timeout)
+                return resultado
+            finally:
+                # Solo libera el candado propio (pudo expirar y tomarlo otro)
+                if cache.get(clave_candado) == token:
+                    cache.delete(clave_candado)
+
+        if time.monotonic() >= limite:
+            logger.warning('Coalescencia: espera agotada (%ss), se calcula sin compartir', espera)
+            return calcular()
+        time.sleep(pausa)
+        pausa = min(pausa * 2, PAUSA_MAXIMA)
+
+
+def respuesta_una_vez(clave, generar):
+    """
+    Version de calcular_una_vez() para vistas que devuelven un archivo: comparte
+    el contenido y los encabezados de la respuesta (solo si fue exitosa).
+    """
+    def _generar():
+        respuesta = generar()
+        return {
+            'status': respuesta.status_code,
+            'content': respuesta.content,
+            'headers': dict(respuesta.headers),
+        }
+
+    datos = calcular_una_vez(clave, _generar, guardar_si=lambda datos: datos['status'] == 200)
+    return HttpResponse(datos['content'], status=datos['status'], headers=datos['headers'])
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Comparacion de periodos en reportes: el rango filtrado contra el periodo
+anterior de la misma duracion o contra las mismas fechas del ano anterior.
+
+Los totales de ambos periodos salen de una sola consulta agrupada por
+(proyecto, empleado) con agregacion condicional (Sum(..., filter=Q(...))), mas
+la misma consulta sobre el archivo solo si alguno de los dos rangos lo alcanza.
+Los totales por proyecto, empleado y cliente se derivan de esas filas y los
+nombres salen de las referencias en memoria. Igual que en
+cierres.totales_combinados, los meses cerrados de cada rango se leen de sus
+snapshots (TotalCerrado) y solo los dias abiertos se agregan en vivo.
+"""
+
+import calendar
+import datetime
+
+from django.db.models import Q, Sum
+
+from .archivo import alcanza_archivo, registros_archivados
+from .cierres import cierres_en_rango, rango_mes
+from .models import TotalCerrado
+from .referencias import referencias
+
+
+# === PERIODO DE REFERENCIA ===
+def _mover_meses(fecha, meses):
+    """Misma fecha `meses` meses antes (o despues), recortada al fin de mes."""
+    anio, mes = divmod(fecha.year * 12 + fecha.month - 1 + meses, 12)
+    ultimo = calendar.monthrange(anio, mes + 1)[1]
+    return datetime.date(anio, mes + 1, min(fecha.day, ultimo))
+
+
+def _fin_de_mes(fecha):
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+
+
+def periodo_de_referencia(fecha_inicio, fecha_fin, modo):
+    """
+    Rango con el que se compara [fecha_inicio, fecha_fin]:
+    'anterior' = el periodo inmediato anterior (meses completos se comparan con
+    el mismo numero de meses completos; cualquier otro rango, con los mismos dias);
+    'anio' = las mismas fechas un ano antes.
+    """
+    meses_completos = fecha_inicio.day == 1 and fecha_fin == _fin_de_mes(fecha_fin)
+    if modo == 'anio':
+        meses = -12
+    elif meses_completos:
+        meses = -((fecha_fin.year - fecha_inicio.year) * 12 + fecha_fin.month - fecha_inicio.month + 1)
+    else:
+        dias = datetime.timedelta(days=(fecha_fin - fecha_inicio).days + 1)
+        return fecha_inicio - dias, fecha_fin - dias
+    inicio = _mover_meses(fecha_inicio, meses)
+    fin = _mover_meses(fecha_fin, meses)
+    return inicio, _fin_de_mes(fin) if meses_completos else fin
+
+
+# === TOTALES DE AMBOS PERIODOS ===
+def _variacion(nombre, actual, anterior, **extra):
+    fila = {
+        'nombre': nombre,
+        'actual': actual,
+        'anterior': anterior,
+        'diferencia': actual - anterior,
+        'cambio': round((actual - anterior) * 100 / anterior, 1) if anterior else None,
+    }
+    fila.update(extra)
+    return fila
+
+
+def comparar_periodos(registros, filtros, actual, anterior):
+    """
+    Horas por proyecto, empleado y cliente en `actual` y `anterior` (tuplas
+    (inicio, fin)) con su diferencia y cambio porcentual (None si antes era 0).
+    `registros` ya esta filtrado por cliente/proyecto/empleado (sin fechas) y
+    `filtros` son los mismos filtros como kwargs para el archivo.
+    """
+    # Cada rango se parte en sus dias abiertos (en vivo) y sus meses cerrados (snapshot)
+    en_rango, cerrados = [], []
+    for inicio, fin in (actual, anterior):
+        vivo, snapshot = Q(fecha__range=(inicio, fin)), Q()
+        for anio, mes in cierres_en_rango(inicio, fin):
+            vivo &= ~Q(fecha__range=rango_mes(anio, mes))
+            snapshot |= Q(cierre__anio=anio, cierre__mes=mes)
+        en_rango.append(vivo)
+        cerrados.append(snapshot)
+    en_actual, en_anterior = en_rango
+    cerrado_actual, cerrado_anterior = cerrados
+
+    consultas = [registros]
+    if alcanza_archivo(*actual) or alcanza_archivo(*anterior):
+        consultas.append(registros_archivados(filtros))
+    consultas = [
+        consulta.filter(en_actual | en_anterior)
+        .values('proyecto_id', 'empleado_id')
+        .annotate(actual=Sum('horas', filter=en_actual), anterior=Sum('horas', filter=en_anterior))
+        .order_by()
+        for consulta in consultas
+    ]
+    if cerrado_actual or cerrado_anterior:
+        # Un rango sin meses cerrados no suma nada del snapshot (Q() vacio no filtraria)
+        consultas.append(
+            TotalCerrado.objects.filter(cerrado_actual | cerrado_anterior, proyecto__pendiente_eliminacion=False, **filtros)
+            .values('proyecto_id', 'empleado_id')
+            .annotate(
+                actual=Sum('horas', filter=cerrado_actual or Q(pk__in=[])),
+                anterior=Sum('horas', filter=cerrado_anterior or Q(pk__in=[])),
+            )
+            .order_by()
+        )
+
+    pares = {}
+    for filas in consultas:
+        for f in filas:
+            a, b = pares.get((f['proyecto_id'], f['empleado_id']), (0, 0))
+            pares[f['proyecto_id'], f['empleado_id']] = (a + (f['actual'] or 0), b + (f['anterior'] or 0))
+
+    por_proyecto, por_empleado = {}, {}
+    for (proyecto_id, empleado_id), (a, b) in pares.items():
+        for totales, clave in ((por_proyecto, proyecto_id), (por_empleado, empleado_id)):
+            x, y = totales.get(clave, (0, 0))
+            totales[clave] = (x + a, y + b)
+
+    ref = referencias()
+    proyectos, por_cliente = [], {}
+    for proyecto_id, (a, b) in por_proyecto.items():
+        p = ref.proyecto(proyecto_id)
+        proyectos.append(_variacion(p['nombre'], a, b, cliente=p['cliente']))
+        x, y = por_cliente.get(p['cliente_id'], (0, 0))
+        por_cliente[p['cliente_id']] = (x + a, y + b)
+
+    empleados = []
+    for empleado_id, (a, b) in por_empleado.items():
+        u = ref.empleado(empleado_id)
+        empleados.append(_variacion(u['nombre'], a, b, username=u['username']))
+
+    ordenar = lambda filas: sorted(filas, key=lambda f: (f['actual'], f['anterior']), reverse=True)
+    proyectos = ordenar(proyectos)
+    empleados = ordenar(empleados)
+    clientes = ordenar(_variacion(ref.clientes.get(c, ''), a, b) for c, (a, b) in por_cliente.items())
+    return {
+        'actual': actual,
+        'anterior': anterior,
+        'proyectos': proyectos,
+        'empleados': empleados,
+        'clientes': clientes,
+        'tablas': [('Proyecto', proyectos), ('Empleado', empleados), ('Cliente', clientes)],
+        'total': _variacion(
+            'Total', sum(a for a, _ in pares.values()), sum(b for _, b in pares.values()),
+        ),
+    }
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .cache import cambiar_version, invalidar_asignaciones
+from .models import Actividad, AsignacionProyecto, Cliente, Proyecto
+
+
+# === MARCADO (DENTRO DEL REQUEST) ===
+@transaction.atomic
+def marcar_proyectos(proyectos, usuario):
+    """
+    Marca proyectos para eliminacion: desaparecen de inmediato de todas las vistas
+    y sus asignaciones activas se dan de baja. El borrado real lo hace purgar_pendientes().
+    """
+    ids = list(proyectos.values_list('id', flat=True))
+    empleado_ids = list(
+        AsignacionProyecto.objects.filter(proyecto_id__in=ids, activo=True).values_list('empleado_id', flat=True)
+    )
+    AsignacionProyecto.objects.filter(proyecto_id__in=ids, activo=True).update(
+        activo=False, fecha_baja=timezone.now().date()
+    )
+    Proyecto.todos.filter(id__in=ids).update(pendiente_eliminacion=True, eliminado_por=usuario)
+    # update() no emite senales: los registros de estos proyectos dejan de verse
+    cambiar_version('registros', 'proyectos')
+    transaction.on_commit(lambda: invalidar_asignaciones(*empleado_ids))
+
+
+@transaction.atomic
+def marcar_cliente(cliente, usuario):
+    """Marca un cliente y todos sus proyectos para eliminacion."""
+    marcar_proyectos(Proyecto.todos.filter(cliente=cliente), usuario)
+    Cliente.todos.filter(id=cliente.id).update(pendiente_eliminacion=True, eliminado_por=usuario)
+
+
+# === PURGA EN SEGUNDO PLANO ===
+def _dependientes(modelo):
+    """
+    Tablas que apuntan a `modelo` con CASCADE, como (tabla, pk, columna).
+    Incluye las OneToOne inversas (pronostico, archivo) y las tablas intermedias
+    M2M, que son relaciones ocultas.
+    """
+    for campo in modelo._meta.get_fields(include_hidden=True):
+        if campo.auto_created and (campo.one_to_many or campo.one_to_one) and campo.on_delete is models.CASCADE:
+            relacionado = campo.related_model
+            yield relacionado._meta.db_table, relacionado._meta.pk.column, campo.field.column
+
+
+def _borrar_en_lotes(tabla, pk, columna, valor, lote):
+    """
+    Borra con SQL directo las filas de `tabla` donde columna = valor, de `lote` en `lote`,
+    cada lote en su propia transaccion para no retener bloqueos. Devuelve cuantas borro.
+    """
+    qn = connection.ops.quote_name
+    sql = (
+        f'DELETE FROM {qn(tabla)} WHERE {qn(pk)} IN '
+        f'(SELECT {qn(pk)} FROM {qn(tabla)} WHERE {qn(columna)} = %s LIMIT %s)'
+    )
+    total = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [valor, lote])
+            borradas = cursor.rowcount
+        total += borradas
+        if borradas < lote:
+            return total
+
+
+def _purgar_proyecto(proyecto, lote):
+    """Borra las dependencias del proyecto en lotes y al final el proyecto. Devuelve {tabla: filas}."""
+    conteo = {}
+    for tabla, pk, columna in _dependientes(Proyecto):
+        conteo[tabla] = conteo.get(tabla, 0) + _borrar_en_lotes(tabla, pk, columna, proyecto.id, lote)
+    _borrar_en_lotes(Proyecto._meta.db_table, 'id', 'id', proyecto.id, 1)
+    return conteo
+
+
+def purgar_pendientes(lote=1000):
+    """
+    Elimina fisicamente los proyectos y clientes marcados para eliminacion.
+    Escribe una sola entrada de bitacora por objeto purgado con el resumen de filas.
+    Devuelve la lista de resumenes.
+    """
+    resumenes = []
+
+    for proyecto in Proyecto.todos.filter(pendiente_eliminacion=True, cliente__pendiente_eliminacion=False):
+        conteo = _purgar_proyecto(proyecto, lote)
+        resumenes.append(_auditar(proyecto.eliminado_por, proyecto, conteo))
+
+    for cliente in Cliente.todos.filter(pendiente_eliminacion=True):
+        conteo = {}
+        for proyecto in Proyecto.todos.filter(cliente=cliente):
+            for tabla, filas in _purgar_proyecto(proyecto, lote).items():
+                conteo[tabla] = conteo.get(tabla, 0) + filas
+            conteo[Proyecto._meta.db_table] = conteo.get(Proyecto._meta.db_table, 0) + 1
+        _borrar_en_lotes(Cliente._meta.db_table, 'id', 'id', cliente.id, 1)
+        resumenes.append(_auditar(cliente.eliminado_por, cliente, conteo))
+
+    return resumenes
+
+
+def _auditar(usuario, objeto, conteo):
+    detalle = ', '.join(f'{tabla}: {filas}' for tabla, filas in sorted(conteo.items()) if filas) or 'sin dependencias'
+    resumen = f"Purga en segundo plano del {objeto._meta.model_name} '{objeto.nombre}' ({detalle})."
+    if usuario is not None:
+        # El objeto ya no existe, pero conserva su pk en memoria para enlazar el evento
+        Actividad.registrar(
+            usuario, 'PURGAR', resumen, objeto=objeto,
+            nombre=objeto.nombre, filas={tabla: filas for tabla, filas in conteo.items() if filas},
+        )
+    return resumen
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Exportacion de reportes a Excel y PDF.
+
+openpyxl y xhtml2pdf (que arrastra reportlab, pypdf, html5lib, ...) se importan
+hasta la primera exportacion, para que los workers que nunca exportan no paguen
+ese costo de arranque ni de memoria. precargar() los importa por adelantado.
+"""
+
+import datetime
+import importlib
+from io import BytesIO
+
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+
+MODULOS_EXPORTACION = ('openpyxl', 'openpyxl.styles', 'xhtml2pdf.pisa')
+
+
+def precargar():
+    """Importa los motores de exportacion (para workers dedicados a exportar)."""
+    for modulo in MODULOS_EXPORTACION:
+        importlib.import_module(modulo)
+
+
+# === EXCEL ===
+def exportar_excel(reporte_proyectos, reporte_empleados, filas_bitacora, comparacion=None):
+    """
+    Libro de Excel con 3 hojas: resumen por proyecto, por empleado y bitacora
+    (filas como diccionarios, ver views._filas_bitacora); con `comparacion`
+    (gestion/comparacion.py) agrega una hoja con las variaciones.
+    """
+    import openpyxl
+    from openpyxl.styles import Font
+
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    filename = f"reporte_completo_{datetime.date.today()}.xlsx"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    wb = openpyxl.Workbook()
+    bold_font = Font(bold=True)
+
+    # Hoja 1: Resumen Proyectos
+    ws1 = wb.active
+    ws1.title = "Resumen Proyectos"
+    headers1 = [
+        "Proyecto", "Cliente", "H. Presupuestadas",
+        "H. Registradas", "H. Restantes", "Consumo (%)"
+    ]
+    ws1.append(headers1)
+    for cell in ws1[1]: cell.font = bold_font
+    for p in reporte_proyectos:
+        ws1.append([
+            p['nombre'], p['cliente'],
+            p['presupuestadas'], p['registradas'],
+            p['restantes'], p['progreso']
+        ])
+
+    # Hoja 2: Resumen Empleados
+    ws2 = wb.create_sheet(title="Resumen Empleados")
+    headers2 = ["Empleado", "Horas Totales", "Numero de Registros"]
+    ws2.append(headers2)
+    for cell in ws2[1]: cell.font = bold_font
+    for e in reporte_empleados:
+        full_name = f"{e['empleado__first_name']} {e['empleado__last_name']}"
+        ws2.append([
+            full_name.strip() or e['empleado__username'],
+            e['horas_totales'], e['num_registros']
+        ])
+
+    # Hoja 3: Bitacora Detalle
+    ws3 = wb.create_sheet(title="Bitacora Detalle")
+    headers3 = ["Fecha", "Empleado", "Proyecto", "Cliente", "Horas", "Descripcion"]
+    ws3.append(headers3)
+    for cell in ws3[1]: cell.font = bold_font
+    for registro in filas_bitacora:
+        ws3.append([
+            registro['fecha'], registro['empleado'],
+            registro['proyecto__nombre'], registro['proyecto__cliente__nombre'],
+            registro['horas'], registro['descripcion']
+        ])
+
+    # Hoja 4: Comparacion de periodos
+    if comparacion is not None:
+        ws4 = wb.create_sheet(title="Comparacion")
+        (ai, af), (bi, bf) = comparacion['actual'], comparacion['anterior']
+        ws4.append([f"Periodo: {ai:%d/%m/%Y} - {af:%d/%m/%Y}", f"Comparado con: {bi:%d/%m/%Y} - {bf:%d/%m/%Y}"])
+        for titulo, filas in comparacion['tablas']:
+            ws4.append([])
+            ws4.append([titulo, "H. Periodo", "H. Anterior", "Diferencia", "Cambio (%)"])
+            for cell in ws4[ws4.max_row]: cell.font = bold_font
+            for f in filas:
+                ws4.append([f['nombre'], f['actual'], f['anterior'], f['diferencia'], f['cambio']])
+        total = comparacion['total']
+        ws4.append([])
+        ws4.append([total['nombre'], total['actual'], total['anterior'], total['diferencia'], total['cambio']])
+        for cell in ws4[ws4.max_row]: cell.font = bold_font
+
+    wb.save(response)
+    return response
+
+
+def exportar_utilizacion(datos):
+    """Libro de Excel del reporte de utilizacion: horas, capacidad y % por empleado y periodo."""
+    import openpyxl
+    from openpyxl.styles import Font
+
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    filename = f"utilizacion_{datos['fecha_inicio']}_{datos['fecha_fin']}.xlsx"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    wb = openpyxl.Workbook()
+    bold_font = Font(bold=True)
+
+    ws = wb.active
+    ws.title = "Utilizacion"
+    ws.append(["Empleado", "Periodo", "Dias laborales", "Horas", "Capacidad", "Utilizacion (%)"])
+    for cell in ws[1]: cell.font = bold_font
+    for e in datos['empleados']:
+        for periodo, celda in zip(datos['periodos'], e['celdas']):
+            ws.append([
+                e['nombre'], periodo['inicio'], periodo['dias'],
+                celda['horas'], celda['capacidad'], celda['utilizacion'],
+            ])
+
+    ws2 = wb.create_sheet(title="Totales")
+    ws2.append(["Empleado", "Capacidad semanal", "Horas", "Capacidad", "Utilizacion (%)"])
+    for cell in ws2[1]: cell.font = bold_font
+    for e in datos['empleados']:
+        ws2.append([e['nombre'], e['capacidad_semanal'], e['horas'], e['capacidad'], e['utilizacion']])
+
+    wb.save(response)
+    return response
+
+
+# === PDF ===
+def exportar_pdf(contexto):
+    """Documento PDF con las 3 tablas del reporte (plantilla reporte_pdf.html)."""
+    from xhtml2pdf import pisa
+
+    html_string = render_to_string('gestion/reporte_pdf.html', contexto)
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html_string.encode("UTF-8")), result)
+
+    if not pdf.err:
+        response = HttpResponse(result.getvalue(), content_type='application/pdf')
+        filename = f"reporte_completo_{datetime.date.today()}.pdf"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    return HttpResponse(f"Error al generar el PDF: {pdf.err}", status=500)
@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import datetime
+
 from django import forms
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import PasswordChangeForm
-from .models import Proyecto, RegistroHoras, AsignacionProyecto, Cliente, PerfilEmpleado
+from .models import Proyecto, RegistroHoras, AsignacionProyecto, Cliente, PerfilEmpleado, Actividad
+from .cache import asignaciones_activas
+from .comparacion import periodo_de_referencia
 
 
 # === PROYECTOS ===
@@ -49,9 +54,13 @@ class RegistroHorasForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if user:
             self.user = user
-            qs = Proyecto.objects.filter(asignaciones__empleado=user, asignaciones__activo=True)
-            qs = qs.exclude(situacion__in=['FIN', 'CAN', 'PAU']).distinct()
-            self.fields['proyecto'].queryset = qs
+            # Conjunto de asignaciones activas (cacheado por empleado); clean() lo reutiliza
+            self.asignaciones = asignaciones_activas(user)
+            ids = [
+                proyecto_id for proyecto_id, a in self.asignaciones.items()
+                if a['situacion'] not in ['FIN', 'CAN', 'PAU']
+            ]
+            self.fields['proyecto'].queryset = Proyecto.objects.filter(id__in=ids)
 
     class Meta:
         model = RegistroHoras
@@ -79,7 +88,7 @@ class RegistroHorasForm(forms.ModelForm):
                 self.add_error('fecha', f'La fecha no puede ser anterior al inicio del proyecto ({inicio_str}).')
 
             if hasattr(self, 'user') and self.user:
-                if not AsignacionProyecto.objects.filter(empleado=self.user, proyecto=proyecto, activo=True).exists():
+                if proyecto.id not in self.asignaciones:
                     self.add_error('proyecto', 'No tienes asignacion activa a este proyecto.')
         return cleaned
 
@@ -98,14 +107,10 @@ class AsignarProyectoForm(forms.ModelForm):
         qs = Proyecto.objects.filter(situacion='ACT')
 
         if empleado is not None:
-            proyectos_asignados = AsignacionProyecto.objects.filter(
-                empleado=empleado,
-                activo=True
-            ).values_list('proyecto_id', flat=True)
-
+            proyectos_asignados = list(asignaciones_activas(empleado))
             qs = qs.exclude(id__in=proyectos_asignados)
 
-        self.fields['proyecto'].queryset = qs.order_by('nombre').distinct()
+        self.fields['proyecto'].queryset = qs.order_by('nombre')
 
     class Meta:
         model = AsignacionProyecto   
@@ -114,6 +119,46 @@ class AsignarProyectoForm(forms.ModelForm):
             'proyecto': forms.Select(attrs={'class': 'form-control'}),
         }
 
+# === ASIGNACION MASIVA ===
+class AsignacionMasivaForm(forms.Form):
+    ACCION_CHOICES = [
+        ('asignar', 'Asignar a los proyectos'),
+        ('desasignar', 'Desasignar de los proyectos'),
+        ('mover', 'Mover de los proyectos al proyecto destino'),
+    ]
+
+    accion = forms.ChoiceField(choices=ACCION_CHOICES, label='Accion', widget=forms.Select(attrs={'class': 'form-control'}))
+    empleados = forms.ModelMultipleChoiceField(
+        queryset=User.objects.filter(is_staff=False, is_active=True).order_by('username'),
+        label='Empleados', widget=forms.SelectMultiple(attrs={'class': 'form-control', 'size': 12}),
+    )
+    proyectos = forms.ModelMultipleChoiceField(
+        queryset=Proyecto.objects.order_by('nombre'),
+        label='Proyectos', widget=forms.SelectMultiple(attrs={'class': 'form-control', 'size': 12}),
+    )
+    destino = forms.ModelChoiceField(
+        queryset=Proyecto.objects.filter(situacion='ACT').order_by('nombre'), required=False,
+        label='Proyecto destino', widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    rol_en_proyecto = forms.ChoiceField(
+        choices=AsignacionProyecto.ROL_CHOICES, initial='OT', required=False,
+        label='Rol', widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        accion = cleaned_data.get('accion')
+        proyectos = cleaned_data.get('proyectos') or []
+        if accion == 'asignar':
+            inactivos = [p.nombre for p in proyectos if p.situacion != 'ACT']
+            if inactivos:
+                self.add_error('proyectos', f"Solo se puede asignar a proyectos activos: {', '.join(inactivos)}.")
+        if accion == 'mover' and not cleaned_data.get('destino'):
+            self.add_error('destino', 'Indica el proyecto destino.')
+        cleaned_data['rol_en_proyecto'] = cleaned_data.get('rol_en_proyecto') or 'OT'
+        return cleaned_data
+
+
 # === CLIENTE ===
 class ClienteForm(forms.ModelForm):
     class Meta:
@@ -134,7 +179,7 @@ class ClienteForm(forms.ModelForm):
         rfc = re.sub(r"[^A-Za-z0-9&]", "", raw).upper()
         if not re.match(r'^[A-Z\&]{3,4}\d{6}[A-Z0-9]{3}$', rfc):
             raise forms.ValidationError('RFC invalido. Debe cumplir el formato oficial (12 o 13 caracteres).')
-        qs = Cliente.objects.filter(rfc__iexact=rfc)
+        qs = Cliente.todos.filter(rfc__iexact=rfc)
         if getattr(self, 'instance', None) and getattr(self.instance, 'pk', None):
             qs = qs.exclude(pk=self.instance.pk)
         if qs.exists():
@@ -155,7 +200,7 @@ class EmpleadoForm(forms.ModelForm):
 
     class Meta:
         model = PerfilEmpleado
-        fields = ['primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido']
+        fields = ['primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido', 'horas_semanales']
 
     def save(self, commit=True):
         primer_nombre = self.cleaned_data.get('primer_nombre')
@@ -194,7 +239,7 @@ class EmpleadoUpdateForm(forms.ModelForm):
 
     class Meta:
         model = PerfilEmpleado
-        fields = ['primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido']
+        fields = ['primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido', 'horas_semanales']
 
     def __init__(self, *args, user_instance=None, **kwargs):
         super().__init__(*args, **kwargs)
@@ -242,9 +287,84 @@ class ReporteFiltroForm(forms.Form):
     empleado = forms.ModelChoiceField(queryset=User.objects.filter(is_staff=False, is_active=True), required=False, label='Empleado', widget=forms.Select(attrs={'class': 'form-control'}))
     fecha_inicio = forms.DateField(required=False, label='Desde', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
     fecha_fin = forms.DateField(required=False, label='Hasta', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    comparar = forms.ChoiceField(
+        choices=[('', 'Sin comparar'), ('anterior', 'Periodo anterior'), ('anio', 'Mismo periodo del ano anterior')],
+        required=False, label='Comparar con', widget=forms.Select(attrs={'class': 'form-control'}),
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['cliente'].empty_label = 'Todos los Clientes'
         self.fields['proyecto'].empty_label = 'Todos los Proyectos'
         self.fields['empleado'].empty_label = 'Todos los Empleados'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        comparar = cleaned_data.get('comparar')
+        fecha_inicio, fecha_fin = cleaned_data.get('fecha_inicio'), cleaned_data.get('fecha_fin')
+        if comparar and not (fecha_inicio and fecha_fin):
+            self.add_error('comparar', 'Indica las fechas Desde y Hasta para comparar periodos.')
+        elif comparar:
+            try:
+                periodo_de_referencia(fecha_inicio, fecha_fin, comparar)
+            except (ValueError, OverflowError):
+                # El periodo de referencia caeria antes del ano 1
+                self.add_error('comparar', 'No hay un periodo anterior con el cual comparar esas fechas.')
+        return cleaned_data
+
+
+# === FILTROS DE LA BITACORA DE ACTIVIDADES ===
+class ActividadFiltroForm(forms.Form):
+    OBJETO_CHOICES = [
+        ('', 'Cualquier objeto'),
+        ('cliente', 'Cliente'),
+        ('proyecto', 'Proyecto'),
+        ('user', 'Usuario'),
+    ]
+
+    usuario = forms.ModelChoiceField(queryset=User.objects.order_by('username'), required=False, label='Usuario', widget=forms.Select(attrs={'class': 'form-control'}))
+    tipo = forms.ChoiceField(choices=[('', 'Todas las acciones')] + Actividad.TIPO_CHOICES, required=False, label='Accion', widget=forms.Select(attrs={'class': 'form-control'}))
+    objeto_tipo = forms.ChoiceField(choices=OBJETO_CHOICES, required=False, label='Objeto', widget=forms.Select(attrs={'class': 'form-control'}))
+    objeto_id = forms.IntegerField(min_value=1, required=False, label='ID del objeto', widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    fecha_inicio = forms.DateField(required=False, label='Desde', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    fecha_fin = forms.DateField(required=False, label='Hasta', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['usuario'].empty_label = 'Todos los Usuarios'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('objeto_id') and not cleaned_data.get('objeto_tipo'):
+            self.add_error('objeto_tipo', 'Indica el tipo de objeto para buscar por ID.')
+        return cleaned_data
+
+
+# === REPORTE DE UTILIZACION ===
+class UtilizacionForm(forms.Form):
+    GRANULARIDAD_CHOICES = [('semana', 'Por semana'), ('mes', 'Por mes')]
+    # Un rango mayor se pide por mes: por semana la tabla deja de ser legible
+    MAX_DIAS = 370
+
+    fecha_inicio = forms.DateField(required=False, label='Desde', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    fecha_fin = forms.DateField(required=False, label='Hasta', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    granularidad = forms.ChoiceField(choices=GRANULARIDAD_CHOICES, required=False, label='Agrupar', widget=forms.Select(attrs={'class': 'form-control'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Por defecto: las ultimas 12 semanas completas hasta hoy
+        hoy = timezone.localdate()
+        fecha_fin = cleaned_data.get('fecha_fin') or hoy
+        fecha_inicio = cleaned_data.get('fecha_inicio') or (
+            fecha_fin - datetime.timedelta(days=fecha_fin.weekday() + 7 * 11)
+        )
+        if fecha_inicio > fecha_fin:
+            raise forms.ValidationError('La fecha inicial no puede ser posterior a la final.')
+        granularidad = cleaned_data.get('granularidad') or 'semana'
+        if granularidad == 'semana' and (fecha_fin - fecha_inicio).days > self.MAX_DIAS:
+            raise forms.ValidationError('Para rangos de mas de un ano agrupa por mes.')
+        if (fecha_fin - fecha_inicio).days > 5 * self.MAX_DIAS:
+            raise forms.ValidationError('El rango no puede ser mayor a cinco anos.')
+        cleaned_data.update(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, granularidad=granularidad)
+        return cleaned_data
+
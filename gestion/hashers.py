@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+PBKDF2 con iteraciones configurables (PASSWORD_PBKDF2_ITERACIONES).
+
+Usa el mismo identificador que el hasher de Django ('pbkdf2_sha256'), asi que
+verifica los hashes existentes. Cuando las iteraciones guardadas en un hash no
+coinciden con las configuradas, must_update() lo indica y el login vuelve a
+hashear la contrasena con los parametros nuevos (check_password de Django).
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2Configurable(PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERACIONES or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.archivo import archivar_pendientes, archivar_proyecto
+from gestion.models import Proyecto
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve a las tablas de archivo, en lotes, las horas y asignaciones de los proyectos '
+        'finalizados o cancelados sin actividad reciente. Pensado para ejecutarse como cron job.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--antiguedad', type=int, default=settings.ARCHIVO_ANTIGUEDAD_DIAS,
+            help=f'Dias sin actividad para archivar (default: {settings.ARCHIVO_ANTIGUEDAD_DIAS}).',
+        )
+        parser.add_argument('--proyecto', type=int, help='Archiva solo este proyecto (sin importar su antiguedad).')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas movidas por transaccion (default: 1000).')
+
+    def handle(self, *args, **options):
+        lote = max(options['lote'], 1)
+        if options['proyecto']:
+            proyecto = Proyecto.objects.filter(id=options['proyecto']).first()
+            if proyecto is None:
+                raise CommandError(f"No existe el proyecto {options['proyecto']}.")
+            try:
+                archivos = [archivar_proyecto(proyecto, lote=lote)]
+            except ValueError as e:
+                raise CommandError(str(e))
+        else:
+            archivos = archivar_pendientes(options['antiguedad'], lote=lote)
+
+        for archivo in archivos:
+            self.stdout.write(
+                f"{archivo.proyecto.nombre}: {archivo.registros} registros ({archivo.horas}h), "
+                f"{archivo.asignaciones} asignaciones."
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(archivos)} proyecto(s) archivado(s).'))
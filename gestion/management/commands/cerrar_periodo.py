@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.cierres import cerrar_periodo, reabrir_periodo
+from gestion.models import CierrePeriodo
+
+
+class Command(BaseCommand):
+    help = 'Cierra un mes (congela sus totales y bloquea sus horas) o lo reabre con --reabrir.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo', help='Mes a cerrar en formato AAAA-MM.')
+        parser.add_argument('--reabrir', action='store_true', help='Reabre el mes y descarta su snapshot.')
+
+    def handle(self, *args, **options):
+        try:
+            fecha = datetime.datetime.strptime(options['periodo'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError('El periodo debe tener el formato AAAA-MM.')
+
+        if options['reabrir']:
+            cierre = CierrePeriodo.objects.filter(anio=fecha.year, mes=fecha.month).first()
+            if cierre is None:
+                raise CommandError(f'El periodo {fecha:%m/%Y} no esta cerrado.')
+            reabrir_periodo(cierre)
+            self.stdout.write(self.style.SUCCESS(f'Periodo {fecha:%m/%Y} reabierto.'))
+            return
+
+        try:
+            cierre = cerrar_periodo(fecha.year, fecha.month)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'Periodo {cierre} cerrado con {cierre.totales.count()} totales por proyecto y empleado.'
+        ))
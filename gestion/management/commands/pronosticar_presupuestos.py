@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gestion.pronosticos import actualizar_pronosticos
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el ritmo de consumo y la fecha estimada de agotamiento del presupuesto de '
+        'horas de todos los proyectos activos. Pensado para ejecutarse cada noche como cron job.'
+    )
+
+    def handle(self, *args, **options):
+        pronosticos = actualizar_pronosticos()
+        en_riesgo = sum(1 for p in pronosticos if p.riesgo in ('REB', 'ALT'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(pronosticos)} proyecto(s) activos pronosticados, {en_riesgo} rebasados o en riesgo alto.'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from gestion.eliminacion import purgar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra en lotes los clientes y proyectos marcados para eliminacion junto con '
+        'sus horas y asignaciones. Pensado para ejecutarse como cron job.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Filas borradas por transaccion (default: 1000).')
+
+    def handle(self, *args, **options):
+        resumenes = purgar_pendientes(lote=max(options['lote'], 1))
+        for resumen in resumenes:
+            self.stdout.write(resumen)
+        self.stdout.write(self.style.SUCCESS(f'{len(resumenes)} objeto(s) purgado(s).'))
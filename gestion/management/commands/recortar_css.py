@@ -0,0 +1,128 @@
+import re
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+APP = Path(__file__).resolve().parent.parent.parent
+ORIGEN = APP / 'assets' / 'bootstrap' / 'bootstrap.min.css'
+DESTINO = APP / 'static' / 'gestion' / 'vendor' / 'bootstrap' / 'bootstrap.recortado.min.css'
+
+# Clases que agrega el JS de Bootstrap en tiempo de ejecucion (modal de cerrar sesion)
+SIEMPRE = {'show', 'showing', 'hiding', 'fade', 'modal-open', 'modal-backdrop', 'modal-static', 'active', 'disabled'}
+# Reglas cuyo contenido son a su vez reglas con selectores
+AT_RULES_ANIDADAS = ('@media', '@supports', '@container', '@layer')
+
+RE_TOKEN = re.compile(r'[A-Za-z0-9_-]+')
+RE_CLASE = re.compile(r'\.((?:\\.|[\w-])+)')
+RE_NOT = re.compile(r':not\([^()]*\)')
+
+
+def clases_usadas():
+    """Todos los identificadores que aparecen en plantillas y codigo Python de la app (superconjunto seguro)."""
+    usadas = set(SIEMPRE)
+    for patron in ('templates/**/*.html', '**/*.py'):
+        for archivo in APP.glob(patron):
+            usadas.update(RE_TOKEN.findall(archivo.read_text(encoding='utf-8', errors='ignore')))
+    return usadas
+
+
+def _bloques(css):
+    """
+    Divide CSS en elementos de primer nivel: ('sentencia', texto) para @charset/@import,
+    ('comentario', texto) y ('regla', preludio, cuerpo). Respeta cadenas entre comillas.
+    """
+    i, n = 0, len(css)
+    inicio = 0
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            i = css.index(c, i + 1) + 1
+            continue
+        if css.startswith('/*', i):
+            fin = css.index('*/', i) + 2
+            if not css[inicio:i].strip():
+                yield ('comentario', css[i:fin])
+                inicio = fin
+            i = fin
+            continue
+        if c == ';':
+            yield ('sentencia', css[inicio:i + 1].strip())
+            i = inicio = i + 1
+            continue
+        if c == '{':
+            preludio = css[inicio:i].strip()
+            profundidad, j = 1, i + 1
+            while profundidad:
+                if css[j] in '"\'':
+                    j = css.index(css[j], j + 1)
+                elif css[j] == '{':
+                    profundidad += 1
+                elif css[j] == '}':
+                    profundidad -= 1
+                j += 1
+            yield ('regla', preludio, css[i + 1:j - 1])
+            i = inicio = j
+            continue
+        i += 1
+
+
+def _dividir_selectores(preludio):
+    partes, actual, profundidad = [], [], 0
+    for c in preludio:
+        if c in '([':
+            profundidad += 1
+        elif c in ')]':
+            profundidad -= 1
+        if c == ',' and profundidad == 0:
+            partes.append(''.join(actual))
+            actual = []
+        else:
+            actual.append(c)
+    partes.append(''.join(actual))
+    return partes
+
+
+def _selector_usado(selector, usadas):
+    # Las clases dentro de :not() no tienen que existir para que el selector aplique
+    clases = RE_CLASE.findall(RE_NOT.sub('', selector))
+    return all(clase.replace('\\', '') in usadas for clase in clases)
+
+
+def recortar(css, usadas):
+    salida = []
+    for bloque in _bloques(css):
+        if bloque[0] == 'sentencia':
+            salida.append(bloque[1])
+        elif bloque[0] == 'comentario':
+            # Solo se conservan los comentarios /*! (licencia)
+            if bloque[1].startswith('/*!'):
+                salida.append(bloque[1])
+        else:
+            _, preludio, cuerpo = bloque
+            if preludio.startswith(AT_RULES_ANIDADAS):
+                interior = recortar(cuerpo, usadas)
+                if interior:
+                    salida.append(f'{preludio}{{{interior}}}')
+            elif preludio.startswith('@'):
+                salida.append(f'{preludio}{{{cuerpo}}}')
+            else:
+                selectores = [s for s in _dividir_selectores(preludio) if _selector_usado(s, usadas)]
+                if selectores:
+                    salida.append(f"{','.join(selectores)}{{{cuerpo}}}")
+    return ''.join(salida)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera una version de Bootstrap sin las reglas CSS que no usan las plantillas '
+        'de gestion. Se ejecuta en build.sh antes de collectstatic.'
+    )
+
+    def handle(self, *args, **options):
+        css = ORIGEN.read_text(encoding='utf-8')
+        recortado = recortar(css, clases_usadas())
+        DESTINO.parent.mkdir(parents=True, exist_ok=True)
+        DESTINO.write_text(recortado + '\n', encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f'{DESTINO.name}: {len(css.encode()) // 1024} KB -> {len(recortado.encode()) // 1024} KB'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.archivo import restaurar_proyecto
+from gestion.models import Proyecto
+
+
+class Command(BaseCommand):
+    help = 'Devuelve las horas y asignaciones archivadas de un proyecto a las tablas de trabajo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('proyecto', type=int, help='ID del proyecto archivado.')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas movidas por transaccion (default: 1000).')
+
+    def handle(self, *args, **options):
+        proyecto = Proyecto.objects.filter(id=options['proyecto']).first()
+        if proyecto is None:
+            raise CommandError(f"No existe el proyecto {options['proyecto']}.")
+        try:
+            registros, asignaciones = restaurar_proyecto(proyecto, lote=max(options['lote'], 1))
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Proyecto '{proyecto.nombre}' restaurado: {registros} registros, {asignaciones} asignaciones."
+        ))
@@ -0,0 +1,57 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.transferencia import registrar_conexion, transferir
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia usuarios y todas las tablas de gestion de una base a otra (por ejemplo del SQLite '
+        'de una sucursal a PostgreSQL) en lotes por llave primaria, y verifica filas y checksums. '
+        'Con SQLite como origen las escrituras esperan hasta que termine la lectura.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--origen', default='default', help='Alias de DATABASES o URL de la base origen (default: default).')
+        parser.add_argument('--destino', required=True, help='Alias de DATABASES o URL de la base destino.')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por lote (default: 5000).')
+        parser.add_argument('--migrar', action='store_true', help='Aplica las migraciones en el destino antes de copiar.')
+        parser.add_argument('--reanudar', action='store_true', help='Continua una transferencia interrumpida.')
+        parser.add_argument('--sin-verificar', action='store_true', help='Omite la comparacion de filas y checksums.')
+
+    def handle(self, *args, **options):
+        try:
+            origen = registrar_conexion(options['origen'], 'transferencia_origen')
+            destino = registrar_conexion(options['destino'], 'transferencia_destino')
+        except ValueError as e:
+            raise CommandError(str(e))
+        if origen == destino:
+            raise CommandError('El origen y el destino son la misma base.')
+
+        if options['migrar']:
+            call_command('migrate', database=destino, verbosity=0)
+
+        avisar = (lambda mensaje: self.stdout.write(f'  {mensaje}')) if options['verbosity'] > 1 else None
+        try:
+            resultados = transferir(
+                origen, destino, lote=max(options['lote'], 1), reanudar=options['reanudar'],
+                verificar=not options['sin_verificar'], avisar=avisar,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        diferentes = []
+        for r in resultados:
+            por_segundo = r['copiadas'] / r['segundos'] if r['segundos'] else 0
+            linea = f"{r['tabla']:<40} {r['copiadas']:>9} copiadas {r['segundos']:>7.1f} s {por_segundo:>9.0f} filas/s"
+            if r['coincide'] is None:
+                self.stdout.write(linea)
+            elif r['coincide']:
+                self.stdout.write(f"{linea}  ok ({r['filas']} filas)")
+            else:
+                diferentes.append(r['tabla'])
+                self.stderr.write(self.style.ERROR(f'{linea}  NO COINCIDE'))
+
+        if diferentes:
+            raise CommandError('Las filas o checksums no coinciden en: ' + ', '.join(diferentes) + '.')
+        self.stdout.write(self.style.SUCCESS(f'Transferencia completa: {len(resultados)} tablas.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.calentamiento import FASES, calentar
+
+
+class Command(BaseCommand):
+    help = (
+        'Calienta la aplicacion antes de recibir trafico: verifica la base de datos, importa '
+        'los modulos, compila las plantillas y llena los caches de listas y reportes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fases', nargs='+', choices=FASES, default=list(FASES),
+            help='Fases a ejecutar (por defecto todas, en este orden).',
+        )
+
+    def handle(self, *args, **options):
+        fases = [fase for fase in FASES if fase in options['fases']]
+        resultados = calentar(fases)
+
+        total = 0
+        fallidas = []
+        for resultado in resultados:
+            total += resultado['segundos']
+            linea = f"{resultado['fase']:<12} {resultado['segundos'] * 1000:>8.0f} ms"
+            if resultado['error'] is not None:
+                fallidas.append(resultado['fase'])
+                self.stderr.write(self.style.ERROR(f"{linea}  ERROR: {resultado['error']}"))
+            else:
+                self.stdout.write(f"{linea}  {resultado['detalle']}")
+        self.stdout.write(f"{'total':<12} {total * 1000:>8.0f} ms")
+
+        # Sin base de datos el despliegue no puede seguir; las demas fases solo
+        # dejan frio su cache y el primer request lo llena
+        if 'base_datos' in fallidas:
+            raise CommandError('Fallo el calentamiento: base_datos.')
+        if fallidas:
+            self.stdout.write(self.style.WARNING(f"Calentamiento incompleto, fallaron: {', '.join(fallidas)}."))
+        else:
+            self.stdout.write(self.style.SUCCESS('Calentamiento completo.'))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import gzip
+import io
+import re
+import secrets
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# === COMPRESION DE RESPUESTAS DINAMICAS ===
+TIPOS_COMPRIMIBLES = (
+    'text/html', 'text/plain', 'text/csv', 'text/css',
+    'application/json', 'application/javascript', 'application/xml',
+)
+# Bytes aleatorios maximos en el encabezado gzip (mismo recurso que GZipMiddleware de Django)
+MAX_BYTES_ALEATORIOS = 100
+
+re_acepta_br = re.compile(r'\bbr\b')
+re_acepta_gzip = re.compile(r'\bgzip\b')
+
+
+def permitir_compresion(view):
+    """
+    Marca una vista cuyas paginas llevan el token CSRF pero pueden comprimirse:
+    Django enmascara el token distinto en cada respuesta, y aqui ademas se comprime
+    solo con gzip con longitud aleatoria en el encabezado (mitigacion de BREACH).
+    """
+    @functools.wraps(view)
+    def _view(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        response.compresion_con_csrf = True
+        return response
+    return _view
+
+
+def _relleno_aleatorio():
+    return secrets.token_hex(secrets.randbelow(MAX_BYTES_ALEATORIOS // 2) + 1)
+
+
+class _GzipStream:
+    """Compresor gzip incremental: process() por chunk y finish() al final."""
+
+    def __init__(self, nivel, aleatorio):
+        self.buffer = io.BytesIO()
+        self.archivo = gzip.GzipFile(
+            filename=_relleno_aleatorio() if aleatorio else '',
+            mode='wb', compresslevel=nivel, fileobj=self.buffer, mtime=0,
+        )
+
+    def _leer(self):
+        datos = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return datos
+
+    def process(self, chunk):
+        self.archivo.write(chunk)
+        # Z_SYNC_FLUSH: cada chunk sale completo hacia el cliente sin esperar al final
+        self.archivo.flush()
+        return self._leer()
+
+    def finish(self):
+        self.archivo.close()
+        return self._leer()
+
+
+class _BrotliStream:
+    def __init__(self, nivel):
+        self.compresor = brotli.Compressor(quality=nivel)
+
+    def process(self, chunk):
+        return self.compresor.process(chunk) + self.compresor.flush()
+
+    def finish(self):
+        return self.compresor.finish()
+
+
+class CompresionMiddleware(MiddlewareMixin):
+    """
+    Comprime con Brotli o gzip (segun Accept-Encoding) el HTML dinamico y las
+    exportaciones de texto (CSV/JSON), incluidas las respuestas en streaming.
+
+    Configuracion (settings):
+      COMPRESION_MIN_BYTES      tamano minimo para comprimir respuestas normales.
+      COMPRESION_NIVEL_GZIP     nivel de gzip (1-9).
+      COMPRESION_NIVEL_BROTLI   calidad de Brotli (0-11).
+      COMPRESION_EXCLUIR_CSRF   no comprimir paginas que renderizaron un token CSRF
+                                (salvo vistas marcadas con @permitir_compresion).
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        tipo = response.get('Content-Type', '').split(';')[0].strip()
+        if tipo not in TIPOS_COMPRIMIBLES:
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESION_MIN_BYTES', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        # Cuando la pagina renderiza el token, CsrfViewMiddleware vuelve a enviar la cookie
+        con_csrf = (
+            settings.CSRF_COOKIE_NAME in response.cookies
+            or request.META.get('CSRF_COOKIE_NEEDS_UPDATE', False)
+        )
+        if con_csrf and getattr(settings, 'COMPRESION_EXCLUIR_CSRF', True):
+            if not getattr(response, 'compresion_con_csrf', False):
+                return response
+
+        codificacion = self._negociar(request.META.get('HTTP_ACCEPT_ENCODING', ''), con_csrf)
+        if codificacion is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = self._comprimir_stream(
+                response.streaming_content, self._compresor(codificacion, con_csrf)
+            )
+            del response.headers['Content-Length']
+        else:
+            compresor = self._compresor(codificacion, con_csrf)
+            comprimido = compresor.process(response.content) + compresor.finish()
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacion
+        return response
+
+    @staticmethod
+    def _negociar(accept_encoding, con_csrf):
+        # Brotli no admite relleno aleatorio; las paginas con token CSRF van solo en gzip
+        if brotli is not None and not con_csrf and re_acepta_br.search(accept_encoding):
+            return 'br'
+        if re_acepta_gzip.search(accept_encoding):
+            return 'gzip'
+        return None
+
+    @staticmethod
+    def _compresor(codificacion, con_csrf):
+        if codificacion == 'br':
+            return _BrotliStream(getattr(settings, 'COMPRESION_NIVEL_BROTLI', 4))
+        return _GzipStream(getattr(settings, 'COMPRESION_NIVEL_GZIP', 6), aleatorio=con_csrf)
+
+    @staticmethod
+    def _comprimir_stream(contenido, compresor):
+        for chunk in contenido:
+            datos = compresor.process(chunk)
+            if datos:
+                yield datos
+        yield compresor.finish()
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0006_alter_actividad_accion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierrePeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('fecha_cierre', models.DateTimeField(auto_now_add=True)),
+                ('cerrado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-anio', '-mes'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TotalCerrado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('horas', models.IntegerField()),
+                ('num_registros', models.IntegerField()),
+                ('cierre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totales', to='gestion.cierreperiodo')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totales_cerrados', to=settings.AUTH_USER_MODEL)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totales_cerrados', to='gestion.proyecto')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cierreperiodo',
+            constraint=models.UniqueConstraint(fields=('anio', 'mes'), name='uq_cierre_por_mes'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0007_cierreperiodo_totalcerrado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='eliminado_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='pendiente_eliminacion',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='eliminado_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='pendiente_eliminacion',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:55
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Textos que generaban las vistas antes de los eventos estructurados.
+# Las vocales acentuadas se guardaron con distintas codificaciones ("EditÃ³", "Editó"),
+# por eso se aceptan como \S*.
+PATRONES = [
+    (r"Inici\S* sesi\S*n en el sistema\.", 'LOGIN', None),
+    (r"Cerr\S* sesi\S*n\.", 'LOGOUT', None),
+    (r"Cre\S* el proyecto '(?P<nombre>.+)'\.", 'CREAR', 'proyecto'),
+    (r"Registro el cliente '(?P<nombre>.+)'\.", 'CREAR', 'cliente'),
+    (r"Edit\S* el proyecto '(?P<nombre>.+)'\.", 'EDITAR', 'proyecto'),
+    (r"Edit\S* el cliente '(?P<nombre>.+)'\.", 'EDITAR', 'cliente'),
+    (r"Edit\S* al usuario '(?P<nombre>.+)'\.", 'EDITAR', 'user'),
+    (r"Elimin\S* el proyecto '(?P<nombre>.+)'\.", 'ELIMINAR', 'proyecto'),
+    (r"Elimin\S* el cliente '(?P<nombre>.+)'\.", 'ELIMINAR', 'cliente'),
+    (r"Registr\S* (?P<horas>[\d.]+) horas en el proyecto '(?P<nombre>.+)'\.", 'HORAS', 'proyecto'),
+    (r"Asign\S* el proyecto '(?P<nombre>.+)' a (?P<empleado>\S+) \(rol: (?P<rol>.+)\)\.", 'ASIGNAR', 'proyecto'),
+    (r"Desasign\S* el proyecto '(?P<nombre>.+)' de (?P<empleado>\S+)\.", 'DESASIGNAR', 'proyecto'),
+    (r"Desactiv\S* al usuario '(?P<nombre>.+)'\.", 'DESACTIVAR', 'user'),
+    (r"Purga en segundo plano del (?P<modelo>proyecto|cliente) '(?P<nombre>.+)' \((?P<detalle>.*)\)\.", 'PURGAR', None),
+]
+PATRONES = [(re.compile(patron), tipo, objeto_tipo) for patron, tipo, objeto_tipo in PATRONES]
+LOTE = 500
+
+
+def interpretar(accion):
+    """Devuelve (tipo, objeto_tipo, datos) para un texto de bitacora, o None si no se reconoce."""
+    # Sin strip(): editar_proyecto escribia ademas "Registro el cliente '<proyecto>'. "
+    # (con espacio final), que no es un alta de cliente y debe quedar como OTRO
+    for patron, tipo, objeto_tipo in PATRONES:
+        coincidencia = patron.fullmatch(accion)
+        if coincidencia:
+            datos = coincidencia.groupdict()
+            return tipo, objeto_tipo or datos.pop('modelo', ''), datos
+    return None
+
+
+def rellenar_eventos(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Actividad = apps.get_model('gestion', 'Actividad')
+    modelos = {
+        'proyecto': (apps.get_model('gestion', 'Proyecto'), 'nombre'),
+        'cliente': (apps.get_model('gestion', 'Cliente'), 'nombre'),
+        'user': (apps.get_model(settings.AUTH_USER_MODEL), 'username'),
+    }
+    ids = {}
+
+    def resolver(objeto_tipo, nombre):
+        # Solo se enlaza si el nombre identifica a un unico objeto (los borrados quedan sin id)
+        if (objeto_tipo, nombre) not in ids:
+            modelo, campo = modelos[objeto_tipo]
+            encontrados = list(modelo._default_manager.using(alias).filter(**{campo: nombre}).values_list('pk', flat=True)[:2])
+            ids[objeto_tipo, nombre] = encontrados[0] if len(encontrados) == 1 else None
+        return ids[objeto_tipo, nombre]
+
+    pendientes = []
+    for actividad in Actividad.objects.using(alias).filter(tipo='OTRO').only('id', 'accion').iterator(chunk_size=LOTE):
+        interpretado = interpretar(actividad.accion)
+        if interpretado is None:
+            continue
+        actividad.tipo, actividad.objeto_tipo, actividad.datos = interpretado
+        if actividad.objeto_tipo:
+            actividad.objeto_id = resolver(actividad.objeto_tipo, actividad.datos['nombre'])
+        pendientes.append(actividad)
+        if len(pendientes) >= LOTE:
+            Actividad.objects.using(alias).bulk_update(pendientes, ['tipo', 'objeto_tipo', 'objeto_id', 'datos'])
+            pendientes = []
+    if pendientes:
+        Actividad.objects.using(alias).bulk_update(pendientes, ['tipo', 'objeto_tipo', 'objeto_id', 'datos'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_eliminacion_en_segundo_plano'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividad',
+            name='datos',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='actividad',
+            name='objeto_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='actividad',
+            name='objeto_tipo',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='actividad',
+            name='tipo',
+            field=models.CharField(choices=[('LOGIN', 'Inicio de sesion'), ('LOGOUT', 'Cierre de sesion'), ('CREAR', 'Alta'), ('EDITAR', 'Edicion'), ('ELIMINAR', 'Eliminacion'), ('HORAS', 'Registro de horas'), ('ASIGNAR', 'Asignacion'), ('DESASIGNAR', 'Desasignacion'), ('DESACTIVAR', 'Desactivacion'), ('PURGAR', 'Purga'), ('OTRO', 'Otro')], default='OTRO', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['usuario', 'fecha'], name='actividad_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['tipo', 'fecha'], name='actividad_tipo_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['objeto_tipo', 'objeto_id', 'fecha'], name='actividad_objeto'),
+        ),
+        migrations.RunPython(rellenar_eventos, migrations.RunPython.noop),
+    ]
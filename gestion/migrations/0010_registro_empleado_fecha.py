@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0009_actividad_estructurada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrohoras',
+            index=models.Index(fields=['empleado', 'fecha'], name='registro_empleado_fecha'),
+        ),
+    ]
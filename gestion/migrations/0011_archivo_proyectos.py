@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0010_registro_empleado_fecha'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='actividad',
+            name='tipo',
+            field=models.CharField(choices=[('LOGIN', 'Inicio de sesion'), ('LOGOUT', 'Cierre de sesion'), ('CREAR', 'Alta'), ('EDITAR', 'Edicion'), ('ELIMINAR', 'Eliminacion'), ('HORAS', 'Registro de horas'), ('ASIGNAR', 'Asignacion'), ('DESASIGNAR', 'Desasignacion'), ('DESACTIVAR', 'Desactivacion'), ('PURGAR', 'Purga'), ('ARCHIVAR', 'Archivo'), ('RESTAURAR', 'Restauracion'), ('OTRO', 'Otro')], default='OTRO', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ArchivoProyecto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_archivo', models.DateTimeField(auto_now_add=True)),
+                ('fecha_desde', models.DateField(blank=True, null=True)),
+                ('fecha_hasta', models.DateField(blank=True, null=True)),
+                ('registros', models.PositiveIntegerField(default=0)),
+                ('horas', models.IntegerField(default=0)),
+                ('asignaciones', models.PositiveIntegerField(default=0)),
+                ('archivado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('proyecto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archivo', to='gestion.proyecto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AsignacionArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('rol_en_proyecto', models.CharField(choices=[('DEV', 'Desarrollador'), ('PM', 'Project Manager'), ('QA', 'QA / Tester'), ('OT', 'Otro')], default='OT', max_length=3)),
+                ('activo', models.BooleanField(default=True)),
+                ('fecha_asignacion', models.DateField()),
+                ('fecha_baja', models.DateField(blank=True, null=True)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asignaciones_archivadas', to='gestion.proyecto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RegistroHorasArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('horas', models.IntegerField()),
+                ('descripcion', models.TextField()),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_archivados', to='gestion.proyecto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='archivo_registro_fecha')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0011_archivo_proyectos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaFeriado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('nombre', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.AddField(
+            model_name='perfilempleado',
+            name='horas_semanales',
+            field=models.PositiveSmallIntegerField(default=40, help_text='Capacidad semanal en horas.'),
+        ),
+    ]
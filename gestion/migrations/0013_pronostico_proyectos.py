@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0012_calendario_laboral'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoProyecto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calculado_en', models.DateTimeField()),
+                ('registradas', models.IntegerField()),
+                ('restantes', models.IntegerField()),
+                ('ritmo_diario', models.FloatField(help_text='Horas por dia ajustadas sobre la ventana reciente.')),
+                ('fecha_agotamiento', models.DateField(blank=True, null=True)),
+                ('riesgo', models.CharField(choices=[('REB', 'Rebasado'), ('ALT', 'Alto'), ('MED', 'Medio'), ('BAJ', 'Bajo')], max_length=3)),
+                ('proyecto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pronostico', to='gestion.proyecto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['riesgo', 'fecha_agotamiento'], name='pronostico_riesgo')],
+            },
+        ),
+    ]
@@ -5,6 +5,16 @@ from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 
 
+# === ELIMINACION EN SEGUNDO PLANO ===
+class VisiblesManager(models.Manager):
+    """
+    Excluye los registros marcados para eliminacion; el comando
+    purgar_eliminados los borra despues en lotes.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(pendiente_eliminacion=False)
+
+
 # === PERFIL DE USUARIO ===
 class Perfil(models.Model):
     """
@@ -48,6 +58,11 @@ class Cliente(models.Model):
         blank=True,
         validators=[RegexValidator(regex=r'^\d{10}$', message='El telefono debe tener 10 digitos.', code='invalid_phone')],
     )
+    pendiente_eliminacion = models.BooleanField(default=False)
+    eliminado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    objects = VisiblesManager()
+    todos = models.Manager()
 
     def __str__(self):
         return self.nombre
@@ -56,7 +71,7 @@ class Cliente(models.Model):
         super().clean()
         rfc_norm = (self.rfc or '').strip().upper()
         if rfc_norm:
-            qs = Cliente.objects.filter(rfc__iexact=rfc_norm)
+            qs = Cliente.todos.filter(rfc__iexact=rfc_norm)
             if self.pk:
                 qs = qs.exclude(pk=self.pk)
             if qs.exists():
@@ -108,12 +123,23 @@ class Proyecto(models.Model):
         blank=True,
         limit_choices_to={'is_staff': False}
     )
+    pendiente_eliminacion = models.BooleanField(default=False)
+    eliminado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    objects = VisiblesManager()
+    todos = models.Manager()
 
     def __str__(self):
         return self.nombre
 
 
 # === REGISTRO DE HORAS ===
+class RegistroHorasManager(models.Manager):
+    """Oculta las horas de proyectos marcados para eliminacion."""
+    def get_queryset(self):
+        return super().get_queryset().filter(proyecto__pendiente_eliminacion=False)
+
+
 class RegistroHoras(models.Model):
     """
     Registra las horas trabajadas por los empleados en proyectos.
@@ -133,18 +159,79 @@ class RegistroHoras(models.Model):
     horas = models.IntegerField()
     descripcion = models.TextField()
 
+    objects = RegistroHorasManager()
+    todos = models.Manager()
+
+    class Meta:
+        indexes = [
+            # mis_horas y los totales por empleado consultan siempre un rango de fechas
+            models.Index(fields=['empleado', 'fecha'], name='registro_empleado_fecha'),
+        ]
+
     def __str__(self):
         return f"{self.empleado.username} - {self.horas}h en {self.proyecto.nombre}"
 
+    def clean(self):
+        super().clean()
+        from .cierres import periodo_cerrado
+        fecha_original = None
+        if self.pk:
+            fecha_original = RegistroHoras.objects.filter(pk=self.pk).values_list('fecha', flat=True).first()
+        if any(f and periodo_cerrado(f) for f in (self.fecha, fecha_original)):
+            raise ValidationError({'fecha': 'El periodo de esta fecha esta cerrado; solicita su reapertura a un administrador.'})
+
 
 # === ACTIVIDAD (BITACORA DE ACCIONES) ===
 class Actividad(models.Model):
     """
     Registra acciones realizadas en el sistema (alta, edicion, eliminacion, etc.).
+    Ademas del texto legible guarda el tipo de accion, el objeto afectado
+    (modelo e id) y los datos del evento, para poder filtrar por indices.
     """
+    TIPO_CHOICES = [
+        ('LOGIN', 'Inicio de sesion'),
+        ('LOGOUT', 'Cierre de sesion'),
+        ('CREAR', 'Alta'),
+        ('EDITAR', 'Edicion'),
+        ('ELIMINAR', 'Eliminacion'),
+        ('HORAS', 'Registro de horas'),
+        ('ASIGNAR', 'Asignacion'),
+        ('DESASIGNAR', 'Desasignacion'),
+        ('DESACTIVAR', 'Desactivacion'),
+        ('PURGAR', 'Purga'),
+        ('ARCHIVAR', 'Archivo'),
+        ('RESTAURAR', 'Restauracion'),
+        ('OTRO', 'Otro'),
+    ]
+
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     accion = models.TextField()
     fecha = models.DateTimeField(auto_now_add=True)
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, default='OTRO')
+    # Objeto afectado: model_name ('cliente', 'proyecto', 'user', ...) e id.
+    # No es FK para conservar el evento aunque el objeto se elimine.
+    objeto_tipo = models.CharField(max_length=30, blank=True, default='')
+    objeto_id = models.PositiveBigIntegerField(null=True, blank=True)
+    datos = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['usuario', 'fecha'], name='actividad_usuario_fecha'),
+            models.Index(fields=['tipo', 'fecha'], name='actividad_tipo_fecha'),
+            models.Index(fields=['objeto_tipo', 'objeto_id', 'fecha'], name='actividad_objeto'),
+        ]
+
+    @classmethod
+    def registrar(cls, usuario, tipo, accion, objeto=None, **datos):
+        """Crea un evento de bitacora; `objeto` es la instancia afectada (si hay)."""
+        return cls.objects.create(
+            usuario=usuario,
+            tipo=tipo,
+            accion=accion,
+            objeto_tipo=objeto._meta.model_name if objeto is not None else '',
+            objeto_id=objeto.pk if objeto is not None else None,
+            datos=datos,
+        )
 
     def __str__(self):
         return f"{self.usuario.username} - {self.accion} ({self.fecha.strftime('%d/%m/%Y %H:%M')})"
@@ -198,6 +285,141 @@ class PerfilEmpleado(models.Model):
     segundo_nombre = models.CharField(max_length=150, blank=True)
     primer_apellido = models.CharField(max_length=150)
     segundo_apellido = models.CharField(max_length=150)
+    # Capacidad para el reporte de utilizacion (se reparte entre los dias laborales)
+    horas_semanales = models.PositiveSmallIntegerField(default=40, help_text='Capacidad semanal en horas.')
+
+    def __str__(self):
+        return f"{self.primer_nombre} {self.primer_apellido}"
+
+
+# === CALENDARIO LABORAL ===
+class DiaFeriado(models.Model):
+    """Dia no laboral: no cuenta en la capacidad del reporte de utilizacion."""
+    fecha = models.DateField(unique=True)
+    nombre = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['fecha']
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} {self.nombre}"
+
+
+# === PRONOSTICO DE PRESUPUESTO (CALCULADO POR LOTE) ===
+class PronosticoProyecto(models.Model):
+    """
+    Ritmo de consumo y fecha estimada de agotamiento del presupuesto de horas
+    de un proyecto activo. Lo recalcula cada noche manage.py pronosticar_presupuestos
+    (gestion/pronosticos.py); las vistas solo lo leen.
+    """
+    RIESGO_CHOICES = [
+        ('REB', 'Rebasado'),
+        ('ALT', 'Alto'),
+        ('MED', 'Medio'),
+        ('BAJ', 'Bajo'),
+    ]
+
+    proyecto = models.OneToOneField(Proyecto, on_delete=models.CASCADE, related_name='pronostico')
+    calculado_en = models.DateTimeField()
+    registradas = models.IntegerField()
+    restantes = models.IntegerField()
+    ritmo_diario = models.FloatField(help_text='Horas por dia ajustadas sobre la ventana reciente.')
+    fecha_agotamiento = models.DateField(null=True, blank=True)
+    riesgo = models.CharField(max_length=3, choices=RIESGO_CHOICES)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['riesgo', 'fecha_agotamiento'], name='pronostico_riesgo'),
+        ]
+
+    def __str__(self):
+        return f"{self.proyecto_id}: {self.get_riesgo_display()} ({self.fecha_agotamiento or 'sin fecha'})"
+
+
+# === CIERRE DE PERIODO (SNAPSHOTS MENSUALES) ===
+class CierrePeriodo(models.Model):
+    """
+    Mes cerrado: sus totales quedan congelados en TotalCerrado y ya no se
+    pueden registrar ni editar horas con fecha dentro del mes.
+    """
+    anio = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    fecha_cierre = models.DateTimeField(auto_now_add=True)
+    cerrado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['anio', 'mes'], name='uq_cierre_por_mes')
+        ]
+        ordering = ['-anio', '-mes']
+
+    def __str__(self):
+        return f"{self.mes:02d}/{self.anio}"
+
+
+class TotalCerrado(models.Model):
+    """
+    Total congelado de un mes cerrado por proyecto y empleado. De aqui se
+    obtienen los totales por proyecto, por empleado y por cliente.
+    """
+    cierre = models.ForeignKey(CierrePeriodo, on_delete=models.CASCADE, related_name='totales')
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='totales_cerrados')
+    empleado = models.ForeignKey(User, on_delete=models.CASCADE, related_name='totales_cerrados')
+    horas = models.IntegerField()
+    num_registros = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.cierre} - {self.proyecto_id}/{self.empleado_id}: {self.horas}h"
+
+
+# === ARCHIVO DE PROYECTOS CERRADOS ===
+class ArchivoProyecto(models.Model):
+    """
+    Resumen que queda en lugar de las horas y asignaciones de un proyecto
+    FIN/CAN movidas a las tablas de archivo (gestion/archivo.py).
+    fecha_desde/fecha_hasta delimitan las horas archivadas: los reportes solo
+    leen el archivo si su rango de fechas llega ahi.
+    """
+    proyecto = models.OneToOneField(Proyecto, on_delete=models.CASCADE, related_name='archivo')
+    fecha_archivo = models.DateTimeField(auto_now_add=True)
+    archivado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    fecha_desde = models.DateField(null=True, blank=True)
+    fecha_hasta = models.DateField(null=True, blank=True)
+    registros = models.PositiveIntegerField(default=0)
+    horas = models.IntegerField(default=0)
+    asignaciones = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.proyecto.nombre}: {self.registros} registros, {self.horas}h archivadas"
+
+
+class RegistroHorasArchivado(models.Model):
+    """Horas de un proyecto archivado; conserva el id original para restaurarlas."""
+    id = models.BigIntegerField(primary_key=True)
+    empleado = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='registros_archivados')
+    fecha = models.DateField()
+    horas = models.IntegerField()
+    descripcion = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha'], name='archivo_registro_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.empleado_id} - {self.horas}h en {self.proyecto_id} (archivado)"
+
+
+class AsignacionArchivada(models.Model):
+    """Asignaciones de un proyecto archivado; conserva el id original para restaurarlas."""
+    id = models.BigIntegerField(primary_key=True)
+    empleado = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='asignaciones_archivadas')
+    rol_en_proyecto = models.CharField(max_length=3, choices=AsignacionProyecto.ROL_CHOICES, default='OT')
+    activo = models.BooleanField(default=True)
+    fecha_asignacion = models.DateField()
+    fecha_baja = models.DateField(blank=True, null=True)
 
     def __str__(self):
-        return f"{self.primer_nombre} {self.primer_apellido}"
\ No newline at end of file
+        return f"{self.empleado_id} -> {self.proyecto_id} (archivada)"
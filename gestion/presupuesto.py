@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from django.db.models import F, Min, Sum, Window
+
+from .referencias import referencias
+
+
+# === ANALISIS DE PRESUPUESTO DE HORAS ===
+def metricas_presupuesto(presupuestadas, registradas):
+    """Restantes, variacion y porcentaje de consumo de un presupuesto de horas."""
+    return {
+        'presupuestadas': presupuestadas,
+        'registradas': registradas,
+        'restantes': presupuestadas - registradas,
+        'variacion': registradas - presupuestadas,
+        'progreso': round(registradas * 100 / presupuestadas, 2) if presupuestadas > 0 else 0,
+    }
+
+
+def analisis_presupuesto(registros):
+    """
+    Calcula, en una sola query con funciones de ventana, el consumo acumulado
+    por proyecto y dia (serie de burn-down) para los registros ya filtrados.
+
+    Devuelve una lista de dicts por proyecto, ordenada por horas registradas:
+    nombre, cliente, presupuestadas, registradas, restantes, variacion,
+    progreso, fecha_agotamiento y serie [(fecha, acumulado), ...].
+    """
+    particion = [F('proyecto_id')]
+    filas = (
+        registros
+        .values('proyecto_id', 'fecha')
+        .annotate(
+            # ORDER BY fecha usa el marco RANGE por defecto: los registros del mismo
+            # dia comparten el acumulado, y DISTINCT deja una fila por dia
+            acumulado=Window(Sum('horas'), partition_by=particion, order_by=F('fecha').asc()),
+            total=Window(Sum('horas'), partition_by=particion),
+            inicio=Window(Min('fecha'), partition_by=particion),
+        )
+        .distinct()
+        .order_by('proyecto_id', 'fecha')
+    )
+
+    # Nombre, cliente y presupuesto desde las referencias en memoria: la query no los lee
+    ref = referencias()
+    proyectos = {}
+    for fila in filas:
+        p = proyectos.get(fila['proyecto_id'])
+        if p is None:
+            datos = ref.proyecto(fila['proyecto_id'])
+            p = proyectos[fila['proyecto_id']] = {
+                'id': fila['proyecto_id'],
+                'nombre': datos['nombre'],
+                'cliente': datos['cliente'],
+                'inicio': fila['inicio'],
+                'fecha_agotamiento': None,
+                'serie': [],
+            }
+            p.update(metricas_presupuesto(datos['cantidad_h'], fila['total'] or 0))
+        p['serie'].append((fila['fecha'], fila['acumulado']))
+        if p['fecha_agotamiento'] is None and fila['acumulado'] >= p['presupuestadas'] > 0:
+            # Ya se consumio el presupuesto: la fecha es el primer dia que se rebaso
+            p['fecha_agotamiento'] = fila['fecha']
+
+    for p in proyectos.values():
+        if p['fecha_agotamiento'] is None:
+            p['fecha_agotamiento'] = _proyectar_agotamiento(p)
+
+    return sorted(proyectos.values(), key=lambda p: p['registradas'], reverse=True)
+
+
+def _proyectar_agotamiento(p):
+    """Extrapola linealmente el ritmo de consumo promedio hasta agotar el presupuesto."""
+    if p['presupuestadas'] <= 0 or not p['serie']:
+        return None
+    ultimo = p['serie'][-1][0]
+    dias = (ultimo - p['inicio']).days + 1
+    ritmo = p['registradas'] / dias
+    if ritmo <= 0:
+        return None
+    return ultimo + datetime.timedelta(days=int(p['restantes'] / ritmo))
+
+
+def reducir_serie(serie, puntos):
+    """
+    Reduce una serie a lo mas `puntos` elementos tomando muestras equidistantes.
+    Conserva siempre el primer y el ultimo punto.
+    """
+    if puntos < 2 or len(serie) <= puntos:
+        return list(serie)
+    n = len(serie)
+    indices = sorted({round(i * (n - 1) / (puntos - 1)) for i in range(puntos)})
+    return [serie[i] for i in indices]
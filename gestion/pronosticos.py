@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Pronostico por lote del agotamiento del presupuesto de horas (cantidad_h) de
+todos los proyectos activos, para ejecutarse cada noche (manage.py
+pronosticar_presupuestos). El resultado se guarda en PronosticoProyecto y
+lista_proyectos / admin_home solo lo leen.
+
+El ritmo de cada proyecto es la pendiente de una recta ajustada por minimos
+cuadrados a sus horas acumuladas dia por dia en la ventana reciente
+(PRONOSTICO_VENTANA_DIAS). Las sumas que necesita el ajuste son lineales en las
+horas de cada dia, asi que todos los proyectos se ajustan a la vez en una sola
+pasada sobre las horas agregadas por (proyecto, dia), sin recorrer dias vacios
+ni consultar proyecto por proyecto: dos queries en total.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import PronosticoProyecto, Proyecto, RegistroHoras
+
+
+def _ritmos(inicios, fin):
+    """
+    {proyecto_id: horas por dia} ajustando C(d) = a + b*d sobre los dias
+    inicio..fin de cada proyecto, donde C(d) son las horas acumuladas en la ventana.
+    Unas horas h registradas el dia t suman h*(n - t) a sum C(d) y
+    h*(sum de d para d >= t) a sum d*C(d).
+    """
+    filas = (
+        RegistroHoras.objects.filter(proyecto_id__in=inicios, fecha__range=(min(inicios.values()), fin))
+        .values('proyecto_id', 'fecha')
+        .annotate(horas=Sum('horas'))
+        .order_by()
+    )
+    dias = {pid: (fin - inicio).days + 1 for pid, inicio in inicios.items()}
+    suma_c = dict.fromkeys(inicios, 0)
+    suma_dc = dict.fromkeys(inicios, 0)
+    for fila in filas:
+        pid = fila['proyecto_id']
+        t = (fila['fecha'] - inicios[pid]).days
+        if t < 0:
+            continue
+        n = dias[pid]
+        suma_c[pid] += fila['horas'] * (n - t)
+        suma_dc[pid] += fila['horas'] * (n * (n - 1) - t * (t - 1)) // 2
+
+    ritmos = {}
+    for pid, n in dias.items():
+        if n < 2:
+            ritmos[pid] = 0.0
+            continue
+        suma_d = n * (n - 1) / 2
+        suma_dd = (n - 1) * n * (2 * n - 1) / 6
+        ritmos[pid] = max((n * suma_dc[pid] - suma_d * suma_c[pid]) / (n * suma_dd - suma_d ** 2), 0.0)
+    return ritmos
+
+
+def _riesgo(restantes, fecha_agotamiento, fecha_final, hoy):
+    if restantes <= 0:
+        return 'REB'
+    if fecha_agotamiento is None:
+        return 'BAJ'
+    # Se acabaria el presupuesto antes de la fecha de entrega
+    if fecha_final and fecha_final >= hoy and fecha_agotamiento < fecha_final:
+        return 'ALT'
+    faltan = (fecha_agotamiento - hoy).days
+    if faltan <= settings.PRONOSTICO_RIESGO_ALTO_DIAS:
+        return 'ALT'
+    if faltan <= settings.PRONOSTICO_RIESGO_MEDIO_DIAS:
+        return 'MED'
+    return 'BAJ'
+
+
+def calcular_pronosticos(hoy=None):
+    """PronosticoProyecto (sin guardar) para cada proyecto activo, calculados con datos hasta ayer."""
+    hoy = hoy or timezone.localdate()
+    # El dia en curso queda fuera: sus horas aun no estan completas
+    fin = hoy - datetime.timedelta(days=1)
+    inicio_ventana = hoy - datetime.timedelta(days=settings.PRONOSTICO_VENTANA_DIAS)
+
+    proyectos = list(
+        Proyecto.objects.filter(situacion='ACT')
+        .annotate(registradas=Sum('registros_horas__horas'))
+        .values('id', 'cantidad_h', 'fecha_inicial', 'fecha_final', 'registradas')
+    )
+    if not proyectos:
+        return []
+    inicios = {p['id']: max(p['fecha_inicial'], inicio_ventana) for p in proyectos}
+    ritmos = _ritmos(inicios, fin)
+
+    ahora = timezone.now()
+    pronosticos = []
+    for p in proyectos:
+        registradas = p['registradas'] or 0
+        restantes = p['cantidad_h'] - registradas
+        ritmo = ritmos[p['id']]
+        fecha_agotamiento = None
+        # Con un ritmo casi nulo la fecha quedaria a siglos (o fuera de rango de date)
+        if restantes > 0 and ritmo > 0 and restantes / ritmo <= settings.PRONOSTICO_HORIZONTE_DIAS:
+            fecha_agotamiento = hoy + datetime.timedelta(days=int(restantes / ritmo))
+        pronosticos.append(PronosticoProyecto(
+            proyecto_id=p['id'], calculado_en=ahora, registradas=registradas, restantes=restantes,
+            ritmo_diario=round(ritmo, 2), fecha_agotamiento=fecha_agotamiento,
+            riesgo=_riesgo(restantes, fecha_agotamiento, p['fecha_final'], hoy),
+        ))
+    return pronosticos
+
+
+@transaction.atomic
+def actualizar_pronosticos(hoy=None):
+    """
+    Recalcula y guarda los pronosticos de todos los proyectos activos y descarta
+    los de proyectos que dejaron de estarlo. Devuelve los pronosticos guardados.
+    """
+    pronosticos = calcular_pronosticos(hoy)
+    PronosticoProyecto.objects.exclude(proyecto_id__in=[p.proyecto_id for p in pronosticos]).delete()
+    PronosticoProyecto.objects.bulk_create(
+        pronosticos, update_conflicts=True, unique_fields=['proyecto'],
+        update_fields=['calculado_en', 'registradas', 'restantes', 'ritmo_diario', 'fecha_agotamiento', 'riesgo'],
+    )
+    return pronosticos
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Datos de referencia en memoria del proceso: nombre de cada empleado, nombre,
+presupuesto y cliente de cada proyecto y nombre de cada cliente.
+
+Las exportaciones y las tablas de resumen leen de RegistroHoras solo las
+columnas *_id y resuelven los nombres aqui, sin JOIN a clientes ni usuarios ni
+instanciar modelos por fila (RegistroHoras.objects si une gestion_proyecto, para
+ocultar los proyectos pendientes de eliminacion). Cada worker carga el diccionario una vez (tres queries) y lo recarga
+cuando cambia la version de los ambitos 'usuarios' o 'proyectos' (la misma que
+invalida los fragmentos cacheados, ver cache.version_datos).
+"""
+
+import threading
+
+from django.contrib.auth.models import User
+
+from .cache import version_datos
+from .models import Cliente, Proyecto
+
+
+AMBITOS_REFERENCIAS = ('usuarios', 'proyectos')
+
+_cargadas = None  # (version, Referencias)
+_candado = threading.Lock()
+
+
+class Referencias:
+    """Diccionarios de una carga; empleado()/proyecto() resuelven un id."""
+
+    VACIO_EMPLEADO = {'nombre': '', 'username': '', 'first_name': '', 'last_name': ''}
+    VACIO_PROYECTO = {'nombre': '', 'cantidad_h': 0, 'cliente_id': None, 'cliente': ''}
+
+    def __init__(self, empleados, proyectos, clientes):
+        self.empleados = empleados
+        self.proyectos = proyectos
+        self.clientes = clientes
+        self.recargada = False
+
+    def _buscar(self, tabla, pk, vacio):
+        datos = getattr(self, tabla)
+        encontrado = datos.get(pk)
+        if encontrado is None and pk is not None and not self.recargada and pk > max(datos, default=0):
+            # Creado despues de esta carga y antes de que cambiara la version
+            # (un id menor que el maximo cargado es de un registro borrado: no se recarga).
+            # Se recarga una sola vez: los siguientes faltantes ya se buscan en la carga nueva
+            nuevas = referencias(recargar=True)
+            self.empleados, self.proyectos, self.clientes = nuevas.empleados, nuevas.proyectos, nuevas.clientes
+            self.recargada = True
+            encontrado = getattr(self, tabla).get(pk)
+        return encontrado or vacio
+
+    def empleado(self, empleado_id):
+        """{'nombre' (nombre completo o username), 'username', 'first_name', 'last_name'} del usuario."""
+        return self._buscar('empleados', empleado_id, self.VACIO_EMPLEADO)
+
+    def proyecto(self, proyecto_id):
+        """{'nombre', 'cantidad_h', 'cliente_id', 'cliente'} del proyecto."""
+        return self._buscar('proyectos', proyecto_id, self.VACIO_PROYECTO)
+
+
+def _cargar():
+    clientes = dict(Cliente.todos.values_list('id', 'nombre'))
+    empleados = {}
+    for pk, username, first_name, last_name in User.objects.values_list('id', 'username', 'first_name', 'last_name'):
+        empleados[pk] = {
+            'nombre': f'{first_name} {last_name}'.strip() or username,
+            'username': username, 'first_name': first_name, 'last_name': last_name,
+        }
+    proyectos = {}
+    for pk, nombre, cantidad_h, cliente_id in Proyecto.todos.values_list('id', 'nombre', 'cantidad_h', 'cliente_id'):
+        proyectos[pk] = {
+            'nombre': nombre, 'cantidad_h': cantidad_h, 'cliente_id': cliente_id, 'cliente': clientes.get(cliente_id, ''),
+        }
+    return Referencias(empleados, proyectos, clientes)
+
+
+def referencias(recargar=False):
+    """
+    Referencias vigentes para este proceso; consulta la version en el cache una
+    vez por llamada, asi que se pide una vez por reporte y no por fila.
+    recargar=True vuelve a leerlas aunque la version no haya cambiado.
+    """
+    global _cargadas
+    version = version_datos(*AMBITOS_REFERENCIAS)
+    cargadas = _cargadas
+    if recargar or cargadas is None or cargadas[0] != version:
+        with _candado:
+            # Si otro hilo las recargo mientras se esperaba el candado, se usan esas
+            if _cargadas is cargadas:
+                _cargadas = (version, _cargar())
+            cargadas = _cargadas
+    return cargadas[1]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Cambia la version de datos de cada ambito (gestion/cache.py) cuando se guardan o
+borran sus modelos, desde vistas, admin o shell. Las escrituras masivas que no
+emiten senales (update, bulk_create, SQL directo) llaman a cambiar_version().
+
+Las asignaciones activas por empleado no usan la version en su clave: se
+descartan aqui las del empleado (o las de los empleados del proyecto) al
+confirmar la transaccion, para que un cambio hecho desde el admin no deje
+autorizado un proyecto durante ASIGNACIONES_TIMEOUT.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .cache import cambiar_version, invalidar_asignaciones, invalidar_asignaciones_proyecto
+from .models import (
+    AsignacionProyecto, CierrePeriodo, Cliente, DiaFeriado, PerfilEmpleado, Proyecto,
+    RegistroHoras, TotalCerrado,
+)
+
+
+AMBITOS_POR_MODELO = {
+    RegistroHoras: ('registros',),
+    Proyecto: ('proyectos',),
+    Cliente: ('proyectos',),
+    AsignacionProyecto: ('asignaciones',),
+    CierrePeriodo: ('cierres',),
+    TotalCerrado: ('cierres',),
+    User: ('usuarios',),
+    PerfilEmpleado: ('usuarios',),
+    DiaFeriado: ('calendario',),
+}
+
+
+def _cambiar_version(sender, update_fields=None, **kwargs):
+    # El login solo actualiza last_login: no afecta nada de lo que se muestra
+    if sender is User and update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    cambiar_version(*AMBITOS_POR_MODELO[sender])
+
+
+def _invalidar_asignacion(sender, instance, **kwargs):
+    empleado_id = instance.empleado_id
+    transaction.on_commit(lambda: invalidar_asignaciones(empleado_id))
+
+
+def _invalidar_asignaciones_proyecto(sender, instance, **kwargs):
+    # Al borrar el proyecto sus asignaciones se borran en cascada y emiten su propia senal
+    proyecto_id = instance.pk
+    transaction.on_commit(lambda: invalidar_asignaciones_proyecto(proyecto_id))
+
+
+def conectar():
+    for modelo in AMBITOS_POR_MODELO:
+        post_save.connect(_cambiar_version, sender=modelo, dispatch_uid=f'version_datos_save_{modelo.__name__}')
+        post_delete.connect(_cambiar_version, sender=modelo, dispatch_uid=f'version_datos_delete_{modelo.__name__}')
+    post_save.connect(_invalidar_asignacion, sender=AsignacionProyecto, dispatch_uid='asignaciones_save')
+    post_delete.connect(_invalidar_asignacion, sender=AsignacionProyecto, dispatch_uid='asignaciones_delete')
+    post_save.connect(_invalidar_asignaciones_proyecto, sender=Proyecto, dispatch_uid='asignaciones_proyecto_save')
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Perfil de SQLite para produccion (sucursales que corren sin DATABASE_URL).
+
+Con el journal por defecto un escritor bloquea a todos los lectores y los
+requests concurrentes de registrar_horas fallan con "database is locked".
+En cada conexion nueva se aplica:
+
+  journal_mode=WAL      lectores y un escritor a la vez; los lectores no esperan
+  synchronous=NORMAL    con WAL no se pierde consistencia, solo la ultima
+                        transaccion ante un corte de energia
+  busy_timeout          espera el candado en lugar de fallar de inmediato
+  mmap_size, cache_size lecturas desde memoria
+  temp_store=MEMORY     ordenamientos y tablas temporales en memoria
+
+Las transacciones (atomic) empiezan con BEGIN IMMEDIATE (OPTIONS de DATABASES
+en settings): el candado de escritura se pide al inicio, donde busy_timeout
+puede esperarlo. Con BEGIN DEFERRED una transaccion que lee y luego escribe
+falla sin esperar si otro escritor se adelanta.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def aplicar_perfil(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, valor in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {valor}')
+
+
+def conectar():
+    if getattr(settings, 'SQLITE_PERFIL', False):
+        connection_created.connect(aplicar_perfil, dispatch_uid='gestion_sqlite_perfil')
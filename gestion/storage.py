@@ -0,0 +1,21 @@
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class ZopfliCompressor(Compressor):
+    """Usa zopfli para los .gz: mas lento en collectstatic, pero ~5% mas pequenos."""
+
+    @staticmethod
+    def compress_gzip(data):
+        try:
+            import zopfli.gzip
+        except ImportError:
+            return Compressor.compress_gzip(data)
+        return zopfli.gzip.compress(data)
+
+
+class EstaticosComprimidosStorage(CompressedManifestStaticFilesStorage):
+    """Archivos estaticos con hash en el nombre y precomprimidos en Brotli y gzip (zopfli)."""
+
+    def create_compressor(self, **kwargs):
+        return ZopfliCompressor(**kwargs)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Render en streaming de paginas con tablas de detalle muy grandes.
+
+La pagina se renderiza una vez con un marcador en el lugar de las filas de detalle;
+lo anterior al marcador (encabezado, filtros, resumenes) se envia de inmediato y
+las filas se renderizan por lotes desde un iterador del servidor. Asi el tiempo al
+primer byte no depende del numero de filas y la memoria se mantiene plana.
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+
+MARCADOR_FILAS = mark_safe('<!-- filas-en-streaming -->')
+
+
+def _lotes(filas, tamano):
+    filas = iter(filas)
+    while lote := list(islice(filas, tamano)):
+        yield lote
+
+
+def render_streaming(request, plantilla, contexto, filas, plantilla_filas):
+    """
+    Como render(), pero `filas` (un iterador) se renderiza por lotes con
+    `plantilla_filas` donde `plantilla` muestra {{ marcador_filas }}.
+    `plantilla_filas` recibe `filas` y debe mostrar su estado vacio con {% empty %}.
+    """
+    # El encabezado se renderiza antes de devolver la respuesta: asi el token CSRF
+    # queda registrado y CsrfViewMiddleware envia la cookie
+    html = render_to_string(plantilla, {**contexto, 'marcador_filas': MARCADOR_FILAS}, request)
+    inicio, fin = html.split(MARCADOR_FILAS, 1)
+    plantilla_filas = get_template(plantilla_filas)
+
+    def _contenido():
+        yield inicio
+        hubo_filas = False
+        for lote in _lotes(filas, settings.STREAMING_FILAS_POR_LOTE):
+            hubo_filas = True
+            yield plantilla_filas.render({'filas': lote})
+        if not hubo_filas:
+            yield plantilla_filas.render({'filas': []})
+        yield fin
+
+    return StreamingHttpResponse(_contenido(), content_type='text/html; charset=utf-8')
@@ -1,3 +1,767 @@
-from django.test import TestCase
+import datetime
+import io
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .acceso import Bloqueado, tomar_intento
+from .admin import ConteoEstimadoPaginator
+from .admision import Saturado, admitir, configuracion
+from .archivo import archivar_proyecto, restaurar_proyecto
+from .asignaciones import asignar_en_bloque, desasignar_en_bloque, mover_en_bloque
+from .calendario import leer_mes
+from .cierres import cerrar_periodo, totales_combinados
+from .coalescencia import calcular_una_vez
+from .comparacion import comparar_periodos, periodo_de_referencia
+from .eliminacion import marcar_cliente, marcar_proyectos, purgar_pendientes
+from .forms import RegistroHorasForm, ReporteFiltroForm
+from .management.commands import recortar_css
+from .models import (
+    Actividad, ArchivoProyecto, AsignacionArchivada, AsignacionProyecto, CierrePeriodo, Cliente,
+    PronosticoProyecto, Proyecto, RegistroHoras, RegistroHorasArchivado, TotalCerrado,
+)
+from .pronosticos import _riesgo, _ritmos, calcular_pronosticos
+from .referencias import Referencias
+from . import calentamiento, referencias, transferencia
+
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def en_paralelo(funcion, concurrentes):
+    """Ejecuta funcion() en N hilos que arrancan a la vez; devuelve sus resultados."""
+    barrera = threading.Barrier(concurrentes)
+    resultados, errores = [], []
+
+    def _hilo():
+        barrera.wait()
+        try:
+            resultados.append(funcion())
+        except Exception as error:
+            errores.append(error)
+        finally:
+            # Cada hilo abre su propia conexion a la base de datos
+            connections.close_all()
+
+    hilos = [threading.Thread(target=_hilo) for _ in range(concurrentes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados, errores
+
+
+@override_settings(CACHES=CACHE_LOCAL, COALESCENCIA_ESPERA=5)
+class CoalescenciaTests(SimpleTestCase):
+    CONCURRENTES = 8
+
+    def setUp(self):
+        cache.clear()
+
+    def _en_paralelo(self, funcion):
+        return en_paralelo(funcion, self.CONCURRENTES)
+
+    def test_requests_identicos_concurrentes_calculan_una_vez(self):
+        calculos = []
+
+        def calcular():
+            calculos.append(1)
+            time.sleep(0.3)
+            return {'proyectos': [{'nombre': 'P1', 'registradas': 120}]}
+
+        resultados, errores = self._en_paralelo(lambda: calcular_una_vez('reportes:pdf|v1|cliente=1', calcular))
+
+        self.assertEqual(errores, [])
+        self.assertEqual(len(calculos), 1)
+        self.assertEqual(len(resultados), self.CONCURRENTES)
+        self.assertTrue(all(r == resultados[0] for r in resultados))
+
+    def test_si_quien_calcula_falla_otro_toma_el_relevo(self):
+        calculos = []
+
+        def calcular():
+            calculos.append(1)
+            time.sleep(0.1)
+            if len(calculos) == 1:
+                raise RuntimeError('fallo del primer calculo')
+            return 'ok'
+
+        resultados, errores = self._en_paralelo(lambda: calcular_una_vez('reportes:excel|v1|', calcular))
+
+        self.assertEqual(len(errores), 1)
+        self.assertEqual(resultados, ['ok'] * (self.CONCURRENTES - 1))
+        self.assertEqual(len(calculos), 2)
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL, COALESCENCIA_ESPERA=5, STREAMING_REPORTES=False,
+    ADMISION_WORKERS=4, ADMISION_RESERVADOS_INTERACTIVOS=0,
+)
+class ReportesConcurrentesTests(TransactionTestCase):
+    """Exportaciones identicas y simultaneas a traves de la vista: un solo PDF y un solo agregado."""
+
+    CONCURRENTES = 6
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        empleado = User.objects.create_user('emp', password='x')
+        cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+        proyecto = Proyecto.objects.create(
+            nombre='P', fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=100, cliente=cliente,
+        )
+        RegistroHoras.objects.create(
+            empleado=empleado, proyecto=proyecto, fecha=datetime.date(2025, 1, 6), horas=5, descripcion='x',
+        )
+
+    def test_exportar_pdf_concurrente_genera_una_vez(self):
+        from . import views
+
+        pdfs = []
+
+        def exportar_pdf(contexto):
+            pdfs.append(1)
+            proyectos = list(contexto['reporte_proyectos'])
+            time.sleep(0.3)
+            return HttpResponse(f"%PDF {proyectos[0]['registradas']}", content_type='application/pdf')
+
+        def pedir():
+            request = RequestFactory().get('/reportes/', {'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-01-31', 'exportar': 'pdf'})
+            request.user = self.admin
+            return views.reportes(request)
+
+        with mock.patch.object(views.exportadores, 'exportar_pdf', exportar_pdf), \
+                mock.patch.object(views, 'totales_combinados', wraps=views.totales_combinados) as totales:
+            respuestas, errores = en_paralelo(pedir, self.CONCURRENTES)
+
+        self.assertEqual(errores, [])
+        self.assertEqual([r.status_code for r in respuestas], [200] * self.CONCURRENTES)
+        self.assertEqual({r.content for r in respuestas}, {b'%PDF 5'})
+        self.assertEqual(len(pdfs), 1)
+        self.assertEqual(totales.call_count, 1)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AdminChangelistTests(TestCase):
+    """Los changelists de tablas grandes hacen un numero fijo de queries, sin importar las filas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.empleado = User.objects.create_user('emp', password='x')
+        cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+        cls.proyecto = Proyecto.objects.create(
+            nombre='Proyecto', fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=100, cliente=cliente,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _crear_filas(self, cantidad):
+        RegistroHoras.objects.bulk_create([
+            RegistroHoras(empleado=self.empleado, proyecto=self.proyecto,
+                          fecha=datetime.date(2025, 1, 1) + datetime.timedelta(days=i), horas=1, descripcion='x')
+            for i in range(cantidad)
+        ])
+        Actividad.objects.bulk_create([
+            Actividad(usuario=self.empleado, tipo='HORAS', accion='x', objeto_tipo='proyecto', objeto_id=self.proyecto.id)
+            for _ in range(cantidad)
+        ])
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def test_changelists_sin_queries_por_fila(self):
+        for url in ('/admin/gestion/registrohoras/', '/admin/gestion/actividad/'):
+            with self.subTest(url=url):
+                self._crear_filas(5)
+                pocas = self._queries(url)
+                self._crear_filas(60)
+                muchas = self._queries(url)
+                self.assertEqual(pocas, muchas)
+
+    def test_changelist_registros_numero_de_queries(self):
+        self._crear_filas(30)
+        # sesion, usuario, conteo paginado, filas, fechas del date_hierarchy (min/max y anios);
+        # los filtros por proyecto y empleado no cargan opciones
+        with self.assertNumQueries(6):
+            self.client.get('/admin/gestion/registrohoras/')
+
+    def test_filtros_por_id(self):
+        self._crear_filas(3)
+        otro = User.objects.create_user('otro', password='x')
+        RegistroHoras.objects.create(
+            empleado=otro, proyecto=self.proyecto, fecha=datetime.date(2025, 2, 1), horas=2, descripcion='x',
+        )
+        url = '/admin/gestion/registrohoras/'
+
+        response = self.client.get(url, {'empleado': otro.id, 'proyecto': self.proyecto.id})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, 'otro')
+        self.assertEqual(self.client.get(url, {'empleado': self.empleado.id}).context['cl'].result_count, 3)
+        self.assertRedirects(self.client.get(url, {'empleado': 'x'}), f'{url}?e=1', fetch_redirect_response=False)
+
+    def test_changelist_actividad_numero_de_queries(self):
+        self._crear_filas(30)
+        # sesion, usuario, conteo paginado, filas, fechas del date_hierarchy (min/max y dias),
+        # opciones del filtro por objeto_tipo
+        with self.assertNumQueries(7):
+            self.client.get('/admin/gestion/actividad/')
+
+    def test_paginador_cuenta_exacto_fuera_de_postgresql(self):
+        self._crear_filas(3)
+        paginador = ConteoEstimadoPaginator(RegistroHoras.objects.order_by('id'), 25, estimable=True)
+        self.assertEqual(paginador.count, 3)
+
+
+class PurgaTests(TestCase):
+    """purgar_pendientes() borra el proyecto con todas sus dependencias, incluidas las OneToOne."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.empleado = User.objects.create_user('emp', password='x')
+        self.cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+
+    def _proyecto_con_dependientes(self, nombre):
+        proyecto = Proyecto.objects.create(
+            nombre=nombre, fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=100, cliente=self.cliente,
+        )
+        proyecto.administradores.add(self.admin)
+        AsignacionProyecto.objects.create(empleado=self.empleado, proyecto=proyecto)
+        RegistroHoras.objects.create(
+            empleado=self.empleado, proyecto=proyecto, fecha=datetime.date(2025, 1, 2), horas=4, descripcion='x',
+        )
+        cierre, _ = CierrePeriodo.objects.get_or_create(anio=2024, mes=12)
+        TotalCerrado.objects.create(cierre=cierre, proyecto=proyecto, empleado=self.empleado, horas=8, num_registros=2)
+        PronosticoProyecto.objects.create(
+            proyecto=proyecto, calculado_en=timezone.now(), registradas=4, restantes=96, ritmo_diario=0.5, riesgo='BAJ',
+        )
+        ArchivoProyecto.objects.create(proyecto=proyecto, registros=1, horas=2, asignaciones=1)
+        RegistroHorasArchivado.objects.create(
+            id=10_000 + proyecto.id, empleado=self.empleado, proyecto=proyecto,
+            fecha=datetime.date(2024, 1, 2), horas=2, descripcion='x',
+        )
+        AsignacionArchivada.objects.create(
+            id=10_000 + proyecto.id, empleado=self.empleado, proyecto=proyecto, fecha_asignacion=datetime.date(2024, 1, 1),
+        )
+        return proyecto
+
+    def _assert_sin_rastro(self, proyecto_ids):
+        for manager in (
+            AsignacionProyecto.objects, RegistroHoras.todos, TotalCerrado.objects, PronosticoProyecto.objects,
+            ArchivoProyecto.objects, RegistroHorasArchivado.objects, AsignacionArchivada.objects,
+            Proyecto.administradores.through.objects,
+        ):
+            with self.subTest(modelo=manager.model.__name__):
+                self.assertFalse(manager.filter(proyecto_id__in=proyecto_ids).exists())
+        self.assertFalse(Proyecto.todos.filter(id__in=proyecto_ids).exists())
+        # Las FK de SQLite son diferidas: sin esto una fila huerfana solo fallaria al hacer commit
+        connection.check_constraints()
+
+    def test_purga_proyecto_con_cada_tipo_de_dependiente(self):
+        proyecto = self._proyecto_con_dependientes('Proyecto')
+        marcar_proyectos(Proyecto.objects.filter(id=proyecto.id), self.admin)
+
+        purgar_pendientes(lote=1)
+
+        self._assert_sin_rastro([proyecto.id])
+        self.assertTrue(Cliente.objects.filter(id=self.cliente.id).exists())
+
+    def test_purga_cliente_con_proyectos_dependientes(self):
+        ids = [self._proyecto_con_dependientes(f'Proyecto {i}').id for i in range(2)]
+        marcar_cliente(self.cliente, self.admin)
+
+        purgar_pendientes()
+
+        self._assert_sin_rastro(ids)
+        self.assertFalse(Cliente.todos.filter(id=self.cliente.id).exists())
+
+
+class ReportesAccesoTests(TestCase):
+    def test_reportes_solo_para_administradores(self):
+        User.objects.create_user('emp', password='x')
+        respuesta = self.client.get('/reportes/?exportar=excel')
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertIn('/login/', respuesta['Location'])
+
+        self.client.login(username='emp', password='x')
+        respuesta = self.client.get('/reportes/?exportar=excel')
+        self.assertRedirects(respuesta, '/empleado-home/', fetch_redirect_response=False)
+
+
+class CssRecortadoTests(SimpleTestCase):
+    def test_css_recortado_al_dia_con_las_plantillas(self):
+        # base.html lo sirve tal cual con DEBUG: si falla, ejecutar manage.py recortar_css
+        esperado = recortar_css.recortar(recortar_css.ORIGEN.read_text(encoding='utf-8'), recortar_css.clases_usadas())
+        self.assertEqual(recortar_css.DESTINO.read_text(encoding='utf-8'), esperado + '\n')
+
+
+class PlantillasFilasTests(SimpleTestCase):
+    def test_plantillas_de_filas_muestran_estado_vacio(self):
+        # render_streaming() renderiza la plantilla de filas con filas=[] cuando no hay ninguna
+        for ruta in sorted(calentamiento.DIRECTORIO_PLANTILLAS.rglob('*_filas.html')):
+            with self.subTest(plantilla=ruta.name):
+                html = render_to_string(f'gestion/{ruta.name}', {'filas': []})
+                self.assertIn('<td colspan=', html)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ReferenciasTests(TestCase):
+    def test_faltante_recarga_una_sola_vez(self):
+        cache.clear()
+        User.objects.create_user('antes', password='x')
+        ref = referencias.referencias()
+        # bulk_create no dispara senales: la version no cambia
+        User.objects.bulk_create([User(username='despues', first_name='Ana')])
+        nuevo = User.objects.get(username='despues')
+
+        with mock.patch.object(referencias, '_cargar', wraps=referencias._cargar) as cargar:
+            self.assertEqual(ref.empleado(nuevo.id)['nombre'], 'Ana')
+            self.assertEqual(ref.empleado(nuevo.id + 100), Referencias.VACIO_EMPLEADO)
+            self.assertEqual(ref.proyecto(10 ** 6), Referencias.VACIO_PROYECTO)
+            self.assertEqual(ref.empleado(nuevo.id)['username'], 'despues')
+
+        self.assertEqual(cargar.call_count, 1)
+
+
+class LeerMesTests(SimpleTestCase):
+    def test_meses_invalidos_o_extremos_usan_el_mes_actual(self):
+        hoy = datetime.date(2025, 6, 15)
+        self.assertEqual(leer_mes('2025-02', hoy), (2025, 2))
+        for valor in (None, '', '2025', '2025-13', 'abc-01', '0001-01', '9999-12', '9999-01'):
+            with self.subTest(valor=valor):
+                self.assertEqual(leer_mes(valor, hoy), (2025, 6))
+
+
+class ReporteFiltroFormTests(TestCase):
+    def test_comparar_sin_periodo_de_referencia_es_error_del_formulario(self):
+        for inicio, fin, modo in (
+            ('0001-01-01', '0001-01-31', 'anterior'),
+            ('0001-01-03', '0001-01-05', 'anterior'),
+            ('0001-03-03', '0001-03-05', 'anio'),
+        ):
+            with self.subTest(inicio=inicio, modo=modo):
+                form = ReporteFiltroForm({'fecha_inicio': inicio, 'fecha_fin': fin, 'comparar': modo})
+                self.assertFalse(form.is_valid())
+                self.assertIn('comparar', form.errors)
+        form = ReporteFiltroForm({'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-01-31', 'comparar': 'anterior'})
+        self.assertTrue(form.is_valid())
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL, LOGIN_LIMITAR=True, LOGIN_PROXIES=0,
+    LOGIN_LIMITES={'usuario': {'capacidad': 2, 'por_minuto': 1}, 'ip': {'capacidad': 100, 'por_minuto': 10}},
+)
+class LimiteLoginTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/login/', REMOTE_ADDR='198.51.100.7')
+
+    def test_nombre_arbitrario_no_genera_claves_invalidas(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            tomar_intento(self.request, 'nombre con espacios\x00\n' + 'x' * 300)
+
+    def test_nombres_equivalentes_comparten_cubeta(self):
+        tomar_intento(self.request, 'Ana')
+        tomar_intento(self.request, ' ana ')
+        with self.assertRaises(Bloqueado) as contexto:
+            tomar_intento(self.request, 'ANA')
+        self.assertEqual(contexto.exception.cubeta, 'usuario')
+
+
+class WarmupTests(SimpleTestCase):
+    def _warmup(self, **fallas):
+        def fase(nombre):
+            def ejecutar():
+                if nombre in fallas:
+                    raise RuntimeError(fallas[nombre])
+                return 'ok'
+            return ejecutar
+
+        salida, errores = io.StringIO(), io.StringIO()
+        funciones = {nombre: fase(nombre) for nombre in calentamiento.FASES}
+        with mock.patch.dict(calentamiento._FUNCIONES, funciones):
+            call_command('warmup', stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_fase_fallida_no_detiene_el_despliegue(self):
+        salida, errores = self._warmup(reportes='sin datos')
+        self.assertIn('reportes', errores)
+        self.assertIn('sin datos', errores)
+        self.assertIn('Calentamiento incompleto, fallaron: reportes.', salida)
+
+    def test_base_datos_es_fatal(self):
+        with self.assertRaisesMessage(CommandError, 'base_datos'):
+            self._warmup(base_datos='sin conexion')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AsignacionesCacheTests(TestCase):
+    """Las asignaciones cacheadas se descartan tambien cuando se editan desde el admin."""
+
+    def setUp(self):
+        cache.clear()
+        self.empleado = User.objects.create_user('emp', password='x')
+        cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Proyecto', fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=100, cliente=cliente,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.asignacion = AsignacionProyecto.objects.create(empleado=self.empleado, proyecto=self.proyecto)
+
+    def _form(self):
+        datos = {'proyecto': self.proyecto.id, 'fecha': '2025-02-03', 'horas': 4, 'descripcion': 'x'}
+        return RegistroHorasForm(datos, user=self.empleado)
+
+    def test_desactivar_asignacion_con_save_descarta_el_cache(self):
+        self.assertTrue(self._form().is_valid())  # llena el cache
+        self.asignacion.activo = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.asignacion.save()
+        self.assertIn('proyecto', self._form().errors)
+
+    def test_pausar_proyecto_con_save_descarta_el_cache(self):
+        self.assertTrue(self._form().is_valid())
+        self.proyecto.situacion = 'PAU'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.proyecto.save()
+        self.assertIn('proyecto', self._form().errors)
+
+
+class PronosticosTests(TestCase):
+    HOY = datetime.date(2025, 6, 30)
+
+    def setUp(self):
+        self.empleado = User.objects.create_user('emp', password='x')
+        self.cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+
+    def _proyecto(self, cantidad_h, **extra):
+        return Proyecto.objects.create(
+            nombre='Proyecto', fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=cantidad_h,
+            cliente=self.cliente, **extra,
+        )
+
+    def _horas(self, proyecto, fecha, horas):
+        RegistroHoras.objects.create(empleado=self.empleado, proyecto=proyecto, fecha=fecha, horas=horas, descripcion='x')
+
+    def test_ritmo_es_la_pendiente_de_las_horas_acumuladas(self):
+        constante, creciente = self._proyecto(500), self._proyecto(500)
+        inicio = self.HOY - datetime.timedelta(days=10)
+        for d in range(10):
+            fecha = inicio + datetime.timedelta(days=d)
+            self._horas(constante, fecha, 2)
+            if d >= 5:
+                self._horas(creciente, fecha, 4)
+        fin = self.HOY - datetime.timedelta(days=1)
+
+        ritmos = _ritmos({constante.id: inicio, creciente.id: inicio}, fin)
+
+        self.assertAlmostEqual(ritmos[constante.id], 2.0)
+        # Acumulado 0,0,0,0,0,4,8,12,16,20 en d = 0..9: pendiente = cov(d, C) / var(d) = 190 / 82.5
+        self.assertAlmostEqual(ritmos[creciente.id], 190 / 82.5)
+
+    def test_riesgo(self):
+        hoy = self.HOY
+        en = lambda dias: hoy + datetime.timedelta(days=dias)
+        self.assertEqual(_riesgo(0, None, None, hoy), 'REB')
+        self.assertEqual(_riesgo(10, None, None, hoy), 'BAJ')
+        self.assertEqual(_riesgo(10, en(200), en(150), hoy), 'BAJ')
+        self.assertEqual(_riesgo(10, en(100), en(150), hoy), 'ALT')
+        self.assertEqual(_riesgo(10, en(30), None, hoy), 'ALT')
+        self.assertEqual(_riesgo(10, en(90), None, hoy), 'MED')
+        self.assertEqual(_riesgo(10, en(91), None, hoy), 'BAJ')
+
+    def test_ritmo_casi_nulo_no_da_fecha_de_agotamiento(self):
+        proyecto = self._proyecto(10000)
+        self._horas(proyecto, self.HOY - datetime.timedelta(days=1), 1)
+
+        pronostico, = calcular_pronosticos(self.HOY)
+
+        self.assertEqual(pronostico.proyecto_id, proyecto.id)
+        self.assertIsNone(pronostico.fecha_agotamiento)
+        self.assertEqual(pronostico.riesgo, 'BAJ')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AdmisionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(ADMISION_WORKERS=1, ADMISION_RESERVADOS_INTERACTIVOS=1)
+    def test_sin_workers_fuera_de_la_reserva_se_rechaza(self):
+        with self.assertRaises(Saturado):
+            with admitir('exportaciones'):
+                pass
+
+    @override_settings(ADMISION_WORKERS=2, ADMISION_RESERVADOS_INTERACTIVOS=1)
+    def test_con_un_worker_libre_se_admite_uno_sin_cola(self):
+        self.assertEqual(configuracion('exportaciones')['global'], 1)
+        self.assertEqual(configuracion('exportaciones')['cola'], 0)
+        with admitir('exportaciones'):
+            pass
+
+
+class TransferenciaTests(TestCase):
+    """transferir() a un segundo SQLite, interrumpida a la mitad y reanudada."""
+
+    DESTINO = 'transferencia_prueba'
+    # '__all__' se resuelve en setUpClass, ya con el destino registrado
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # El destino se registra y migra antes de que TestCase abra sus transacciones
+        cls.directorio = tempfile.TemporaryDirectory()
+        ruta = Path(cls.directorio.name) / 'destino.sqlite3'
+        transferencia.registrar_conexion(f'sqlite:///{ruta}', cls.DESTINO)
+        call_command('migrate', database=cls.DESTINO, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[cls.DESTINO].close()
+        connections.settings.pop(cls.DESTINO)
+        cls.directorio.cleanup()
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        empleado = User.objects.create_user('emp', password='x', first_name='Ana "la jefa"')
+        cliente = Cliente.objects.create(nombre='Cliente, S.A.', rfc='ABC123456XY1')
+        proyecto = Proyecto.objects.create(
+            nombre='Proyecto', fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=100, cliente=cliente,
+        )
+        proyecto.administradores.add(admin)
+        AsignacionProyecto.objects.create(empleado=empleado, proyecto=proyecto)
+        RegistroHoras.objects.bulk_create([
+            RegistroHoras(
+                empleado=empleado, proyecto=proyecto, fecha=datetime.date(2025, 1, 1) + datetime.timedelta(days=i),
+                horas=i % 8 + 1, descripcion=f'Linea {i}, con "comillas"\ny salto',
+            )
+            for i in range(25)
+        ])
+        Actividad.registrar(admin, 'CREAR', 'Alta', objeto=proyecto, nombre='Proyecto', filas={'a': 1})
+
+    def test_reanudar_despues_de_una_interrupcion(self):
+        escribir = transferencia._escribir
+        escritos = []
+
+        def escribir_e_interrumpir(modelo, alias, filas):
+            # Se corta en el cuarto lote de horas, con las tablas anteriores completas
+            if modelo is RegistroHoras and escritos.count(RegistroHoras) == 3:
+                raise RuntimeError('conexion perdida')
+            escribir(modelo, alias, filas)
+            escritos.append(modelo)
+
+        with mock.patch.object(transferencia, '_escribir', escribir_e_interrumpir):
+            with self.assertRaises(RuntimeError):
+                transferencia.transferir('default', self.DESTINO, lote=4)
+        parcial = RegistroHoras.todos.using(self.DESTINO).count()
+        self.assertTrue(0 < parcial < 25)
+
+        with self.assertRaises(ValueError):
+            transferencia.transferir('default', self.DESTINO, lote=4)
+        resultados = transferencia.transferir('default', self.DESTINO, lote=4, reanudar=True)
+
+        self.assertTrue(all(r['coincide'] for r in resultados), [r['tabla'] for r in resultados if not r['coincide']])
+        copiadas = {r['tabla']: r['copiadas'] for r in resultados}
+        self.assertEqual(copiadas[RegistroHoras._meta.db_table], 25 - parcial)
+        for modelo in (User, RegistroHoras, Actividad):
+            self.assertEqual(transferencia.huella(modelo, 'default', 10), transferencia.huella(modelo, self.DESTINO, 10))
+
+    def test_texto_copy_en_csv(self):
+        descripcion = RegistroHoras._meta.get_field('descripcion')
+        datos = Actividad._meta.get_field('datos')
+        self.assertEqual(transferencia._texto_copy(descripcion, None), '')
+        self.assertEqual(transferencia._texto_copy(descripcion, ''), '""')
+        self.assertEqual(transferencia._texto_copy(descripcion, 'a, "b"\nc'), '"a, ""b""\nc"')
+        self.assertEqual(transferencia._texto_copy(descripcion, True), '"t"')
+        self.assertEqual(transferencia._texto_copy(datos, {'x': 'y'}), '"{""x"": ""y""}"')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ArchivoTests(TestCase):
+    """Archivar y restaurar un proyecto no cambia los totales de los reportes."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.empleados = [User.objects.create_user(f'emp{i}', password='x') for i in range(2)]
+        cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+        self.proyecto, self.otro = (
+            Proyecto.objects.create(
+                nombre=nombre, fecha_inicial=datetime.date(2024, 1, 1), cantidad_h=500, cliente=cliente,
+            )
+            for nombre in ('Cerrado', 'Activo')
+        )
+        for proyecto in (self.proyecto, self.otro):
+            for empleado in self.empleados:
+                AsignacionProyecto.objects.create(empleado=empleado, proyecto=proyecto)
+        RegistroHoras.objects.bulk_create([
+            RegistroHoras(
+                empleado=self.empleados[i % 2], proyecto=proyecto,
+                fecha=datetime.date(2024, 1, 1) + datetime.timedelta(days=7 * i), horas=i % 5 + 1, descripcion='x',
+            )
+            for proyecto in (self.proyecto, self.otro)
+            for i in range(12)
+        ])
+        Proyecto.objects.filter(id=self.proyecto.id).update(situacion='FIN')
+        self.proyecto.refresh_from_db()
+
+    def _totales(self, fecha_inicio=None, fecha_fin=None):
+        registros = RegistroHoras.objects.all()
+        if fecha_inicio:
+            registros = registros.filter(fecha__range=(fecha_inicio, fecha_fin))
+        proyectos, empleados = totales_combinados(registros, {}, fecha_inicio, fecha_fin)
+        return (
+            sorted((p['id'], p['registradas']) for p in proyectos),
+            sorted((e['empleado__username'], e['horas_totales'], e['num_registros']) for e in empleados),
+        )
+
+    def test_archivar_y_restaurar(self):
+        rangos = [(None, None), (datetime.date(2024, 1, 15), datetime.date(2024, 2, 20))]
+        antes = [self._totales(*rango) for rango in rangos]
+        registros = sorted(RegistroHoras.objects.filter(proyecto=self.proyecto).values_list('id', 'fecha', 'horas'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archivo = archivar_proyecto(self.proyecto, self.admin, lote=5)
+
+        self.assertFalse(RegistroHoras.todos.filter(proyecto=self.proyecto).exists())
+        self.assertFalse(AsignacionProyecto.objects.filter(proyecto=self.proyecto).exists())
+        self.assertEqual(
+            (archivo.registros, archivo.horas, archivo.asignaciones),
+            (12, sum(h for _, _, h in registros), 2),
+        )
+        self.assertEqual((archivo.fecha_desde, archivo.fecha_hasta), (registros[0][1], registros[-1][1]))
+        self.assertEqual([self._totales(*rango) for rango in rangos], antes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(restaurar_proyecto(self.proyecto, self.admin, lote=5), (12, 2))
+
+        self.assertFalse(ArchivoProyecto.objects.filter(proyecto=self.proyecto).exists())
+        self.assertFalse(RegistroHorasArchivado.objects.exists())
+        self.assertFalse(AsignacionArchivada.objects.exists())
+        self.assertEqual(
+            sorted(RegistroHoras.objects.filter(proyecto=self.proyecto).values_list('id', 'fecha', 'horas')), registros,
+        )
+        self.assertEqual(AsignacionProyecto.objects.filter(proyecto=self.proyecto, activo=True).count(), 2)
+        self.assertEqual([self._totales(*rango) for rango in rangos], antes)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ComparacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.empleado = User.objects.create_user('emp', password='x')
+        cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+        self.proyecto = Proyecto.objects.create(
+            nombre='P', fecha_inicial=datetime.date(2024, 1, 1), cantidad_h=500, cliente=cliente,
+        )
+        RegistroHoras.objects.bulk_create([
+            RegistroHoras(empleado=self.empleado, proyecto=self.proyecto, fecha=fecha, horas=horas, descripcion='x')
+            for fecha, horas in (
+                (datetime.date(2024, 1, 10), 4), (datetime.date(2024, 1, 20), 3),
+                (datetime.date(2024, 2, 5), 6), (datetime.date(2024, 2, 6), 2),
+            )
+        ])
+
+    def _total(self, fecha_inicio, fecha_fin):
+        actual = (fecha_inicio, fecha_fin)
+        resultado = comparar_periodos(
+            RegistroHoras.objects.all(), {}, actual, periodo_de_referencia(*actual, 'anterior'),
+        )
+        return resultado['total']['actual'], resultado['total']['anterior']
+
+    def test_meses_cerrados_salen_del_snapshot(self):
+        febrero = (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+        self.assertEqual(self._total(*febrero), (8, 7))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cerrar_periodo(2024, 1)
+        # Un cambio posterior en las filas vivas de enero no altera el mes cerrado
+        RegistroHoras.objects.filter(fecha=datetime.date(2024, 1, 10)).update(horas=1)
+        self.assertEqual(self._total(*febrero), (8, 7))
+
+        # Rango que mezcla el mes cerrado con dias abiertos
+        self.assertEqual(self._total(datetime.date(2024, 1, 1), datetime.date(2024, 2, 5)), (13, 0))
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AsignacionMasivaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cliente = Cliente.objects.create(nombre='Cliente', rfc='ABC123456XY1')
+        self.proyectos = [
+            Proyecto.objects.create(nombre=f'P{i}', fecha_inicial=datetime.date(2025, 1, 1), cantidad_h=100, cliente=cliente)
+            for i in range(3)
+        ]
+
+    def _empleados(self, cantidad, desde=0):
+        return [User.objects.create_user(f'emp{desde + i}', password='x') for i in range(cantidad)]
+
+    def _activas(self, proyecto):
+        return set(AsignacionProyecto.objects.filter(proyecto=proyecto, activo=True).values_list('empleado_id', flat=True))
+
+    def test_asignar_y_desasignar_con_un_evento_cada_uno(self):
+        empleados = self._empleados(3)
+        AsignacionProyecto.objects.create(empleado=empleados[0], proyecto=self.proyectos[0])
+        p0, p1 = self.proyectos[:2]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creadas = asignar_en_bloque(self.admin, empleados, [p0, p1], rol='DEV')
+
+        self.assertEqual(creadas, 5)
+        ids = {e.id for e in empleados}
+        self.assertEqual(self._activas(p0), ids)
+        self.assertEqual(self._activas(p1), ids)
+        evento, = Actividad.objects.filter(tipo='ASIGNAR')
+        self.assertEqual((evento.datos['creadas'], evento.datos['rol'], evento.datos['masiva']), (5, 'DEV', True))
+        self.assertEqual(asignar_en_bloque(self.admin, empleados, [p0]), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bajas = desasignar_en_bloque(self.admin, empleados[:2], [p0, p1])
+
+        self.assertEqual(bajas, 4)
+        self.assertEqual(self._activas(p0), {empleados[2].id})
+        evento, = Actividad.objects.filter(tipo='DESASIGNAR')
+        self.assertEqual((evento.datos['bajas'], evento.objeto_id), (4, None))
+
+    def test_mover_equipo(self):
+        empleados = self._empleados(2)
+        p0, p1, destino = self.proyectos
+        asignar_en_bloque(self.admin, empleados, [p0, p1])
+
+        self.assertEqual(mover_en_bloque(self.admin, empleados, [p0, p1], destino), (4, 2))
+        self.assertEqual(self._activas(p0), set())
+        self.assertEqual(self._activas(destino), {e.id for e in empleados})
+        evento = Actividad.objects.filter(tipo='ASIGNAR').latest('id')
+        self.assertEqual((evento.objeto_id, evento.datos['bajas'], evento.datos['creadas']), (destino.id, 4, 2))
+
+    def test_numero_de_queries_no_depende_del_tamano(self):
+        def queries(cantidad, desde):
+            empleados = self._empleados(cantidad, desde)
+            with CaptureQueriesContext(connection) as contexto:
+                asignar_en_bloque(self.admin, empleados, self.proyectos)
+            return len(contexto.captured_queries)
+
+        self.assertEqual(queries(2, 0), queries(20, 100))
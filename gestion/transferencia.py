@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Transferencia de datos entre bases (SQLite -> PostgreSQL y viceversa) sin pasar
+por dumpdata/loaddata (manage.py transfer_data).
+
+Cada tabla se lee del origen en lotes por llave primaria (sin instanciar modelos)
+y se escribe en el destino con COPY en PostgreSQL o con executemany en las
+demas bases, una transaccion por lote y en orden de llaves foraneas. Toda la
+lectura ocurre en una sola transaccion del origen, asi que el volcado es
+consistente aunque haya escrituras mientras tanto.
+
+Reanudar: como cada lote se confirma en orden de llave primaria, el maximo pk
+de cada tabla del destino indica donde continuar.
+
+Verificacion: numero de filas y sha256 de las filas normalizadas de cada tabla,
+calculados en ambas bases.
+"""
+
+import datetime
+import decimal
+import hashlib
+import io
+import json
+import time
+
+import dj_database_url
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Max
+
+
+# === CONEXIONES ===
+def registrar_conexion(valor, alias):
+    """
+    Devuelve el alias de una conexion: `valor` puede ser un alias de DATABASES o
+    una URL de base de datos (postgres://..., sqlite:////ruta/db.sqlite3), que se
+    registra con el nombre `alias`.
+    """
+    if valor in connections.settings:
+        return valor
+    if '://' not in valor:
+        raise ValueError(f"'{valor}' no es un alias de DATABASES ni una URL de base de datos.")
+    configuracion = dj_database_url.parse(valor)
+    connections.settings[alias] = connections.configure_settings({DEFAULT_DB_ALIAS: configuracion})[DEFAULT_DB_ALIAS]
+    return alias
+
+
+# === TABLAS EN ORDEN DE LLAVES FORANEAS ===
+def _dependencias(modelo, modelos):
+    return {
+        campo.related_model for campo in modelo._meta.concrete_fields
+        if campo.is_relation and campo.related_model in modelos and campo.related_model is not modelo
+    }
+
+
+def modelos_a_transferir():
+    """
+    Usuarios y todas las tablas de gestion (incluidas las intermedias M2M),
+    ordenados para que cada tabla llegue despues de las que referencia.
+    Permisos, grupos y content types los crea migrate en el destino.
+    """
+    pendientes = [User] + list(apps.get_app_config('gestion').get_models(include_auto_created=True))
+    ordenados = []
+    while pendientes:
+        listos = [m for m in pendientes if not _dependencias(m, pendientes)]
+        if not listos:
+            raise ValueError('Dependencias circulares entre: ' + ', '.join(m._meta.label for m in pendientes))
+        ordenados += listos
+        pendientes = [m for m in pendientes if m not in listos]
+    return ordenados
+
+
+# === LECTURA POR LOTES ===
+def _lotes(modelo, alias, desde, lote):
+    """Filas (tuplas en el orden de concrete_fields) con pk > desde, de `lote` en `lote`."""
+    campos = [campo.attname for campo in modelo._meta.concrete_fields]
+    indice_pk = campos.index(modelo._meta.pk.attname)
+    consulta = modelo._base_manager.using(alias).order_by('pk').values_list(*campos)
+    ultimo = desde
+    while True:
+        filas = list((consulta.filter(pk__gt=ultimo) if ultimo is not None else consulta)[:lote])
+        if not filas:
+            return
+        yield filas
+        ultimo = filas[-1][indice_pk]
+
+
+def ultimo_pk(modelo, alias):
+    return modelo._base_manager.using(alias).aggregate(ultimo=Max('pk'))['ultimo']
+
+
+# === ESCRITURA ===
+def _texto_copy(campo, valor):
+    """Valor en formato CSV de COPY: NULL sin comillas, todo lo demas entre comillas."""
+    if valor is None:
+        return ''
+    if isinstance(campo, models.JSONField):
+        texto = json.dumps(valor, cls=campo.encoder)
+    elif isinstance(valor, bool):
+        texto = 't' if valor else 'f'
+    elif isinstance(valor, (datetime.date, datetime.time)):
+        texto = valor.isoformat()
+    else:
+        texto = str(valor)
+    return '"' + texto.replace('"', '""') + '"'
+
+
+def _copy(cursor, sql, contenido):
+    cursor = cursor.cursor
+    if hasattr(cursor, 'copy_expert'):  # psycopg2
+        cursor.copy_expert(sql, io.StringIO(contenido))
+    else:  # psycopg 3
+        with cursor.copy(sql) as copia:
+            copia.write(contenido)
+
+
+def _escribir(modelo, alias, filas):
+    conexion = connections[alias]
+    qn = conexion.ops.quote_name
+    campos = modelo._meta.concrete_fields
+    tabla = qn(modelo._meta.db_table)
+    columnas = ', '.join(qn(campo.column) for campo in campos)
+
+    with transaction.atomic(using=alias), conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            contenido = ''.join(
+                ','.join(_texto_copy(campo, valor) for campo, valor in zip(campos, fila)) + '\n'
+                for fila in filas
+            )
+            _copy(cursor, f'COPY {tabla} ({columnas}) FROM STDIN WITH (FORMAT csv)', contenido)
+        else:
+            marcas = ', '.join(['%s'] * len(campos))
+            cursor.executemany(
+                f'INSERT INTO {tabla} ({columnas}) VALUES ({marcas})',
+                [[campo.get_db_prep_save(valor, conexion) for campo, valor in zip(campos, fila)] for fila in filas],
+            )
+
+
+def reiniciar_secuencias(alias, modelos):
+    conexion = connections[alias]
+    sentencias = conexion.ops.sequence_reset_sql(no_style(), modelos)
+    if sentencias:
+        with transaction.atomic(using=alias), conexion.cursor() as cursor:
+            for sql in sentencias:
+                cursor.execute(sql)
+
+
+# === VERIFICACION ===
+def _normalizar(valor):
+    if isinstance(valor, datetime.datetime) and valor.tzinfo is not None:
+        return valor.astimezone(datetime.timezone.utc).isoformat()
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, sort_keys=True)
+    if isinstance(valor, decimal.Decimal):
+        return str(valor.normalize())
+    return valor
+
+
+def huella(modelo, alias, lote):
+    """(filas, sha256) de la tabla, independiente del motor de base de datos."""
+    resumen = hashlib.sha256()
+    total = 0
+    for filas in _lotes(modelo, alias, None, lote):
+        for fila in filas:
+            resumen.update(repr(tuple(_normalizar(valor) for valor in fila)).encode('utf-8'))
+        total += len(filas)
+    return total, resumen.hexdigest()
+
+
+# === TRANSFERENCIA ===
+def _snapshot(alias):
+    """Abre una transaccion de lectura consistente en el origen (usar dentro de atomic)."""
+    conexion = connections[alias]
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+
+
+def transferir(origen, destino, lote=5000, reanudar=False, verificar=True, avisar=None):
+    """
+    Copia todas las tablas de `origen` a `destino` (aliases). Sin `reanudar`, las
+    tablas del destino deben estar vacias. `avisar(mensaje)` recibe el avance.
+    Devuelve una lista de {'tabla', 'copiadas', 'segundos', 'filas', 'coincide'}.
+    """
+    avisar = avisar or (lambda mensaje: None)
+    modelos = modelos_a_transferir()
+
+    inicio_en = {modelo: ultimo_pk(modelo, destino) for modelo in modelos}
+    if not reanudar:
+        ocupadas = [modelo._meta.db_table for modelo, ultimo in inicio_en.items() if ultimo is not None]
+        if ocupadas:
+            raise ValueError(
+                'El destino ya tiene datos en: ' + ', '.join(ocupadas) + '. Usa --reanudar para continuar '
+                'una transferencia interrumpida.'
+            )
+
+    resultados = []
+    with transaction.atomic(using=origen):
+        _snapshot(origen)
+        for modelo in modelos:
+            tabla = modelo._meta.db_table
+            inicio = time.perf_counter()
+            copiadas = 0
+            for filas in _lotes(modelo, origen, inicio_en[modelo], lote):
+                _escribir(modelo, destino, filas)
+                copiadas += len(filas)
+                avisar(f'{tabla}: {copiadas} filas')
+            resultados.append({
+                'tabla': tabla, 'copiadas': copiadas, 'segundos': time.perf_counter() - inicio,
+                'filas': None, 'coincide': None,
+            })
+
+        reiniciar_secuencias(destino, modelos)
+
+        if verificar:
+            for modelo, resultado in zip(modelos, resultados):
+                filas_origen, huella_origen = huella(modelo, origen, lote)
+                filas_destino, huella_destino = huella(modelo, destino, lote)
+                resultado['filas'] = filas_origen
+                resultado['coincide'] = (filas_origen, huella_origen) == (filas_destino, huella_destino)
+    return resultados
@@ -26,6 +26,7 @@ urlpatterns = [
     # Empleados (admin)
     path('empleados/', views.lista_empleados, name='lista_empleados'),
     path('registrar/usuario/', views.registrar_usuario, name='registrar_usuario'),
+    path('empleados/asignacion-masiva/', views.asignacion_masiva, name='asignacion_masiva'),
     path('empleados/<int:empleado_id>/asignar/', views.asignar_proyecto_empleado, name='asignar_proyecto_empleado'),
     path('empleados/<int:empleado_id>/desasignar/<int:proyecto_id>/', views.desasignar_proyecto_empleado, name='desasignar_proyecto_empleado'),
     path('empleados/<int:usuario_id>/editar/', views.editar_usuario, name='editar_usuario'),
@@ -34,13 +35,17 @@ urlpatterns = [
     # Registro de horas
     path('horas/registrar/', views.registrar_horas, name='registrar_horas'),
     path('horas/mis-horas/', views.mis_horas, name='mis_horas'),
+    path('horas/mis-horas/calendario/', views.mis_horas_calendario, name='mis_horas_calendario'),
     path('gestion/horas/', views.ver_registros_horas_admin, name='ver_registros_horas_admin'),
+    path('gestion/horas/serie/', views.serie_presupuesto, name='serie_presupuesto'),
+    path('gestion/admision/', views.metricas_admision, name='metricas_admision'),
 
     # Reportes
     path('reportes/', views.reportes, name='reportes'),
+    path('reportes/utilizacion/', views.utilizacion, name='utilizacion'),
 
     # Actividades (admin)
-    path('admin/actividades/', views.ver_actividades, name='ver_actividades'),
+    path('gestion/actividades/', views.ver_actividades, name='ver_actividades'),
 
     # Cambio de contraseña
     path('cambiar-password/', views.CambiarPasswordView.as_view(), name='cambiar_password'),
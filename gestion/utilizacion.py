@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Reporte de utilizacion: horas registradas contra capacidad por empleado y por
+semana o mes, sobre el calendario laboral (DIAS_LABORALES menos DiaFeriado).
+
+Las horas salen de una sola agregacion (empleado, periodo) en la base de datos.
+Los dias laborales de cada periodo se cuentan una sola vez y la capacidad de
+cada empleado es su factor (horas_semanales / dias laborales por semana) por
+esos dias, asi que rellenar los periodos sin horas no hace consultas ni recorre
+dias por empleado. El resultado se cachea por rango, granularidad y version de
+los datos.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+
+from .archivo import alcanza_archivo, registros_archivados
+from .cache import version_datos
+from .calendario import MESES
+from .coalescencia import calcular_una_vez
+from .models import DiaFeriado, RegistroHoras
+
+
+GRANULARIDADES = {'semana': TruncWeek, 'mes': TruncMonth}
+# Por debajo de este porcentaje el empleado se marca como subasignado
+UTILIZACION_BAJA = 70
+
+
+def inicio_periodo(fecha, granularidad):
+    if granularidad == 'semana':
+        return fecha - datetime.timedelta(days=fecha.weekday())
+    return fecha.replace(day=1)
+
+
+def _etiqueta(inicio, granularidad):
+    if granularidad == 'semana':
+        return f'{inicio:%d/%m}'
+    return f'{MESES[inicio.month - 1][:3]} {inicio.year}'
+
+
+def periodos(fecha_inicio, fecha_fin, granularidad):
+    """
+    Periodos del rango con sus dias laborales (recortados al rango y sin feriados):
+    [{'inicio': fecha, 'etiqueta': str, 'dias': n}, ...].
+    """
+    feriados = set(
+        DiaFeriado.objects.filter(fecha__range=(fecha_inicio, fecha_fin)).values_list('fecha', flat=True)
+    )
+    resultado = {}
+    dia = fecha_inicio
+    while dia <= fecha_fin:
+        inicio = inicio_periodo(dia, granularidad)
+        periodo = resultado.setdefault(inicio, {'inicio': inicio, 'etiqueta': _etiqueta(inicio, granularidad), 'dias': 0})
+        if dia.weekday() in settings.DIAS_LABORALES and dia not in feriados:
+            periodo['dias'] += 1
+        dia += datetime.timedelta(days=1)
+    return list(resultado.values())
+
+
+def _porcentaje(horas, capacidad):
+    return round(100 * horas / capacidad) if capacidad else None
+
+
+def _horas_por_periodo(fecha_inicio, fecha_fin, granularidad):
+    """{(empleado_id, inicio_periodo): horas} en una agregacion (mas el archivo si el rango llega)."""
+    truncar = GRANULARIDADES[granularidad]
+    consultas = [RegistroHoras.objects.filter(fecha__range=(fecha_inicio, fecha_fin))]
+    if alcanza_archivo(fecha_inicio, fecha_fin):
+        consultas.append(registros_archivados({}, fecha_inicio, fecha_fin))
+    horas = {}
+    for consulta in consultas:
+        filas = (
+            consulta.annotate(periodo=truncar('fecha'))
+            .values('empleado_id', 'periodo')
+            .annotate(horas=Sum('horas'))
+            .order_by()
+        )
+        for f in filas:
+            clave = (f['empleado_id'], f['periodo'])
+            horas[clave] = horas.get(clave, 0) + f['horas']
+    return horas
+
+
+def calcular_utilizacion(fecha_inicio, fecha_fin, granularidad):
+    lista_periodos = periodos(fecha_inicio, fecha_fin, granularidad)
+    horas = _horas_por_periodo(fecha_inicio, fecha_fin, granularidad)
+    dias_por_semana = len(settings.DIAS_LABORALES)
+
+    empleados = (
+        User.objects.filter(is_staff=False, is_active=True)
+        .annotate(capacidad_semanal=Coalesce(F('perfilempleado__horas_semanales'), Value(settings.CAPACIDAD_SEMANAL)))
+        .order_by('first_name', 'last_name', 'username')
+        .values('id', 'username', 'first_name', 'last_name', 'capacidad_semanal')
+    )
+
+    filas = []
+    for e in empleados:
+        por_dia = e['capacidad_semanal'] / dias_por_semana
+        celdas = []
+        for p in lista_periodos:
+            registradas = horas.get((e['id'], p['inicio']), 0)
+            capacidad = round(por_dia * p['dias'], 1)
+            celdas.append({
+                'horas': registradas, 'capacidad': capacidad,
+                'utilizacion': _porcentaje(registradas, capacidad),
+            })
+        total_horas = sum(c['horas'] for c in celdas)
+        total_capacidad = round(sum(c['capacidad'] for c in celdas), 1)
+        filas.append({
+            'id': e['id'],
+            'nombre': f"{e['first_name']} {e['last_name']}".strip() or e['username'],
+            'username': e['username'],
+            'capacidad_semanal': e['capacidad_semanal'],
+            'celdas': celdas,
+            'horas': total_horas,
+            'capacidad': total_capacidad,
+            'utilizacion': _porcentaje(total_horas, total_capacidad),
+        })
+
+    return {
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'granularidad': granularidad,
+        'periodos': lista_periodos,
+        'empleados': filas,
+        'utilizacion_baja': UTILIZACION_BAJA,
+    }
+
+
+def utilizacion(fecha_inicio, fecha_fin, granularidad):
+    """calcular_utilizacion() cacheado por rango y granularidad hasta que cambien los datos."""
+    clave = 'utilizacion|{}|{}|{}|{}'.format(
+        version_datos('registros', 'usuarios', 'calendario'), granularidad, fecha_inicio, fecha_fin,
+    )
+    return calcular_una_vez(
+        clave, lambda: calcular_utilizacion(fecha_inicio, fecha_fin, granularidad),
+        timeout=settings.FRAGMENTOS_TIMEOUT,
+    )
@@ -7,40 +7,127 @@ from django.contrib.auth.views import PasswordChangeView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models import Sum, Prefetch, F, Count
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from io import BytesIO
+from django.db import transaction
+from django.db.models import Sum, Q
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.utils.functional import SimpleLazyObject
+from django.conf import settings
 import datetime
-import openpyxl
-from openpyxl.styles import Font
-from xhtml2pdf import pisa
+import heapq
+from operator import itemgetter
 
 from .models import (
     Proyecto, RegistroHoras, Actividad, Cliente,
-    AsignacionProyecto, PerfilEmpleado,
+    AsignacionProyecto, PerfilEmpleado, PronosticoProyecto,
 )
 from .forms import (
     ProyectoCreateForm, ProyectoUpdateForm, RegistroHorasForm,
     ClienteForm, EmpleadoForm, EmpleadoUpdateForm,
     CustomPasswordChangeForm, ReporteFiltroForm, AsignarProyectoForm,
+    ActividadFiltroForm, AsignacionMasivaForm, UtilizacionForm,
 )
+from .presupuesto import analisis_presupuesto, reducir_serie
+from .cierres import totales_combinados
+from .comparacion import comparar_periodos, periodo_de_referencia
+from .referencias import referencias
+from .calendario import horas_del_mes, leer_mes, semanas
+from .eliminacion import marcar_cliente, marcar_proyectos
+from .archivo import alcanza_archivo, registros_archivados
+from .asignaciones import asignar_en_bloque, desasignar_en_bloque, mover_en_bloque
+from .utilizacion import utilizacion as utilizacion_por_periodo
+from . import exportadores
+from .coalescencia import calcular_una_vez, respuesta_una_vez
+from .admision import Saturado, admitir, metricas, respuesta_saturado
+from .acceso import Bloqueado, devolver_intento, tomar_intento
+from .streaming import render_streaming
+from .middleware import permitir_compresion
+from .cache import (
+    asignaciones_activas_por_empleado, invalidar_asignaciones,
+    invalidar_asignaciones_proyecto, version_datos,
+)
+
+
+# === FRAGMENTOS CACHEADOS ===
+def _filtros_normalizados(**filtros):
+    """Filtros como texto estable (objetos por pk, vacios como ''), para claves de cache."""
+    return '&'.join(
+        f'{nombre}={getattr(valor, "pk", valor) if valor is not None else ""}'
+        for nombre, valor in sorted(filtros.items())
+    )
+
+
+def _contexto_fragmentos(*ambitos, **filtros):
+    """
+    Variables para {% cache %}: la version de los datos de los que depende el fragmento
+    y los filtros activos normalizados. Los datos del contexto deben ser perezosos
+    (querysets o SimpleLazyObject) para que un acierto en el cache no los calcule.
+    """
+    return {
+        'fragmentos_timeout': settings.FRAGMENTOS_TIMEOUT,
+        'fragmentos_version': version_datos(*ambitos),
+        'fragmentos_filtros': _filtros_normalizados(**filtros),
+    }
+
+
+# === LISTADOS PAGINADOS ===
+LISTADO_POR_PAGINA = 25
+
+
+def _listado(request, queryset, ordenes, busqueda, orden_default):
+    """
+    Aplica busqueda, orden y paginacion del lado del servidor a un listado.
+    `ordenes` mapea el nombre de cada columna ordenable (?orden=) a su campo.
+    """
+    q = request.GET.get('q', '').strip()
+    if q:
+        filtro = Q()
+        for campo in busqueda:
+            filtro |= Q(**{f'{campo}__icontains': q})
+        queryset = queryset.filter(filtro)
+
+    orden = request.GET.get('orden', orden_default)
+    if orden.lstrip('-') not in ordenes:
+        orden = orden_default
+    prefijo = '-' if orden.startswith('-') else ''
+    # 'id' como desempate para que la paginacion sea estable
+    queryset = queryset.order_by(prefijo + ordenes[orden.lstrip('-')], prefijo + 'id')
+
+    page_obj = Paginator(queryset, LISTADO_POR_PAGINA).get_page(request.GET.get('page'))
+    return {
+        'page_obj': page_obj,
+        'q': q,
+        'orden': orden,
+        # Siguiente valor de ?orden= para cada encabezado (alterna asc/desc)
+        'ordenes_siguientes': {
+            columna: ('-' + columna if orden == columna else columna) for columna in ordenes
+        },
+    }
 
 
 # === LOGIN ===
 def login_view(request):
     """Vista para iniciar sesiÃƒÂ³n."""
     if request.method == 'POST':
+        # Limite de intentos por usuario e IP antes de correr el hash de la contrasena
+        username = request.POST.get('username', '')
+        try:
+            tomar_intento(request, username)
+        except Bloqueado as error:
+            response = render(request, 'gestion/login.html', {
+                'form': AuthenticationForm(request), 'bloqueado': error.reintentar,
+            }, status=429)
+            response['Retry-After'] = str(error.reintentar)
+            return response
+
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
+            devolver_intento(request, username)
             user = form.get_user()
             login(request, user)
 
             # Ã¢Å“â€¦ Registrar acciÃƒÂ³n en la bitÃƒÂ¡cora
-            Actividad.objects.create(
-                usuario=user,
-                accion=f"IniciÃƒÂ³ sesiÃƒÂ³n en el sistema."
-            )
+            Actividad.registrar(user, 'LOGIN', "IniciÃƒÂ³ sesiÃƒÂ³n en el sistema.")
 
             return redirect('admin_home' if user.is_staff else 'empleado_home')
     else:
@@ -53,20 +140,27 @@ def login_view(request):
 def logout_view(request):
     """Cierra sesiÃƒÂ³n y redirige al login."""
     # Ã¢Å“â€¦ Registrar acciÃƒÂ³n en la bitÃƒÂ¡cora
-    Actividad.objects.create(
-        usuario=request.user,
-        accion=f"CerrÃƒÂ³ sesiÃƒÂ³n."
-    )
+    Actividad.registrar(request.user, 'LOGOUT', "CerrÃƒÂ³ sesiÃƒÂ³n.")
 
     logout(request)
     return redirect('login')
 
 
 # === ADMINISTRADOR ===
+PROYECTOS_EN_RIESGO = 5
+
+
 @login_required
 def admin_home(request):
     """Panel principal del administrador."""
-    return render(request, 'gestion/admin_home.html')
+    # Pronosticos precalculados por pronosticar_presupuestos: aqui solo se leen
+    en_riesgo = (
+        PronosticoProyecto.objects.filter(riesgo__in=('REB', 'ALT'), proyecto__pendiente_eliminacion=False)
+        .select_related('proyecto')
+        .only('riesgo', 'fecha_agotamiento', 'restantes', 'calculado_en', 'proyecto__nombre')
+        .order_by('-riesgo', 'fecha_agotamiento')
+    )
+    return render(request, 'gestion/admin_home.html', {'proyectos_en_riesgo': en_riesgo[:PROYECTOS_EN_RIESGO]})
 
 
 # === EMPLEADO ===
@@ -82,8 +176,23 @@ def lista_proyectos(request):
     """Muestra todos los proyectos (solo admin)."""
     if not request.user.is_staff:
         return redirect('empleado_home')
-    proyectos = Proyecto.objects.select_related('cliente').all().order_by('id')
-    return render(request, 'gestion/proyectos.html', {'proyectos': proyectos})
+    proyectos = Proyecto.objects.select_related('cliente', 'pronostico').only(
+        'id', 'nombre', 'fecha_inicial', 'fecha_final', 'cantidad_h', 'situacion', 'cliente__nombre',
+        'pronostico__riesgo', 'pronostico__fecha_agotamiento',
+    )
+    context = _listado(
+        request, proyectos,
+        ordenes={
+            'id': 'id', 'nombre': 'nombre', 'cliente': 'cliente__nombre',
+            'fecha_inicial': 'fecha_inicial', 'fecha_final': 'fecha_final',
+            'cantidad_h': 'cantidad_h', 'situacion': 'situacion',
+            'agotamiento': 'pronostico__fecha_agotamiento',
+        },
+        busqueda=['nombre', 'cliente__nombre'],
+        orden_default='id',
+    )
+    context['proyectos'] = context['page_obj']
+    return render(request, 'gestion/proyectos.html', context)
 
 
 # AsegÃƒÂºrate de que esta lÃƒÂ­nea estÃƒÂ© al principio de tu archivo, junto a los otros imports
@@ -101,11 +210,11 @@ def nuevo_proyecto(request):
         if form.is_valid():
             proyecto = form.save()
 
-            # Ã¢Å“â€¦ Registrar acciÃƒÂ³n (si tienes el modelo Actividad)
-            # Actividad.objects.create(
-            #     usuario=request.user,
-            #     accion=f"CreÃƒÂ³ el proyecto '{proyecto.nombre}'."
-            # )
+            # Ã¢Å“â€¦ Registrar acciÃƒÂ³n
+            Actividad.registrar(
+                request.user, 'CREAR', f"CreÃƒÂ³ el proyecto '{proyecto.nombre}'.",
+                objeto=proyecto, nombre=proyecto.nombre,
+            )
 
             return redirect('lista_proyectos')
     else:
@@ -127,12 +236,13 @@ def editar_proyecto(request, proyecto_id):
         form = ProyectoUpdateForm(request.POST, instance=proyecto)
         if form.is_valid():
             cliente = form.save()
-            Actividad.objects.create(usuario=request.user, accion="Registro el cliente '" + cliente.nombre + "'. ")
+            if {'situacion', 'fecha_inicial', 'nombre'} & set(form.changed_data):
+                invalidar_asignaciones_proyecto(proyecto.id)
 
             # Ã¢Å“â€¦ Registrar acciÃƒÂ³n
-            Actividad.objects.create(
-                usuario=request.user,
-                accion=f"EditÃƒÂ³ el proyecto '{proyecto.nombre}'."
+            Actividad.registrar(
+                request.user, 'EDITAR', f"EditÃƒÂ³ el proyecto '{proyecto.nombre}'.",
+                objeto=proyecto, nombre=proyecto.nombre, campos=form.changed_data,
             )
 
             return redirect('lista_proyectos')
@@ -152,12 +262,13 @@ def eliminar_proyecto(request, proyecto_id):
 
     if request.method == 'POST':
         nombre = proyecto.nombre
-        proyecto.delete()
+        # Se oculta de inmediato; purgar_eliminados borra sus horas y asignaciones en lotes
+        marcar_proyectos(Proyecto.objects.filter(id=proyecto.id), request.user)
 
         # Ã¢Å“â€¦ Registrar acciÃƒÂ³n
-        Actividad.objects.create(
-            usuario=request.user,
-            accion=f"EliminÃƒÂ³ el proyecto '{nombre}'."
+        Actividad.registrar(
+            request.user, 'ELIMINAR', f"EliminÃƒÂ³ el proyecto '{nombre}'.",
+            objeto=proyecto, nombre=nombre,
         )
 
         return redirect('lista_proyectos')
@@ -177,15 +288,19 @@ def registrar_horas(request):
         form = RegistroHorasForm(request.POST, user=request.user)
         
         if form.is_valid():
-            registro = form.save(commit=False)
-            registro.empleado = request.user
-            registro.save()
-
-            # Ã¢Å“â€¦ Registrar acciÃƒÂ³n
-            Actividad.objects.create(
-                usuario=request.user,
-                accion=f"RegistrÃƒÂ³ {registro.horas} horas en el proyecto '{registro.proyecto.nombre}'."
-            )
+            # El registro y su evento se escriben en una sola transaccion (un solo candado en SQLite)
+            with transaction.atomic():
+                registro = form.save(commit=False)
+                registro.empleado = request.user
+                registro.save()
+
+                # Ã¢Å“â€¦ Registrar acciÃƒÂ³n
+                Actividad.registrar(
+                    request.user, 'HORAS',
+                    f"RegistrÃƒÂ³ {registro.horas} horas en el proyecto '{registro.proyecto.nombre}'.",
+                    objeto=registro.proyecto, nombre=registro.proyecto.nombre,
+                    horas=str(registro.horas), fecha=registro.fecha.isoformat(), registro_id=registro.id,
+                )
 
             return redirect('mis_horas')
     else:
@@ -197,16 +312,40 @@ def registrar_horas(request):
 
 @login_required
 def mis_horas(request):
-    """Muestra las horas registradas por el empleado autenticado."""
+    """Muestra las horas del empleado autenticado, un mes a la vez (?mes=AAAA-MM)."""
     if request.user.is_staff:
         return redirect('admin_home')
 
-    horas = RegistroHoras.objects.filter(empleado=request.user).select_related('proyecto')
-    return render(request, 'gestion/mis_horas.html', {'horas': horas})
+    anio, mes = leer_mes(request.GET.get('mes'), timezone.localdate())
+    contexto = horas_del_mes(request.user, anio, mes)
+    contexto['semanas'] = semanas(anio, mes, contexto['por_dia'])
+    return render(request, 'gestion/mis_horas.html', contexto)
+
+
+@login_required
+def mis_horas_calendario(request):
+    """Version compacta en JSON de mis_horas para un widget de calendario."""
+    if request.user.is_staff:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    anio, mes = leer_mes(request.GET.get('mes'), timezone.localdate())
+    datos = horas_del_mes(request.user, anio, mes)
+    return JsonResponse({
+        'mes': '%04d-%02d' % (anio, mes),
+        'total': datos['total'],
+        'dias': {fecha.isoformat(): total for fecha, total in sorted(datos['por_dia'].items())},
+        'proyectos': [
+            {'id': p['proyecto_id'], 'nombre': p['proyecto__nombre'], 'horas': p['horas'], 'registros': p['registros']}
+            for p in datos['por_proyecto']
+        ],
+        'anterior': datos['anterior'],
+        'siguiente': datos['siguiente'],
+    })
 
 
 # === ADMINISTRADOR: VER REGISTROS DE HORAS ===
 @login_required
+@permitir_compresion
 def ver_registros_horas_admin(request):
     """
     Muestra todos los registros de horas con filtros y resÃƒÂºmenes.
@@ -217,7 +356,7 @@ def ver_registros_horas_admin(request):
 
     # ===== PASO 1: DEFINE 'registros' Y FILTROS =====
     # Define la variable 'registros' aquÃƒÂ­ al principio
-    registros = RegistroHoras.objects.select_related('empleado', 'proyecto')
+    registros = RegistroHoras.objects.all()
 
     # Obtiene los IDs de los filtros ANTES de calcular resÃƒÂºmenes
     empleado_id = request.GET.get('empleado')
@@ -232,37 +371,10 @@ def ver_registros_horas_admin(request):
 
     # ===== PASO 2: CALCULA RESÃƒÅ¡MENES (usando 'registros') =====
     total_horas = registros.aggregate(total=Sum('horas'))['total'] or 0
-    resumen_empleados = (
-        registros.values('empleado__username')
-        .annotate(total=Sum('horas'))
-        .order_by('-total')
-    )
-    # ... (el resto del cÃƒÂ¡lculo de resumen_proyectos_con_variacion que ya tienes) ...
-    proyectos_con_registros_ids = registros.values_list('proyecto_id', flat=True).distinct()
-    resumen_proyectos_qs = (
-        Proyecto.objects.filter(id__in=proyectos_con_registros_ids)
-        .annotate(
-            total_horas_registradas=Sum('registros_horas__horas'),
-            horas_presupuestadas_valor=F('cantidad_h')
-        )
-        .order_by('-total_horas_registradas')
-    )
-    resumen_proyectos_con_variacion = []
-    for p in resumen_proyectos_qs:
-        variacion = None
-        presupuestado = p.horas_presupuestadas_valor
-        registrado = p.total_horas_registradas if p.total_horas_registradas is not None else 0
-        if presupuestado is not None:
-             try:
-                 variacion = float(registrado) - float(presupuestado)
-             except (ValueError, TypeError):
-                 variacion = None
-        resumen_proyectos_con_variacion.append({
-            'nombre': p.nombre,
-            'horas_presupuestadas_valor': presupuestado,
-            'total_horas_registradas': registrado,
-            'variacion': variacion
-        })
+    resumen_empleados = SimpleLazyObject(lambda: _resumen_por_empleado(registros))
+    # Consumo, variacion y agotamiento estimado respetando los filtros activos.
+    # Se calcula solo si el fragmento del resumen no esta en cache.
+    resumen_proyectos = SimpleLazyObject(lambda: analisis_presupuesto(registros))
     # ====================================================
 
     # ===== PASO 3: OBTÃƒâ€°N DATOS PARA SELECTS =====
@@ -273,19 +385,97 @@ def ver_registros_horas_admin(request):
     # ===== PASO 4: CREA EL CONTEXT =====
     context = {
         'registros': registros, # Ahora 'registros' ya existe
+        'hay_registros': registros.exists(),
         'empleados': empleados,
         'proyectos': proyectos,
         'total_horas': total_horas,
         'resumen_empleados': resumen_empleados,
-        'resumen_proyectos': resumen_proyectos_con_variacion,
+        'resumen_proyectos': resumen_proyectos,
         'empleado_id': empleado_id, # 'empleado_id' tambiÃƒÂ©n debe estar definido antes
         'proyecto_id': proyecto_id, # 'proyecto_id' tambiÃƒÂ©n debe estar definido antes
+        **_contexto_fragmentos('registros', 'proyectos', empleado=empleado_id, proyecto=proyecto_id),
     }
     # ===================================
 
+    # Detalle como diccionarios (values) para no instanciar modelos por fila
+    filas_registros = _filas_registros(registros)
+    if settings.STREAMING_REPORTES:
+        return render_streaming(
+            request, 'gestion/registro_horas_admin.html', context,
+            filas_registros, 'gestion/registro_horas_filas.html',
+        )
+    context['filas_registros'] = filas_registros
     return render(request, 'gestion/registro_horas_admin.html', context)
 
 
+def _resumen_por_empleado(registros):
+    filas = registros.values('empleado_id').annotate(total=Sum('horas')).order_by('-total')
+    ref = referencias()
+    return [
+        {'empleado__username': ref.empleado(f['empleado_id'])['username'], 'total': f['total']}
+        for f in filas
+    ]
+
+
+def _filas_registros(registros):
+    """Detalle por lotes solo con ids; usuario y proyecto salen de las referencias en memoria."""
+    filas = registros.values('empleado_id', 'proyecto_id', 'fecha', 'horas', 'descripcion')
+    ref = None
+    for fila in filas.iterator(chunk_size=settings.STREAMING_FILAS_POR_LOTE):
+        ref = ref or referencias()
+        fila['empleado__username'] = ref.empleado(fila['empleado_id'])['username']
+        fila['proyecto__nombre'] = ref.proyecto(fila['proyecto_id'])['nombre']
+        yield fila
+
+
+# === ADMINISTRADOR: METRICAS DEL CONTROL DE ADMISION ===
+@login_required
+def metricas_admision(request):
+    """Ocupacion, cola y contadores (admitidos/encolados/rechazados) por grupo, en JSON."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    return JsonResponse(metricas())
+
+
+# === ADMINISTRADOR: SERIE DE CONSUMO PARA GRAFICAS ===
+@login_required
+def serie_presupuesto(request):
+    """
+    Devuelve en JSON la serie de consumo acumulado (burn-down) por proyecto,
+    con variacion y agotamiento estimado. Acepta los filtros empleado, proyecto,
+    fecha_inicio, fecha_fin y puntos (maximo de puntos por serie).
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'No autorizado.'}, status=403)
+
+    registros = RegistroHoras.objects.all()
+    try:
+        if request.GET.get('empleado'):
+            registros = registros.filter(empleado_id=int(request.GET['empleado']))
+        if request.GET.get('proyecto'):
+            registros = registros.filter(proyecto_id=int(request.GET['proyecto']))
+        if request.GET.get('fecha_inicio'):
+            registros = registros.filter(fecha__gte=datetime.date.fromisoformat(request.GET['fecha_inicio']))
+        if request.GET.get('fecha_fin'):
+            registros = registros.filter(fecha__lte=datetime.date.fromisoformat(request.GET['fecha_fin']))
+        puntos = min(max(int(request.GET.get('puntos', 50)), 2), 500)
+    except ValueError:
+        return JsonResponse({'error': 'Filtros invalidos.'}, status=400)
+
+    proyectos = []
+    for p in analisis_presupuesto(registros):
+        proyectos.append({
+            'id': p['id'],
+            'nombre': p['nombre'],
+            'presupuestadas': p['presupuestadas'],
+            'registradas': p['registradas'],
+            'variacion': p['variacion'],
+            'fecha_agotamiento': p['fecha_agotamiento'],
+            'serie': reducir_serie(p['serie'], puntos),
+        })
+    return JsonResponse({'proyectos': proyectos})
+
+
 # === ADMINISTRADOR: VER BITÃƒÂCORA DE ACTIVIDADES FALTA RELACIONAR EL URLS Y DEFINIR LA BITACORA===
 @login_required
 def ver_actividades(request):
@@ -293,8 +483,71 @@ def ver_actividades(request):
     if not request.user.is_staff:
         return redirect('empleado_home')
 
-    actividades = Actividad.objects.select_related('usuario').order_by('-fecha')[:100]
-    return render(request, 'gestion/actividades.html', {'actividades': actividades})
+    form = ActividadFiltroForm(request.GET)
+    actividades = Actividad.objects.select_related('usuario').order_by('-fecha', '-id')
+
+    # Filtros que aprovechan los indices (usuario, fecha), (tipo, fecha) y (objeto, fecha)
+    if form.is_valid():
+        cleaned_data = form.cleaned_data
+        if cleaned_data.get('usuario'):
+            actividades = actividades.filter(usuario=cleaned_data['usuario'])
+        if cleaned_data.get('tipo'):
+            actividades = actividades.filter(tipo=cleaned_data['tipo'])
+        if cleaned_data.get('objeto_tipo'):
+            actividades = actividades.filter(objeto_tipo=cleaned_data['objeto_tipo'])
+        if cleaned_data.get('objeto_id'):
+            actividades = actividades.filter(objeto_id=cleaned_data['objeto_id'])
+        # Rangos sobre la columna (no fecha__date) para que el indice se use
+        if cleaned_data.get('fecha_inicio'):
+            actividades = actividades.filter(fecha__gte=_inicio_del_dia(cleaned_data['fecha_inicio']))
+        if cleaned_data.get('fecha_fin'):
+            actividades = actividades.filter(
+                fecha__lt=_inicio_del_dia(cleaned_data['fecha_fin'] + datetime.timedelta(days=1))
+            )
+
+    # Paginacion por llave (keyset): la pagina siguiente empieza despues de la ultima
+    # (fecha, id) mostrada, sin OFFSET, asi cuesta lo mismo en cualquier punto de la bitacora
+    cursor = _leer_cursor(request.GET.get('despues'))
+    if cursor:
+        fecha, actividad_id = cursor
+        actividades = actividades.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=actividad_id))
+
+    actividades = list(actividades[:ACTIVIDADES_POR_PAGINA + 1])
+    siguiente = None
+    if len(actividades) > ACTIVIDADES_POR_PAGINA:
+        actividades = actividades[:ACTIVIDADES_POR_PAGINA]
+        siguiente = _cursor(actividades[-1])
+
+    filtros = request.GET.copy()
+    filtros.pop('despues', None)
+    return render(request, 'gestion/actividades.html', {
+        'form': form,
+        'actividades': actividades,
+        'filtros': filtros.urlencode(),
+        'siguiente': siguiente,
+        'es_primera_pagina': cursor is None,
+    })
+
+
+ACTIVIDADES_POR_PAGINA = 50
+
+
+def _inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+
+
+def _cursor(actividad):
+    """Posicion de una actividad como texto: microsegundos desde epoch y id."""
+    return f"{int(actividad.fecha.timestamp()) * 10**6 + actividad.fecha.microsecond}.{actividad.id}"
+
+
+def _leer_cursor(valor):
+    try:
+        microsegundos, actividad_id = (int(parte) for parte in valor.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    fecha = datetime.datetime.fromtimestamp(microsegundos // 10**6, tz=datetime.timezone.utc)
+    return fecha.replace(microsecond=microsegundos % 10**6), actividad_id
 
 #
 def registrar_cliente(request):
@@ -309,41 +562,58 @@ def registrar_cliente(request):
         form = ClienteForm(request.POST)
         if form.is_valid():
             cliente = form.save()
-            Actividad.objects.create(usuario=request.user, accion=f"Registro el cliente '{cliente.nombre}'.")
+            Actividad.registrar(
+                request.user, 'CREAR', f"Registro el cliente '{cliente.nombre}'.",
+                objeto=cliente, nombre=cliente.nombre,
+            )
             return redirect('admin_home')
     else:
         form = ClienteForm()
 
-    return render(request, 'gestion/registrar_cliente.html', {'form': form})@login_required 
+    return render(request, 'gestion/registrar_cliente.html', {'form': form})
+
+
+@login_required
+@permitir_compresion
 def reportes(request):
     """
     Muestra los 3 reportes,
     O EXPORTA A EXCEL (3 hojas)
     O EXPORTA A PDF (1 documento con 3 tablas)
+    Solo accesible para administradores.
     """
+    if not request.user.is_staff:
+        return redirect('empleado_home')
     
     # 1. Obtenemos la base de todos los registros (sin cambios)
-    base_query = RegistroHoras.objects.select_related(
-        'proyecto', 
-        'empleado', 
-        'proyecto__cliente'
-    )
+    filtros_activos = {}
+    # Los nombres no se leen aqui: salen de las referencias en memoria (gestion/referencias.py).
+    # El manager solo une gestion_proyecto para ocultar los proyectos pendientes de eliminacion
+    base_query = RegistroHoras.objects.all()
     
     # 2. Instanciamos el formulario (sin cambios)
     form = ReporteFiltroForm(request.GET)
     
-    # 3. Aplicamos los filtros (sin cambios)
+    # 3. Aplicamos los filtros (tambien a los snapshots de meses cerrados)
+    filtros_cerrados = {}
+    fecha_inicio = fecha_fin = None
     if form.is_valid():
         cleaned_data = form.cleaned_data
+        filtros_activos = cleaned_data
+        fecha_inicio = cleaned_data.get('fecha_inicio')
+        fecha_fin = cleaned_data.get('fecha_fin')
         
         if cleaned_data.get('cliente'):
             base_query = base_query.filter(proyecto__cliente=cleaned_data.get('cliente'))
+            filtros_cerrados['proyecto__cliente'] = cleaned_data.get('cliente')
             
         if cleaned_data.get('proyecto'):
             base_query = base_query.filter(proyecto=cleaned_data.get('proyecto'))
+            filtros_cerrados['proyecto'] = cleaned_data.get('proyecto')
             
         if cleaned_data.get('empleado'):
             base_query = base_query.filter(empleado=cleaned_data.get('empleado'))
+            filtros_cerrados['empleado'] = cleaned_data.get('empleado')
             
         if cleaned_data.get('fecha_inicio'):
             base_query = base_query.filter(fecha__gte=cleaned_data.get('fecha_inicio'))
@@ -351,62 +621,45 @@ def reportes(request):
         if cleaned_data.get('fecha_fin'):
             base_query = base_query.filter(fecha__lte=cleaned_data.get('fecha_fin'))
 
-    # Esta es nuestra lista principal de bitÃƒÂ¡cora
-    reporte_bitacora = base_query.order_by('-fecha')
-
-    # 4. GENERAR REPORTE POR PROYECTO (sin cambios)
-    reporte_proyectos_query = reporte_bitacora.values(
-        'proyecto__id',
-        'proyecto__nombre',
-        'proyecto__cliente__nombre',
-        'proyecto__cantidad_h'
-    ).annotate(
-        horas_registradas_filtradas=Sum('horas')
-    ).order_by('-horas_registradas_filtradas')
-
-    reporte_proyectos = []
-    for p in reporte_proyectos_query:
-        presupuestadas = p['proyecto__cantidad_h']
-        registradas = p['horas_registradas_filtradas']
-        
-        if registradas is None:
-            registradas = 0
-            
-        if presupuestadas is not None and presupuestadas > 0:
-            progreso = (registradas / presupuestadas) * 100
-            horas_restantes = presupuestadas - registradas
-        else:
-            progreso = 0
-            horas_restantes = -registradas 
-            
-        p['progreso'] = round(progreso, 2)
-        p['horas_restantes'] = horas_restantes
-        reporte_proyectos.append(p)
-
-
-    # 5. GENERAR REPORTE POR EMPLEADO (sin cambios)
-    reporte_empleados = reporte_bitacora.values(
-        'empleado__id',
-        'empleado__first_name',
-        'empleado__last_name',
-        'empleado__username'
-    ).annotate(
-        horas_totales=Sum('horas'),
-        num_registros=Count('id')
-    ).order_by('-horas_totales')
-    
-    reporte_empleados_procesado = []
-    for e in reporte_empleados:
-        if e['horas_totales'] is None:
-            e['horas_totales'] = 0
-        reporte_empleados_procesado.append(e)
+    # Bitacora: horas vivas y, si el rango de fechas llega a ellas, las de proyectos archivados
+    bitacoras = [base_query.order_by('-fecha')]
+    if alcanza_archivo(fecha_inicio, fecha_fin):
+        bitacoras.append(registros_archivados(filtros_cerrados, fecha_inicio, fecha_fin).order_by('-fecha'))
+
+    # 4 y 5. GENERAR REPORTES POR PROYECTO Y POR EMPLEADO
+    # Los meses cerrados salen de sus snapshots; solo los dias abiertos se agregan en vivo.
+    # Diferidos: si las tablas estan en el cache de fragmentos no se calculan.
+    # Requests identicos y simultaneos comparten un solo calculo (coalescencia).
+    ambitos_reporte = ('registros', 'proyectos', 'cierres', 'usuarios')
+    clave_reporte = '{}|{}'.format(
+        version_datos(*ambitos_reporte),
+        _filtros_normalizados(**{campo: filtros_activos.get(campo) for campo in form.fields}),
+    )
+    totales = SimpleLazyObject(lambda: calcular_una_vez(
+        f'reportes:totales|{clave_reporte}',
+        lambda: totales_combinados(base_query, filtros_cerrados, fecha_inicio, fecha_fin),
+    ))
+    reporte_proyectos = SimpleLazyObject(lambda: totales[0])
+    reporte_empleados_procesado = SimpleLazyObject(lambda: totales[1])
+
+    # Comparacion con otro periodo: ambos periodos en una sola consulta agrupada
+    comparacion = None
+    if filtros_activos.get('comparar'):
+        referencia = periodo_de_referencia(fecha_inicio, fecha_fin, filtros_activos['comparar'])
+        comparacion = SimpleLazyObject(lambda: calcular_una_vez(
+            f'reportes:comparacion|{clave_reporte}',
+            lambda: comparar_periodos(
+                RegistroHoras.objects.filter(**filtros_cerrados), filtros_cerrados,
+                (fecha_inicio, fecha_fin), referencia,
+            ),
+        ))
 
     # 6. Preparamos el contexto (sin cambios)
     contexto = {
         'form': form,
-        'reporte_bitacora': reporte_bitacora,
         'reporte_proyectos': reporte_proyectos,
         'reporte_empleados': reporte_empleados_procesado, 
+        'comparacion': comparacion,
     }
 
     # 
@@ -416,89 +669,85 @@ def reportes(request):
     
     export_type = request.GET.get('exportar')
 
-    # --- OpciÃƒÂ³n 1: Exportar a EXCEL (Sin cambios) ---
-    if export_type == 'excel':
-        
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        )
-        filename = f"reporte_completo_{datetime.date.today()}.xlsx"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        wb = openpyxl.Workbook()
-        bold_font = Font(bold=True)
-        
-        # Hoja 1: Resumen Proyectos
-        ws1 = wb.active
-        ws1.title = "Resumen Proyectos"
-        headers1 = [
-            "Proyecto", "Cliente", "H. Presupuestadas", 
-            "H. Registradas", "H. Restantes", "Consumo (%)"
-        ]
-        ws1.append(headers1)
-        for cell in ws1[1]: cell.font = bold_font
-        for p in reporte_proyectos:
-            ws1.append([
-                p['proyecto__nombre'], p['proyecto__cliente__nombre'],
-                p['proyecto__cantidad_h'], p['horas_registradas_filtradas'],
-                p['horas_restantes'], p['progreso']
-            ])
-
-        # Hoja 2: Resumen Empleados
-        ws2 = wb.create_sheet(title="Resumen Empleados")
-        headers2 = ["Empleado", "Horas Totales", "Numero de Registros"]
-        ws2.append(headers2)
-        for cell in ws2[1]: cell.font = bold_font
-        for e in reporte_empleados_procesado:
-            full_name = f"{e['empleado__first_name']} {e['empleado__last_name']}"
-            ws2.append([
-                full_name.strip() or e['empleado__username'],
-                e['horas_totales'], e['num_registros']
-            ])
-
-        # Hoja 3: BitÃƒÂ¡cora Detalle
-        ws3 = wb.create_sheet(title="Bitacora Detalle")
-        headers3 = ["Fecha", "Empleado", "Proyecto", "Cliente", "Horas", "Descripcion"]
-        ws3.append(headers3)
-        for cell in ws3[1]: cell.font = bold_font
-        for registro in reporte_bitacora:
-            ws3.append([
-                registro.fecha, registro.empleado.get_full_name() or registro.empleado.username,
-                registro.proyecto.nombre, registro.proyecto.cliente.nombre,
-                registro.horas, registro.descripcion
-            ])
-
-        wb.save(response)
-        return response
-
-    # --- OpciÃƒÂ³n 2: Exportar a PDF (Ã‚Â¡ACTUALIZADO CON xhtml2pdf!) ---
-    elif export_type == 'pdf':
-        
-    
-        html_string = render_to_string('gestion/reporte_pdf.html', contexto)
-
-    
-        result = BytesIO()
-        
-    
-        pdf = pisa.pisaDocument(BytesIO(html_string.encode("UTF-8")), result)
-        
-       
-        if not pdf.err:
-         
-            response = HttpResponse(result.getvalue(), content_type='application/pdf')
-            filename = f"reporte_completo_{datetime.date.today()}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        
-      
-        return HttpResponse(f"Error al generar el PDF: {pdf.err}", status=500)
+    # Los motores de exportacion se cargan hasta que se piden (ver gestion/exportadores.py).
+    # Las exportaciones pasan por el control de admision: si no hay lugar, 429 + Retry-After.
+    if export_type in ('excel', 'pdf'):
+        try:
+            with admitir('exportaciones'):
+                if export_type == 'excel':
+                    return respuesta_una_vez(
+                        f'reportes:excel|{clave_reporte}',
+                        lambda: exportadores.exportar_excel(
+                            reporte_proyectos, reporte_empleados_procesado, _filas_bitacora(*bitacoras), comparacion,
+                        ),
+                    )
+                return respuesta_una_vez(
+                    f'reportes:pdf|{clave_reporte}',
+                    lambda: exportadores.exportar_pdf(dict(contexto, filas_bitacora=_filas_bitacora(*bitacoras))),
+                )
+        except Saturado as error:
+            return respuesta_saturado(error)
 
     
     # --- OpciÃƒÂ³n 3: Mostrar la pÃƒÂ¡gina HTML normal ---
     # Si no se presionÃƒÂ³ ningÃƒÂºn botÃƒÂ³n de 'exportar', renderizamos la pÃƒÂ¡gina.
+    contexto.update(_contexto_fragmentos(
+        *ambitos_reporte, **{campo: filtros_activos.get(campo) for campo in form.fields}
+    ))
+    filas_bitacora = _filas_bitacora(*bitacoras)
+    if settings.STREAMING_REPORTES:
+        return render_streaming(request, 'gestion/reportes.html', contexto, filas_bitacora, 'gestion/reportes_filas.html')
+    contexto['filas_bitacora'] = filas_bitacora
     return render(request, 'gestion/reportes.html', contexto)
 
+
+# === ADMINISTRADOR: UTILIZACION Y CAPACIDAD ===
+@login_required
+def utilizacion(request):
+    """Horas registradas contra capacidad por empleado y semana/mes; exportable a Excel."""
+    if not request.user.is_staff:
+        return redirect('empleado_home')
+
+    form = UtilizacionForm(request.GET)
+    datos = None
+    if form.is_valid():
+        datos = utilizacion_por_periodo(
+            form.cleaned_data['fecha_inicio'], form.cleaned_data['fecha_fin'], form.cleaned_data['granularidad'],
+        )
+        if request.GET.get('exportar') == 'excel':
+            try:
+                with admitir('exportaciones'):
+                    return exportadores.exportar_utilizacion(datos)
+            except Saturado as error:
+                return respuesta_saturado(error)
+
+    return render(request, 'gestion/utilizacion.html', {'form': form, 'datos': datos})
+
+
+def _filas_bitacora(*consultas):
+    """
+    Filas de la bitacora leidas por lotes del servidor (values().iterator()),
+    solo con los ids de empleado y proyecto: los nombres salen de las referencias
+    en memoria. Las consultas (horas vivas y archivadas, ordenadas por -fecha) se
+    intercalan por fecha. Es perezoso: si la tabla sale del cache de fragmentos
+    no se consulta.
+    """
+    filas = heapq.merge(*(
+        registros.values('fecha', 'horas', 'descripcion', 'empleado_id', 'proyecto_id')
+        .iterator(chunk_size=settings.STREAMING_FILAS_POR_LOTE)
+        for registros in consultas
+    ), key=itemgetter('fecha'), reverse=True)
+    ref = None
+    for fila in filas:
+        ref = ref or referencias()
+        empleado = ref.empleado(fila['empleado_id'])
+        proyecto = ref.proyecto(fila['proyecto_id'])
+        fila['empleado'] = empleado['nombre']
+        fila['empleado__username'] = empleado['username']
+        fila['proyecto__nombre'] = proyecto['nombre']
+        fila['proyecto__cliente__nombre'] = proyecto['cliente']
+        yield fila
+
 def empleados(request):
 
 
@@ -512,24 +761,23 @@ def lista_empleados(request):
     if not request.user.is_staff:
         return redirect('empleado_home')
 
-    empleados = (
-        User.objects
-        .filter(is_staff=False, is_active=True)
-        .prefetch_related(
-            Prefetch(
-                'proyectos_como_empleado',
-                queryset=Proyecto.objects.only('id', 'nombre', 'situacion')
-            ),
-            Prefetch(
-                'asignaciones',
-                queryset=AsignacionProyecto.objects.filter(activo=True).select_related('proyecto').order_by('proyecto__nombre')
-                
-            )
-        )
-        .order_by('username')
+    empleados = User.objects.filter(is_staff=False, is_active=True).only('id', 'username', 'email')
+    context = _listado(
+        request, empleados,
+        ordenes={'id': 'id', 'username': 'username', 'email': 'email'},
+        busqueda=['username', 'email', 'first_name', 'last_name'],
+        orden_default='username',
     )
+    empleados = list(context['page_obj'])
+
+    # Asignaciones activas solo de la pagina visible, desde el cache compartido
+    asignaciones = asignaciones_activas_por_empleado([e.id for e in empleados])
+    for e in empleados:
+        e.asignaciones_activas = list(asignaciones[e.id].values())
 
-    return render(request, 'gestion/empleados.html', {'empleados': empleados})
+    context['empleados'] = empleados
+    context.update(_contexto_fragmentos('asignaciones', 'proyectos'))
+    return render(request, 'gestion/empleados.html', context)
 
 
 # === GESTIÃƒâ€œN DE CLIENTES (ADMIN) ===
@@ -538,11 +786,14 @@ def lista_clientes(request):
     if not request.user.is_staff:
         return redirect('empleado_home')
 
-    clientes = Cliente.objects.all()
-
-    context = {
-        'clientes': clientes
-    }
+    clientes = Cliente.objects.only('id', 'nombre', 'rfc', 'direccion', 'correo', 'telefono')
+    context = _listado(
+        request, clientes,
+        ordenes={'id': 'id', 'nombre': 'nombre', 'rfc': 'rfc', 'correo': 'correo'},
+        busqueda=['nombre', 'rfc', 'correo'],
+        orden_default='id',
+    )
+    context['clientes'] = context['page_obj']
 
     return render(request, 'gestion/lista_clientes.html', context)
 
@@ -557,9 +808,9 @@ def editar_cliente(request, cliente_id):
         form = ClienteForm(request.POST, instance=cliente)
         if form.is_valid():
             form.save()
-            Actividad.objects.create(
-                usuario=request.user,
-                accion=f"EditÃƒÂ³ el cliente '{cliente.nombre}'."
+            Actividad.registrar(
+                request.user, 'EDITAR', f"EditÃƒÂ³ el cliente '{cliente.nombre}'.",
+                objeto=cliente, nombre=cliente.nombre, campos=form.changed_data,
             )
             return redirect('lista_clientes')
     else:
@@ -575,10 +826,11 @@ def eliminar_cliente(request, cliente_id):
     cliente = get_object_or_404(Cliente, id=cliente_id)
     if request.method == 'POST':
         nombre = cliente.nombre
-        cliente.delete()
-        Actividad.objects.create(
-            usuario=request.user,
-            accion=f"EliminÃƒÂ³ el cliente '{nombre}'."
+        # Se oculta de inmediato junto con sus proyectos; purgar_eliminados hace el borrado
+        marcar_cliente(cliente, request.user)
+        Actividad.registrar(
+            request.user, 'ELIMINAR', f"EliminÃƒÂ³ el cliente '{nombre}'.",
+            objeto=cliente, nombre=nombre,
         )
         return redirect('lista_clientes')
     return render(request, 'gestion/eliminar_cliente.html', {'cliente': cliente})
@@ -600,10 +852,13 @@ def asignar_proyecto_empleado(request, empleado_id):
             asig.activo = True
             asig.fecha_asignacion = timezone.now().date()
             asig.save()
+            invalidar_asignaciones(empleado.id)
 
-            Actividad.objects.create(
-                usuario=request.user,
-                accion=f"AsignÃƒÂ³ el proyecto '{asig.proyecto.nombre}' a {empleado.username} (rol: {asig.get_rol_en_proyecto_display()})."
+            Actividad.registrar(
+                request.user, 'ASIGNAR',
+                f"AsignÃƒÂ³ el proyecto '{asig.proyecto.nombre}' a {empleado.username} (rol: {asig.get_rol_en_proyecto_display()}).",
+                objeto=asig.proyecto, nombre=asig.proyecto.nombre,
+                empleado=empleado.username, empleado_id=empleado.id, rol=asig.rol_en_proyecto,
             )
 
             return redirect('lista_empleados')
@@ -616,6 +871,43 @@ def asignar_proyecto_empleado(request, empleado_id):
     })
 
 
+# --- ASIGNACION MASIVA (VARIOS EMPLEADOS Y PROYECTOS) ---
+@login_required
+def asignacion_masiva(request):
+    """
+    Asigna, desasigna o mueve varios empleados entre varios proyectos en una sola
+    transaccion (ver gestion/asignaciones.py). Con Accept: application/json
+    responde el resumen en lugar de redirigir.
+    """
+    if not request.user.is_staff:
+        return redirect('empleado_home')
+
+    if request.method == 'POST':
+        form = AsignacionMasivaForm(request.POST)
+        if form.is_valid():
+            datos = form.cleaned_data
+            empleados, proyectos = list(datos['empleados']), list(datos['proyectos'])
+            resumen = {'accion': datos['accion'], 'bajas': 0, 'creadas': 0}
+            if datos['accion'] == 'asignar':
+                resumen['creadas'] = asignar_en_bloque(request.user, empleados, proyectos, datos['rol_en_proyecto'])
+            elif datos['accion'] == 'desasignar':
+                resumen['bajas'] = desasignar_en_bloque(request.user, empleados, proyectos)
+            else:
+                resumen['bajas'], resumen['creadas'] = mover_en_bloque(
+                    request.user, empleados, proyectos, datos['destino'], datos['rol_en_proyecto'],
+                )
+
+            if request.headers.get('Accept') == 'application/json':
+                return JsonResponse(resumen)
+            return redirect('lista_empleados')
+        if request.headers.get('Accept') == 'application/json':
+            return JsonResponse({'errores': form.errors}, status=400)
+    else:
+        form = AsignacionMasivaForm()
+
+    return render(request, 'gestion/asignacion_masiva.html', {'form': form})
+
+
 # --- DESASIGNAR (BAJA) PROYECTO DE EMPLEADO ---
 @login_required
 def desasignar_proyecto_empleado(request, empleado_id, proyecto_id):
@@ -634,10 +926,13 @@ def desasignar_proyecto_empleado(request, empleado_id, proyecto_id):
         asignacion.activo = False
         asignacion.fecha_baja = timezone.now().date()
         asignacion.save()
+        invalidar_asignaciones(empleado.id)
 
-        Actividad.objects.create(
-            usuario=request.user,
-            accion=f"DesasignÃƒÂ³ el proyecto '{asignacion.proyecto.nombre}' de {empleado.username}."
+        Actividad.registrar(
+            request.user, 'DESASIGNAR',
+            f"DesasignÃƒÂ³ el proyecto '{asignacion.proyecto.nombre}' de {empleado.username}.",
+            objeto=asignacion.proyecto, nombre=asignacion.proyecto.nombre,
+            empleado=empleado.username, empleado_id=empleado.id,
         )
 
         return redirect('lista_empleados')
@@ -663,7 +958,10 @@ def registrar_cliente(request):
         form = ClienteForm(request.POST)
         if form.is_valid():
             cliente = form.save() 
-            Actividad.objects.create(usuario=request.user, accion="Registro el cliente '" + cliente.nombre + "'.")
+            Actividad.registrar(
+                request.user, 'CREAR', f"Registro el cliente '{cliente.nombre}'.",
+                objeto=cliente, nombre=cliente.nombre,
+            )
             return redirect('admin_home') 
     else:
         
@@ -702,9 +1000,9 @@ def editar_usuario(request, usuario_id):
         form = EmpleadoUpdateForm(request.POST, instance=perfil, user_instance=empleado)
         if form.is_valid():
             form.save()
-            Actividad.objects.create(
-                usuario=request.user,
-                accion=f"EditÃƒÂ³ al usuario '{empleado.username}'."
+            Actividad.registrar(
+                request.user, 'EDITAR', f"EditÃƒÂ³ al usuario '{empleado.username}'.",
+                objeto=empleado, nombre=empleado.username,
             )
             return redirect('lista_empleados')
     else:
@@ -729,9 +1027,10 @@ def eliminar_usuario(request, usuario_id):
             activo=False,
             fecha_baja=timezone.now().date()
         )
-        Actividad.objects.create(
-            usuario=request.user,
-            accion=f"DesactivÃƒÂ³ al usuario '{empleado.username}'."
+        invalidar_asignaciones(empleado.id)
+        Actividad.registrar(
+            request.user, 'DESACTIVAR', f"DesactivÃƒÂ³ al usuario '{empleado.username}'.",
+            objeto=empleado, nombre=empleado.username,
         )
         return redirect('lista_empleados')
 